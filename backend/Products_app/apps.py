@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class ProductsAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Products_app'
+
+    def ready(self):
+        from . import receivers  # noqa: F401
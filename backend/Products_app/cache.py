@@ -0,0 +1,92 @@
+"""
+Read-through cache for product detail payloads.
+
+Entries are keyed by product id and a per-product version token, so
+invalidating a product is a single write that orphans the old entry. Only
+one request rebuilds a missing entry; concurrent readers wait briefly for it
+instead of all hitting the database.
+
+Version tokens are random, so dropping one is always safe: the next read
+just starts a new version. They expire a while after the entries they name,
+and ids that turn out not to exist keep none, so requests for arbitrary ids
+cannot pile up keys.
+"""
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Product
+from .serializers import ProductSerializer
+
+
+LOCK_TIMEOUT = 10
+WAIT_INTERVAL = 0.05
+
+
+def _version_key(pk):
+    return f"product:{pk}:version"
+
+
+def _version_ttl():
+    # outlive the entry the version names, so a live entry is never orphaned early
+    return settings.PRODUCT_CACHE_TTL * 2
+
+
+def _product_version(pk):
+    key = _version_key(pk)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, _version_ttl())
+        version = cache.get(key)
+    return version
+
+
+def _load(pk):
+    try:
+        product = Product.objects.select_related("vendor_id").get(pk=pk)
+    except Product.DoesNotExist:
+        return None
+    return ProductSerializer(product).data
+
+
+def get_product_detail(pk):
+    """
+    Return the serialized product, or None if it does not exist.
+    """
+    version = _product_version(pk)
+    key = f"product:{pk}:{version}"
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    lock_key = f"{key}:lock"
+    if cache.add(lock_key, 1, LOCK_TIMEOUT):
+        try:
+            data = _load(pk)
+            if data is not None:
+                cache.set(key, data, settings.PRODUCT_CACHE_TTL)
+                cache.touch(_version_key(pk), _version_ttl())
+            else:
+                cache.delete(_version_key(pk))
+            return data
+        finally:
+            cache.delete(lock_key)
+
+    # another request is rebuilding this entry; wait for it rather than
+    # issuing the same query
+    deadline = time.monotonic() + settings.PRODUCT_CACHE_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        data = cache.get(key)
+        if data is not None:
+            return data
+        if not cache.get(lock_key):
+            break
+    return _load(pk)
+
+
+def invalidate_products(pks):
+    """Orphan the cached entries of the given products."""
+    cache.set_many({_version_key(pk): uuid.uuid4().hex for pk in pks}, _version_ttl())
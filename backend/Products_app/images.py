@@ -0,0 +1,106 @@
+"""
+WebP thumbnails for product images.
+
+Every uploaded product image gets a small `thumb` for feeds, lists and carts,
+stored next to the original; detail pages serve the original. Encoding runs
+inline on the upload threads by default, where Pillow releases the GIL while
+it decodes and resizes. IMAGE_PROCESS_WORKERS > 0 moves it to a process pool
+that each web process starts lazily with the "spawn" method, so workers never
+inherit locks held by the server's other threads at fork time.
+
+`Product.image_url` holds one entry per image: a dict such as
+{"url": original, "thumb": ...}, or a bare URL string for images stored
+before thumbnails existed. `image_urls` flattens either form.
+"""
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# (name, longest edge in px), largest first: each variant is resized from the
+# one before it, which is much cheaper than resizing the original every time.
+VARIANTS = (("thumb", 320),)
+WEBP_QUALITY = 80
+
+_pool = None
+
+
+def _get_pool():
+    global _pool
+    if settings.IMAGE_PROCESS_WORKERS <= 0:
+        return None
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.IMAGE_PROCESS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def encode_variants(source, variants=VARIANTS, quality=WEBP_QUALITY):
+    """
+    Decode an image (a file path or raw bytes) and return {name: webp bytes}
+    for each variant, or None when the source is not a readable image.
+    Runs in pool workers, so it must not touch Django.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        with Image.open(source) as im:
+            # JPEG can decode straight to a reduced scale, skipping most of the work
+            largest = variants[0][1]
+            im.draft("RGB", (largest, largest))
+            image = ImageOps.exif_transpose(im)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() or "transparency" in image.info else "RGB")
+            encoded = {}
+            for name, edge in variants:
+                image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+                buffer = io.BytesIO()
+                image.save(buffer, "WEBP", quality=quality, method=4)
+                encoded[name] = buffer.getvalue()
+            return encoded
+    except (UnidentifiedImageError, OSError):
+        return None
+
+
+def submit_variants(upload):
+    """
+    Start encoding variants for a Django UploadedFile. Returns a future, or
+    None when encoding should happen inline (see `variants_for`).
+    """
+    pool = _get_pool()
+    if pool is None:
+        return None
+    if hasattr(upload, "temporary_file_path"):
+        return pool.submit(encode_variants, upload.temporary_file_path())
+    upload.seek(0)
+    return pool.submit(encode_variants, upload.read())
+
+
+def variants_for(upload, future=None):
+    """Wait for `future` from `submit_variants`, or encode inline without one."""
+    if future is not None:
+        return future.result()
+    if hasattr(upload, "temporary_file_path"):
+        return encode_variants(upload.temporary_file_path())
+    upload.seek(0)
+    return encode_variants(upload.read())
+
+
+def image_urls(entries, variant="url"):
+    """
+    Flatten `Product.image_url` to a list of URL strings for `variant`,
+    falling back to the original when an entry has no such rendition.
+    """
+    urls = []
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            url = entry.get(variant) or entry.get("url")
+            if url:
+                urls.append(url)
+        else:
+            urls.append(entry)
+    return urls
@@ -0,0 +1,54 @@
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from PIL import Image
+
+from Products_app.images import VARIANTS, encode_variants
+
+
+def phone_photo(width, height, seed):
+    """A JPEG with photo-like noise and gradients, so encoders can't cheat on flat colour."""
+    noise = Image.effect_noise((width, height), 64 + seed % 32)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    image = Image.merge("RGB", (noise, gradient, Image.blend(noise, gradient, 0.5)))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    help = "Measure product image variant encoding throughput, per core and across a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=24)
+        parser.add_argument("--width", type=int, default=4032)
+        parser.add_argument("--height", type=int, default=3024)
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        images = [phone_photo(options["width"], options["height"], i) for i in range(options["images"])]
+        variants = ", ".join(f"{name} {edge}px" for name, edge in VARIANTS)
+        self.stdout.write(
+            f"{len(images)} JPEGs {options['width']}x{options['height']} "
+            f"(~{sum(map(len, images)) // len(images) // 1024} KB each) -> {variants}"
+        )
+
+        start = time.perf_counter()
+        for data in images:
+            encode_variants(data)
+        single = len(images) / (time.perf_counter() - start)
+        self.stdout.write(f"1 core:     {single:7.1f} images/s")
+
+        workers = options["workers"]
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            list(pool.map(encode_variants, images[:workers]))  # warm the workers
+            start = time.perf_counter()
+            list(pool.map(encode_variants, images))
+            pooled = len(images) / (time.perf_counter() - start)
+        self.stdout.write(
+            f"{workers} workers: {pooled:7.1f} images/s ({pooled / workers:.1f} per core, {pooled / single:.1f}x)"
+        )
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from Products_app.models import Product
+from Products_app.serializers import ProductListSerializer, ProductSerializer
+from Pymarket.bench import best_of, scratch_database
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Compare query counts and throughput of ProductSerializer and ProductListSerializer."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=2000)
+        parser.add_argument("--vendors", type=int, default=50)
+        parser.add_argument("--repeats", type=int, default=5)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.seed(options["products"], options["vendors"])
+            queryset = Product.objects.all()
+
+            runs = {
+                "ProductSerializer": lambda: ProductSerializer(queryset.all(), many=True).data,
+                "ProductListSerializer": lambda: ProductListSerializer(
+                    ProductListSerializer.values(queryset.all()), many=True
+                ).data,
+            }
+
+            self.stdout.write(f"{'serializer':<24} {'queries':>8} {'seconds':>9} {'rows/s':>10}")
+            for name, run in runs.items():
+                with CaptureQueriesContext(connection) as queries:
+                    run()
+                seconds = best_of(run, options["repeats"])
+                self.stdout.write(
+                    f"{name:<24} {len(queries):>8} {seconds:>9.4f} {options['products'] / seconds:>10.0f}"
+                )
+
+    def seed(self, products, vendors):
+        vendor_rows = User.objects.bulk_create(
+            User(username=f"vendor{i}", email=f"vendor{i}@example.com", role="vendor", institute=f"Institute {i % 7}")
+            for i in range(vendors)
+        )
+        Product.objects.bulk_create(
+            (
+                Product(
+                    vendor_id=vendor_rows[i % vendors],
+                    product_name=f"Product {i}",
+                    description="Synthetic benchmark product",
+                    price=1000 + i,
+                    quantity=10,
+                    category=f"Category {i % 12}",
+                    image_url=[],
+                )
+                for i in range(products)
+            ),
+            batch_size=1000,
+        )
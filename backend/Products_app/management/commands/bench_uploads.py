@@ -0,0 +1,72 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.management.base import BaseCommand
+from supabase import create_client
+
+from Products_app.storage import upload_file, upload_files
+from Pymarket.bench import best_of
+
+
+class StubStorageHandler(BaseHTTPRequestHandler):
+    """Accepts Supabase storage uploads after a fixed delay and discards the body."""
+    latency = 0.1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        remaining = length
+        while remaining > 0:
+            remaining -= len(self.rfile.read(min(remaining, 65536)))
+        time.sleep(self.latency)
+        body = json.dumps({"Key": self.path.split("/object/", 1)[-1]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Compare serial and concurrent product image uploads against a local stub storage server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--images", type=int, default=5)
+        parser.add_argument("--size-kb", type=int, default=2048)
+        parser.add_argument("--latency-ms", type=int, default=150, help="Simulated storage round trip.")
+        parser.add_argument("--repeats", type=int, default=3)
+
+    def handle(self, *args, **options):
+        StubStorageHandler.latency = options["latency_ms"] / 1000
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubStorageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        client = create_client(f"http://127.0.0.1:{server.server_port}", "bench-service-key")
+
+        uploads = []
+        for i in range(options["images"]):
+            upload = TemporaryUploadedFile(f"image{i}.jpg", "image/jpeg", 0, None)
+            upload.write(os.urandom(options["size_kb"] * 1024))
+            upload.flush()
+            uploads.append(upload)
+
+        try:
+            serial = best_of(
+                lambda: [upload_file(upload, "bench", client=client) for upload in uploads], options["repeats"]
+            )
+            concurrent = best_of(lambda: upload_files(uploads, "bench", client=client), options["repeats"])
+        finally:
+            server.shutdown()
+            for upload in uploads:
+                upload.close()
+
+        self.stdout.write(
+            f"{options['images']} images x {options['size_kb']} KB, {options['latency_ms']} ms storage latency"
+        )
+        self.stdout.write(f"serial:     {serial * 1000:8.1f} ms")
+        self.stdout.write(f"concurrent: {concurrent * 1000:8.1f} ms ({serial / concurrent:.1f}x)")
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-18 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Products_app', '0008_merge_0004_productview_0007_productreviews_user'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['vendor_id', 'id'], name='product_vendor_id_idx'),
+        ),
+    ]
@@ -15,6 +15,12 @@ class Product(models.Model):
     rating = models.PositiveIntegerField(default=0)
     view_count = models.PositiveIntegerField(default=0, null=True,blank=True)
     # rating = models.ForeignKey()
+
+    class Meta:
+        indexes = [
+            # covers per-vendor product counts and newest-first vendor listings
+            models.Index(fields=['vendor_id', 'id'], name='product_vendor_id_idx'),
+        ]
     
     
 
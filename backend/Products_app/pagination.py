@@ -0,0 +1,102 @@
+import random
+import zlib
+
+from django.core import signing
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ProductCursorPagination(CursorPagination):
+    """Keyset pagination over product IDs, newest first."""
+    ordering = '-id'
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class FeedCursorPagination:
+    """
+    Cursor pagination over a ranked list of product IDs.
+
+    The cursor is a signed, opaque token carrying the ranking seed, the feed
+    snapshot the ranking was built from and the position in the ranked list,
+    so every page of a session is cut from the same ordering, even after the
+    catalog changes, and identical requests return identical responses.
+    """
+    page_size = 20
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = CursorPagination.invalid_cursor_message
+    salt = 'products.feed.cursor'
+
+    def decode_cursor(self, request):
+        """
+        Return (seed, snapshot, offset) from the request cursor, or
+        (None, None, 0) on the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, None, 0
+        try:
+            payload = signing.loads(encoded, salt=self.salt)
+            seed, offset = int(payload['s']), int(payload['o'])
+            snapshot = payload.get('v')
+        except (signing.BadSignature, KeyError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if offset < 0 or not (snapshot is None or isinstance(snapshot, str)):
+            raise NotFound(self.invalid_cursor_message)
+        return seed, snapshot, offset
+
+    def encode_cursor(self, seed, snapshot, offset):
+        return signing.dumps({'s': seed, 'v': snapshot, 'o': offset}, salt=self.salt, compress=True)
+
+    def session_seed(self, request):
+        """
+        Seed the ranking jitter from the auth token's ID so a login session
+        keeps one ordering; fall back to a fresh seed when there is none.
+        """
+        token_id = request.auth.get('jti') if hasattr(request.auth, 'get') else None
+        if token_id:
+            return zlib.crc32(str(token_id).encode())
+        return random.getrandbits(32)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def paginate_ids(self, ranked_ids, request, seed, snapshot, offset):
+        self.request = request
+        self.seed = seed
+        self.snapshot = snapshot
+        self.offset = offset
+        self.size = self.get_page_size(request)
+        self.has_next = offset + self.size < len(ranked_ids)
+        return ranked_ids[offset:offset + self.size]
+
+    def get_link(self, offset):
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.seed, self.snapshot, offset))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.get_link(self.offset + self.size)
+
+    def get_previous_link(self):
+        if self.offset <= 0:
+            return None
+        return self.get_link(max(self.offset - self.size, 0))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
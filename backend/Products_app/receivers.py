@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_products
+from .models import Product
+from .signals import stock_changed
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_written(sender, instance, **kwargs):
+    invalidate_products([instance.pk])
+
+
+@receiver(stock_changed)
+def product_stock_changed(sender, product_ids=(), **kwargs):
+    invalidate_products(product_ids)
@@ -1,4 +1,6 @@
+from django.db import models
 from rest_framework import serializers
+from .images import image_urls
 from .models import Product, ProductReviews
 
 
@@ -11,7 +13,27 @@ class ProductReviewSerializer(serializers.ModelSerializer):
         read_only_fields = ['user', 'created_at']
 
 
+class ProductImagesField(serializers.JSONField):
+    """
+    `Product.image_url` rendered as a list of URL strings for one image
+    variant ("url" for originals or "thumb"), whichever form the
+    stored entries take.
+    """
+
+    def __init__(self, variant="url", **kwargs):
+        self.variant = variant
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return image_urls(value, self.variant)
+
+
 class ProductSerializer(serializers.ModelSerializer):
+    # image_url is the only JSON column; mapping it here keeps its position
+    serializer_field_mapping = {
+        **serializers.ModelSerializer.serializer_field_mapping,
+        models.JSONField: ProductImagesField,
+    }
     vendor_username = serializers.CharField(source="vendor_id.username", read_only=True)
     vendor_email = serializers.CharField(source="vendor_id.email", read_only=True)
     vendor_rating = serializers.CharField(source="vendor_id.rating", read_only=True)
@@ -20,4 +42,59 @@ class ProductSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Product
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+    def validate_image_url(self, value):
+        # clients send back the plain URLs they were given; keep the stored
+        # variants for any image that is still listed
+        if self.instance is None or not isinstance(value, list):
+            return value
+        stored = {entry["url"]: entry for entry in self.instance.image_url or [] if isinstance(entry, dict)}
+        return [stored.get(entry, entry) if isinstance(entry, str) else entry for entry in value]
+
+class ProductListSerializer(serializers.BaseSerializer):
+    """
+    Read-only list serializer that renders rows from a single joined
+    `values()` query (see `ProductListSerializer.values`). It produces the
+    same JSON as ProductSerializer without building model instances or
+    following `vendor_id` once per row, except that `image_url` lists the
+    small thumbnail variants.
+    """
+    fields = (
+        'id', 'vendor_id__username', 'vendor_id__email', 'vendor_id__rating',
+        'vendor_id__institute', 'vendor_id__profile_url', 'product_name',
+        'description', 'price', 'quantity', 'category', 'image_url', 'rating',
+        'view_count', 'vendor_id',
+    )
+    price_field = serializers.DecimalField(max_digits=10, decimal_places=2)
+
+    @classmethod
+    def values(cls, queryset):
+        return queryset.values(*cls.fields)
+
+    @classmethod
+    def hydrate(cls, product_ids):
+        """Render the given product IDs in order with one query; missing IDs are skipped."""
+        rows = {row['id']: row for row in cls.values(Product.objects.filter(pk__in=product_ids))}
+        return cls([rows[pk] for pk in product_ids if pk in rows], many=True).data
+
+    def to_representation(self, row):
+        vendor_rating = row['vendor_id__rating']
+        price = row['price']
+        return {
+            'id': row['id'],
+            'vendor_username': row['vendor_id__username'],
+            'vendor_email': row['vendor_id__email'],
+            'vendor_rating': str(vendor_rating) if vendor_rating is not None else None,
+            'institute': row['vendor_id__institute'],
+            'pfp': row['vendor_id__profile_url'],
+            'product_name': row['product_name'],
+            'description': row['description'],
+            'price': self.price_field.to_representation(price) if price is not None else None,
+            'quantity': row['quantity'],
+            'category': row['category'],
+            'image_url': image_urls(row['image_url'], 'thumb'),
+            'rating': row['rating'],
+            'view_count': row['view_count'],
+            'vendor_id': row['vendor_id'],
+        }
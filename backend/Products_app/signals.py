@@ -0,0 +1,11 @@
+from django.dispatch import Signal
+
+
+# Sent with `product_ids` (every product whose stock moved) and `sold_out`
+# (the subset that reached zero) after queryset updates to Product.quantity,
+# which bypass post_save.
+stock_changed = Signal()
+
+# Sent with `counts` ({product_id: increment}) after a batch of detail views
+# bumps Product.view_count with a queryset update.
+views_counted = Signal()
@@ -0,0 +1,115 @@
+"""
+Product image uploads to Supabase storage.
+
+Uploads run concurrently on a shared thread pool. Files Django spooled to
+disk are streamed from their temp file instead of being read into memory,
+and public URLs are built from the bucket key without another request.
+Product images also get a WebP thumbnail (see `images.py`) stored next to
+the original.
+"""
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from django.conf import settings
+from storage3.exceptions import StorageApiError
+
+from .images import submit_variants, variants_for
+from .supabase_config import supabase
+
+
+logger = logging.getLogger(__name__)
+
+BUCKET = "marketplace"
+
+_executor = ThreadPoolExecutor(max_workers=settings.STORAGE_UPLOAD_WORKERS, thread_name_prefix="storage-upload")
+
+
+def public_url(key, bucket=BUCKET):
+    return f"{settings.SUPABASE_URL.rstrip('/')}/storage/v1/object/public/{bucket}/{quote(key)}"
+
+
+def _put(client, bucket, key, upload):
+    options = {"content-type": upload.content_type or "application/octet-stream"}
+    if hasattr(upload, "temporary_file_path"):
+        with open(upload.temporary_file_path(), "rb") as source:
+            client.storage.from_(bucket).upload(key, source, options)
+    else:
+        upload.seek(0)
+        client.storage.from_(bucket).upload(key, upload.read(), options)
+
+
+def _store(upload, folder, bucket, client):
+    """Upload one Django UploadedFile under `folder` and return its bucket key."""
+    base, ext = os.path.splitext(upload.name or "file")
+    key = f"{folder}/{base}_{uuid.uuid4().hex}{ext}"
+    try:
+        _put(client, bucket, key, upload)
+    except StorageApiError as e:
+        # handle duplicate key by retrying with a more unique name
+        if getattr(e, "statusCode", None) in (409, "409") or "Duplicate" in str(e):
+            key = f"{folder}/{base}_{int(time.time())}_{uuid.uuid4().hex}{ext}"
+            _put(client, bucket, key, upload)
+        else:
+            raise
+    return key
+
+
+def upload_file(upload, folder, bucket=BUCKET, client=None):
+    """
+    Upload one Django UploadedFile under `folder` and return its public URL.
+    """
+    return public_url(_store(upload, folder, bucket, client or supabase), bucket)
+
+
+def _upload_image(upload, encoding, folder, bucket, client):
+    key = _store(upload, folder, bucket, client)
+    entry = {"url": public_url(key, bucket)}
+    # the original is stored by now; without variants, readers fall back to it
+    try:
+        variants = variants_for(upload, encoding) or {}
+        stem = os.path.splitext(key)[0]
+        for name, data in variants.items():
+            variant_key = f"{stem}_{name}.webp"
+            client.storage.from_(bucket).upload(variant_key, data, {"content-type": "image/webp"})
+            entry[name] = public_url(variant_key, bucket)
+    except Exception:
+        logger.exception("Storing WebP variants of %s failed", key)
+    return entry
+
+
+def upload_files(uploads, folder, bucket=BUCKET, client=None):
+    """
+    Upload several files concurrently and return their public URLs in the
+    order given. The first failure is re-raised once every upload finished.
+    """
+    futures = [_executor.submit(upload_file, upload, folder, bucket, client) for upload in uploads]
+    return _results(futures)
+
+
+def upload_images(uploads, folder, bucket=BUCKET, client=None):
+    """
+    Upload product images with their WebP thumbnails and return one
+    `image_url` entry per upload, in order: {"url", "thumb"}, or just {"url"}
+    when a file could not be decoded as an image or its thumbnail could not
+    be stored. With IMAGE_PROCESS_WORKERS set, thumbnails are encoded on the
+    image process pool while the originals upload.
+    """
+    client = client or supabase
+    encodings = [submit_variants(upload) for upload in uploads]
+    futures = [
+        _executor.submit(_upload_image, upload, encoding, folder, bucket, client)
+        for upload, encoding in zip(uploads, encodings)
+    ]
+    return _results(futures)
+
+
+def _results(futures):
+    errors = [future.exception() for future in futures]
+    for error in errors:
+        if error is not None:
+            raise error
+    return [future.result() for future in futures]
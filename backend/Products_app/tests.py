@@ -1,3 +1,298 @@
-from django.test import TestCase
+import io
+import threading
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile, TemporaryUploadedFile
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from PIL import Image
+
+from algorithm.models import UserCategoryModel
+from Pymarket.background import BackgroundBuffer
+from .models import Product, ProductView
+from .cache import _product_version, get_product_detail
+from .serializers import ProductListSerializer, ProductSerializer
+from .storage import upload_files, upload_images
+from .view_events import product_view_buffer
+
+User = get_user_model()
+
+
+class ProductPaginationTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.products = [
+			Product.objects.create(
+				vendor_id=self.vendor, product_name=f"Item {i}", description="desc",
+				price=100, quantity=3, category="Books",
+			)
+			for i in range(5)
+		]
+
+	def walk(self, url):
+		ids = []
+		while url:
+			response = self.client.get(url)
+			self.assertEqual(response.status_code, 200)
+			ids.extend(item["id"] for item in response.data["results"])
+			url = response.data["next"]
+		return ids
+
+	def test_anonymous_feed_pages_by_keyset(self):
+		ids = self.walk("/products/?page_size=2")
+		self.assertEqual(ids, sorted((p.id for p in self.products), reverse=True))
+
+	def test_vendor_products_are_paginated(self):
+		ids = self.walk(f"/products/vendor-products/{self.vendor.id}?page_size=2")
+		self.assertEqual(len(ids), 5)
+
+	def test_personalized_pages_continue_the_same_ranking(self):
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.buyer)}")
+		first = self.walk("/products/?page_size=2")
+		self.assertCountEqual(first, [p.id for p in self.products])
+		# the same session gets the same ordering, so pages are repeatable
+		self.assertEqual(self.walk("/products/?page_size=2"), first)
+		self.assertIsNone(self.client.get("/products/?page_size=5").data["next"])
+
+	def test_catalog_changes_do_not_reshuffle_a_session_in_progress(self):
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.buyer)}")
+		page = self.client.get("/products/?page_size=2").data
+		seen = [item["id"] for item in page["results"]]
+		new = Product.objects.create(
+			vendor_id=self.vendor, product_name="Item new", description="desc", price=100, quantity=3, category="Books",
+		)
+		while page["next"]:
+			page = self.client.get(page["next"]).data
+			seen.extend(item["id"] for item in page["results"])
+		self.assertEqual(sorted(seen), sorted(p.id for p in self.products))
+
+		# the next first page starts from the new catalog
+		self.assertIn(new.id, self.walk("/products/?page_size=10"))
+
+	def test_both_feeds_leave_out_sold_out_products(self):
+		Product.objects.filter(pk=self.products[0].pk).update(quantity=0)
+		in_stock = sorted(p.id for p in self.products[1:])
+		self.assertEqual(sorted(self.walk("/products/?page_size=2")), in_stock)
+		self.client.force_authenticate(self.buyer)
+		self.assertEqual(sorted(self.walk("/products/?page_size=2")), in_stock)
+
+	def test_tampered_cursor_is_rejected(self):
+		self.client.force_authenticate(self.buyer)
+		response = self.client.get("/products/?cursor=not-a-cursor")
+		self.assertEqual(response.status_code, 404)
+
+
+class ProductListSerializerTests(TestCase):
+	def setUp(self):
+		vendors = [
+			User.objects.create_user(
+				username=f"vendor{i}", email=f"vendor{i}@example.com", password="pass", role="vendor",
+				institute="UNILAG" if i else None, rating=i,
+			)
+			for i in range(3)
+		]
+		for i in range(6):
+			Product.objects.create(
+				vendor_id=vendors[i % 3], product_name=f"Item {i}", description="desc",
+				price="1250.5", quantity=i, category="Books", image_url=[f"https://img/{i}.png"],
+				view_count=None if i == 0 else i,
+			)
+
+	def test_matches_product_serializer_output(self):
+		expected = ProductSerializer(Product.objects.order_by("id"), many=True).data
+		rows = ProductListSerializer.values(Product.objects.order_by("id"))
+		actual = ProductListSerializer(rows, many=True).data
+		self.assertEqual([dict(item) for item in expected], actual)
+		self.assertEqual([list(item) for item in expected], [list(item) for item in actual])
+
+	def test_list_rendering_is_a_single_query(self):
+		ids = list(Product.objects.order_by("-id").values_list("id", flat=True))
+		with self.assertNumQueries(1):
+			data = ProductListSerializer.hydrate(ids)
+		self.assertEqual([item["id"] for item in data], ids)
+
+
+class ProductViewEventTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor"
+		)
+		self.buyers = [
+			User.objects.create_user(username=f"b{i}", email=f"b{i}@example.com", password="pass", role="buyer")
+			for i in range(2)
+		]
+		self.product = Product.objects.create(
+			vendor_id=self.vendor, product_name="Lamp", description="desc", price=10, quantity=4, category="Home"
+		)
+
+	@patch.object(product_view_buffer, "_ensure_thread")
+	def test_detail_read_is_one_select_and_views_are_flushed_in_batches(self, _):
+		cache.clear()
+		for i, buyer in enumerate(self.buyers + self.buyers[:1]):
+			self.client.force_authenticate(buyer)
+			# one SELECT to fill the product cache, none once it is warm
+			with self.assertNumQueries(0 if i else 1):
+				self.assertEqual(self.client.get(f"/products/{self.product.id}").status_code, 200)
+
+		self.assertEqual(ProductView.objects.count(), 0)
+		self.assertEqual(product_view_buffer.drain(), 3)
+
+		self.product.refresh_from_db()
+		self.assertEqual(self.product.view_count, 2)
+		self.assertEqual(ProductView.objects.count(), 2)
+		self.assertEqual(
+			dict(UserCategoryModel.objects.values_list("user__username", "view_count")), {"b0": 2, "b1": 1}
+		)
+
+	def test_a_full_buffer_reports_what_it_dropped(self):
+		flushed = []
+		buffer = BackgroundBuffer(flushed.extend, interval=60, batch_size=100, capacity=2, name="test-buffer")
+		with patch.object(buffer, "_ensure_thread"):
+			for item in range(5):
+				buffer.add(item)
+		with self.assertLogs("Pymarket.background", level="WARNING") as logs:
+			buffer.drain()
+		self.assertEqual(flushed, [3, 4])
+		self.assertEqual(buffer.dropped, 3)
+		self.assertIn("dropped 3 items", logs.output[0])
+
+	@override_settings(PRODUCT_VIEW_FLUSH_INTERVAL=0)
+	def test_vendor_views_are_not_counted(self):
+		self.client.force_authenticate(self.vendor)
+		self.client.get(f"/products/{self.product.id}")
+		self.assertFalse(ProductView.objects.exists())
+
+
+class ProductDetailCacheTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor"
+		)
+		self.product = Product.objects.create(
+			vendor_id=self.vendor, product_name="Kettle", description="desc", price=10, quantity=4, category="Home"
+		)
+
+	def test_put_and_delete_invalidate_the_cached_entry(self):
+		self.assertEqual(get_product_detail(self.product.id)["product_name"], "Kettle")
+
+		self.client.force_authenticate(self.vendor)
+		self.client.put(f"/products/{self.product.id}", {
+			"product_name": "Steel kettle", "description": "desc", "price": "10.00", "quantity": 4, "category": "Home",
+		}, format="json")
+		self.assertEqual(get_product_detail(self.product.id)["product_name"], "Steel kettle")
+
+		self.client.delete(f"/products/{self.product.id}")
+		self.assertIsNone(get_product_detail(self.product.id))
+
+	def test_unknown_ids_leave_no_keys_behind(self):
+		missing = self.product.id + 1000
+		self.assertIsNone(get_product_detail(missing))
+		self.assertIsNone(cache.get(f"product:{missing}:version"))
+
+	@override_settings(PRODUCT_CACHE_WAIT=2)
+	def test_readers_wait_for_an_in_flight_rebuild(self):
+		key = f"product:{self.product.id}:{_product_version(self.product.id)}"
+		cache.add(f"{key}:lock", 1)
+		payload = {"id": self.product.id, "product_name": "Kettle"}
+		threading.Timer(0.1, cache.set, args=(key, payload)).start()
+
+		with self.assertNumQueries(0):
+			self.assertEqual(get_product_detail(self.product.id), payload)
+
+
+class ProductImageUploadTests(TestCase):
+	class FakeStorage:
+		def __init__(self):
+			self.uploaded = {}
+			self.storage = self
+
+		def from_(self, bucket):
+			return self
+
+		def upload(self, key, source, options):
+			self.uploaded[key] = source if isinstance(source, bytes) else source.read()
+
+	@override_settings(SUPABASE_URL="https://project.supabase.co")
+	def test_uploads_stream_spooled_files_and_keep_order(self):
+		client = self.FakeStorage()
+		spooled = TemporaryUploadedFile("big photo.jpg", "image/jpeg", 0, None)
+		spooled.write(b"big")
+		spooled.flush()
+		uploads = [SimpleUploadedFile("a.png", b"small", "image/png"), spooled]
+
+		urls = upload_files(uploads, "products/1", client=client)
+
+		self.assertEqual(len(urls), 2)
+		self.assertTrue(urls[0].startswith("https://project.supabase.co/storage/v1/object/public/marketplace/products/1/a_"))
+		self.assertIn("/big%20photo_", urls[1])
+		self.assertCountEqual(client.uploaded.values(), [b"small", b"big"])
+
+	@override_settings(SUPABASE_URL="https://project.supabase.co", IMAGE_PROCESS_WORKERS=0)
+	def test_images_get_webp_variants(self):
+		client = self.FakeStorage()
+		photo = io.BytesIO()
+		Image.new("RGB", (2000, 1000), "red").save(photo, "JPEG")
+		uploads = [
+			SimpleUploadedFile("photo.jpg", photo.getvalue(), "image/jpeg"),
+			SimpleUploadedFile("notes.pdf", b"%PDF", "application/pdf"),
+		]
+
+		entries = upload_images(uploads, "products/1", client=client)
+
+		self.assertEqual(set(entries[0]), {"url", "thumb"})
+		self.assertTrue(entries[0]["thumb"].endswith("_thumb.webp"))
+		thumb_key = entries[0]["thumb"].split("/marketplace/", 1)[1]
+		with Image.open(io.BytesIO(client.uploaded[thumb_key])) as thumb:
+			self.assertEqual((thumb.format, thumb.size), ("WEBP", (320, 160)))
+		self.assertEqual(set(entries[1]), {"url"})
+
+	@override_settings(SUPABASE_URL="https://project.supabase.co", IMAGE_PROCESS_WORKERS=0)
+	def test_a_failed_thumbnail_keeps_the_original(self):
+		client = self.FakeStorage()
+		photo = io.BytesIO()
+		Image.new("RGB", (800, 600), "blue").save(photo, "JPEG")
+		original_upload = client.upload
+
+		def upload(key, source, options):
+			if key.endswith(".webp"):
+				raise ConnectionError("storage timed out")
+			original_upload(key, source, options)
+
+		client.upload = upload
+		with self.assertLogs("Products_app.storage", "ERROR"):
+			entries = upload_images([SimpleUploadedFile("photo.jpg", photo.getvalue(), "image/jpeg")], "products/1", client=client)
+
+		self.assertEqual(set(entries[0]), {"url"})
+		self.assertEqual(len(client.uploaded), 1)
+
+	def test_list_serializer_returns_thumbnails_and_updates_keep_variants(self):
+		vendor = User.objects.create_user(username="vendor", email="vendor@example.com", password="pass", role="vendor")
+		variant = {"url": "https://img/a.jpg", "thumb": "https://img/a_thumb.webp"}
+		product = Product.objects.create(
+			vendor_id=vendor, product_name="Lamp", description="desc", price=10, quantity=4,
+			category="Home", image_url=[variant, "https://img/legacy.png"],
+		)
+
+		listed = ProductListSerializer(ProductListSerializer.values(Product.objects.all()), many=True).data[0]
+		self.assertEqual(listed["image_url"], ["https://img/a_thumb.webp", "https://img/legacy.png"])
+		detail = ProductSerializer(product).data
+		self.assertEqual(detail["image_url"], ["https://img/a.jpg", "https://img/legacy.png"])
+
+		client = APIClient()
+		client.force_authenticate(vendor)
+		client.put(f"/products/{product.id}", {**detail, "vendor_id": vendor.id}, format="json")
+		product.refresh_from_db()
+		self.assertEqual(product.image_url, [variant, "https://img/legacy.png"])
@@ -6,5 +6,6 @@ urlpatterns = [
     path("my_products/", ProductListCreateView.as_view(), name="user-products"),
     path('create', CreateProductView.as_view(), name='create-product'),
     path('<int:pk>', ProductDetailView.as_view(), name ='product-detail'),
+    path('<int:pk>/also-viewed', AlsoViewedView.as_view(), name='product-also-viewed'),
     path('vendor-products/<int:pk>', GetVendorProducts.as_view(), name='Get vendor products')
 ]
\ No newline at end of file
@@ -0,0 +1,71 @@
+"""
+Product detail views are recorded here instead of on the request path.
+
+`record_product_view` only appends to an in-process buffer; a background
+thread periodically writes the batch: new ProductView rows, per-product
+view_count increments and per-user category affinities.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+
+from algorithm.cache import invalidate_user_feed
+from algorithm.affinity import record_category_views
+from Pymarket.background import BackgroundBuffer
+from .models import Product, ProductView
+from .signals import views_counted
+
+
+def flush_product_views(events):
+    """Write a batch of (product_id, user_id, category) view events."""
+    categories = Counter((user_id, category) for _, user_id, category in events)
+    pairs = {(product_id, user_id) for product_id, user_id, _ in events}
+
+    with transaction.atomic():
+        product_ids = {product_id for product_id, _ in pairs}
+        user_ids = {user_id for _, user_id in pairs}
+        seen = set(
+            ProductView.objects.filter(product_id__in=product_ids, user_id__in=user_ids)
+            .values_list("product_id", "user_id")
+        )
+        first_views = pairs - seen
+        ProductView.objects.bulk_create(
+            [ProductView(product_id=product_id, user_id=user_id) for product_id, user_id in first_views],
+            ignore_conflicts=True,
+        )
+
+        # view_count counts distinct viewers; one UPDATE per distinct increment
+        increments = Counter(product_id for product_id, _ in first_views)
+        by_increment = defaultdict(list)
+        for product_id, increment in increments.items():
+            by_increment[increment].append(product_id)
+        for increment, ids in by_increment.items():
+            Product.objects.filter(pk__in=ids).update(
+                view_count=Coalesce(F("view_count"), Value(0)) + increment
+            )
+
+        record_category_views(categories)
+
+    for user_id in {user_id for user_id, _ in categories}:
+        invalidate_user_feed(user_id)
+    if increments:
+        views_counted.send(sender=Product, counts=dict(increments))
+
+
+product_view_buffer = BackgroundBuffer(
+    flush_product_views,
+    interval=settings.PRODUCT_VIEW_FLUSH_INTERVAL,
+    batch_size=settings.PRODUCT_VIEW_BATCH_SIZE,
+    capacity=settings.PRODUCT_VIEW_BUFFER_LIMIT,
+    name="product-views",
+)
+
+
+def record_product_view(product_id, user_id, category):
+    if settings.PRODUCT_VIEW_FLUSH_INTERVAL <= 0:
+        flush_product_views([(product_id, user_id, category)])
+    else:
+        product_view_buffer.add((product_id, user_id, category))
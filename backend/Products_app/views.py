@@ -4,20 +4,18 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .models import Product, ProductReviews, ProductView
-from .serializers import ProductSerializer
+from .serializers import ProductSerializer, ProductListSerializer
 from rest_framework.permissions import IsAuthenticated
-from .supabase_config import supabase
-import os
-import time
-import uuid
+from .storage import upload_images
 from decimal import Decimal
-from storage3.exceptions import StorageApiError
 import httpx
 from drf_spectacular.utils import extend_schema,OpenApiParameter,OpenApiExample
 from drf_spectacular.types import OpenApiTypes
-from django.db.models import F
-from algorithm.models import UserCategoryModel
-from algorithm.utils import personalized_feed
+from algorithm.cache import feed_snapshot, get_ranked_ids
+from algorithm.coview import TOP_K
+from .cache import get_product_detail
+from .pagination import FeedCursorPagination, ProductCursorPagination
+from .view_events import record_product_view
 # Create your views here.
 
 class ProductListCreateView(APIView):
@@ -33,8 +31,8 @@ class ProductListCreateView(APIView):
         auth_user = request.user
         if auth_user.role != "vendor":
             return Response(status=404)
-        products = Product.objects.filter(vendor_id=auth_user)
-        serializer = ProductSerializer(products, many=True)
+        products = ProductListSerializer.values(Product.objects.filter(vendor_id=auth_user))
+        serializer = ProductListSerializer(products, many=True)
         return Response(serializer.data, status=200)
         
 
@@ -81,54 +79,18 @@ class CreateProductView(APIView):
         if not images and isinstance(data.get('image_url', None), (list, tuple)):
             images_urls = list(data.get('image_url', []))
 
-        # upload files to supabase storage (ensure unique keys to avoid 409)
-        for image in images:
-            # read file bytes once
-            file_bytes = image.read()
-            base, ext = os.path.splitext(image.name or "file")
-            unique_name = f"{base}_{uuid.uuid4().hex}{ext}"
-            key = f"products/{user.id}/{unique_name}"
-            try:
-                supabase.storage.from_('marketplace').upload(
-                    key,
-                    file_bytes,
-                    {"content-type": image.content_type}
-                )
-            except StorageApiError as e:
-                # handle duplicate key by retrying with a more unique name
-                status_code = getattr(e, "statusCode", None)
-                msg = str(e)
-                if status_code == 409 or "Duplicate" in msg:
-                    unique_name = f"{base}_{int(time.time())}_{uuid.uuid4().hex}{ext}"
-                    key = f"products/{user.id}/{unique_name}"
-                    supabase.storage.from_('marketplace').upload(
-                        key,
-                        file_bytes,
-                        {"content-type": image.content_type}
-                    )
-                else:
-                    raise
-            except httpx.ConnectError as e:
-                # Network/DNS issue when contacting Supabase storage
-                err_msg = (
-                    "Unable to connect to Supabase storage service."
-                    " Please check SUPABASE_URL, network/DNS, and that the service is reachable."
-                )
-                # Log detail to console (server logs)
-                print("Supabase connection error:", str(e))
-                return Response({"error": err_msg, "details": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
-            # get public url and append (normalize dict/str responses)
-            url = supabase.storage.from_('marketplace').get_public_url(key)
-            # normalize possible response shapes
-            if isinstance(url, dict):
-                possible = url.get('publicURL') or url.get('public_url') or url.get('publicUrl') or url.get('url')
-                if possible:
-                    images_urls.append(possible)
-                else:
-                    # fallback to stringify
-                    images_urls.append(str(url))
-            else:
-                images_urls.append(str(url))
+        # upload files and their WebP variants to supabase storage concurrently (unique keys avoid 409)
+        try:
+            images_urls += upload_images(images, f"products/{user.id}")
+        except httpx.ConnectError as e:
+            # Network/DNS issue when contacting Supabase storage
+            err_msg = (
+                "Unable to connect to Supabase storage service."
+                " Please check SUPABASE_URL, network/DNS, and that the service is reachable."
+            )
+            # Log detail to console (server logs)
+            print("Supabase connection error:", str(e))
+            return Response({"error": err_msg, "details": str(e)}, status=status.HTTP_502_BAD_GATEWAY)
 
         # Build a clean_data dict that works for both QueryDict (form) and JSON (dict)
         clean_data = {}
@@ -177,6 +139,27 @@ class CreateProductView(APIView):
         return Response({"errors": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
         
 
+class AlsoViewedView(APIView):
+
+    @extend_schema(
+        summary="Customers also viewed",
+        description="Products most often viewed in the same sessions as this one, best first. "
+                    "Precomputed by `manage.py build_coviews`; products without enough views return an empty list.",
+        parameters=[
+            OpenApiParameter(name='limit', location=OpenApiParameter.QUERY, description=f'Number of products (max {TOP_K})', type=OpenApiTypes.INT),
+        ],
+        responses={200: ProductListSerializer(many=True)},
+    )
+    def get(self, request, pk):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), TOP_K)
+        except ValueError:
+            limit = 10
+        neighbors = Product.objects.filter(neighbor_of__product_id=pk).order_by('-neighbor_of__score', 'id')
+        serializer = ProductListSerializer(ProductListSerializer.values(neighbors)[:limit], many=True)
+        return Response({"results": serializer.data}, status=status.HTTP_200_OK)
+
+
 class ProductDetailView(APIView):
     # permission_classes = [IsAuthenticated]
 
@@ -189,23 +172,13 @@ class ProductDetailView(APIView):
 
     def get(self,request,pk):
         auth_user = request.user
-        try:
-            # allow any authenticated user to view product details
-            product = Product.objects.get(pk=pk)
-        except Product.DoesNotExist:
+        # allow any authenticated user to view product details
+        data = get_product_detail(pk)
+        if data is None:
             return Response({"message": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
-        serializer = ProductSerializer(product)
-        data = serializer.data
-        if auth_user.is_authenticated:
-            if auth_user != product.vendor_id:
-                _, created = ProductView.objects.get_or_create(product=product, user=auth_user)
-                if created:
-                    Product.objects.filter(pk=pk).update(view_count=F('view_count') + 1)
-                user_category = UserCategoryModel.objects.filter(user=auth_user, category=data["category"])
-                if user_category.exists():
-                    user_category.update(view_count=F('view_count') + 1)
-                else:
-                    UserCategoryModel.objects.create(user=auth_user, category=data["category"])
+        if auth_user.is_authenticated and auth_user.id != data["vendor_id"]:
+            # counters are written in batches off the request path
+            record_product_view(pk, auth_user.id, data["category"])
         return Response(data)
 
     
@@ -238,21 +211,41 @@ class ProductDetailView(APIView):
 class AllProductsView(APIView):
     # permission_classes = [IsAuthenticated]
 
+    @extend_schema(
+        summary="Product feed",
+        description="In-stock products: a personalized feed for authenticated users, newest first for everyone else. Paginated with opaque `cursor` tokens.",
+        parameters=[
+            OpenApiParameter(name='cursor', location=OpenApiParameter.QUERY, description='Cursor from a previous `next`/`previous` link', type=OpenApiTypes.STR),
+            OpenApiParameter(name='page_size', location=OpenApiParameter.QUERY, description='Items per page (max 100)', type=OpenApiTypes.INT),
+        ],
+        responses={200: ProductSerializer(many=True)},
+    )
     def get(self,request):
         user = request.user
-        print(user)
         if user.is_authenticated:
-            print("hi")
-            products = personalized_feed(user)
+            # serve a page of the cached ranking and hydrate only that page
+            paginator = FeedCursorPagination()
+            seed, snapshot, offset = paginator.decode_cursor(request)
+            if seed is None:
+                seed = paginator.session_seed(request)
+            if snapshot is None:
+                snapshot = feed_snapshot(user.id)
+            ranked_ids = get_ranked_ids(user, seed, snapshot)
+            page_ids = paginator.paginate_ids(ranked_ids, request, seed, snapshot, offset)
+            data = ProductListSerializer.hydrate(page_ids)
         else:
-            products= Product.objects.all()
-        serializer= ProductSerializer(products,many=True)
-        return Response(serializer.data)
+            paginator = ProductCursorPagination()
+            products = paginator.paginate_queryset(ProductListSerializer.values(Product.objects.filter(quantity__gt=0)), request, view=self)
+            data = ProductListSerializer(products, many=True).data
+        return paginator.get_paginated_response(data)
 
 
 
 class GetVendorProducts(APIView):
     def get(self, request, pk):
-        data = Product.objects.filter(vendor_id=pk).prefetch_related('product')
-        serializer = ProductSerializer(data, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
\ No newline at end of file
+        paginator = ProductCursorPagination()
+        data = paginator.paginate_queryset(
+            ProductListSerializer.values(Product.objects.filter(vendor_id=pk)), request, view=self
+        )
+        serializer = ProductListSerializer(data, many=True)
+        return paginator.get_paginated_response(serializer.data)
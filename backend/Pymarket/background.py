@@ -0,0 +1,82 @@
+"""
+In-process buffers drained by a background thread.
+"""
+import atexit
+import logging
+import threading
+from collections import deque
+
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundBuffer:
+    """
+    Collect items in memory and hand them to `flush(items)` from a daemon
+    thread every `interval` seconds, or sooner once `batch_size` items are
+    waiting. At most `capacity` items are held; past that the oldest are
+    dropped, so a traffic spike cannot grow memory or the next write batch
+    without bound; each flush that follows drops logs a warning with the
+    count, and `dropped` keeps the running total.
+    """
+
+    def __init__(self, flush, interval, batch_size=500, capacity=10000, name=None):
+        self.flush = flush
+        self.interval = interval
+        self.batch_size = batch_size
+        self.name = name or getattr(flush, "__name__", "buffer")
+        self.dropped = 0
+        self._dropped_since_flush = 0
+        self._items = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        atexit.register(self.drain)
+
+    def add(self, item):
+        with self._lock:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+                self._dropped_since_flush += 1
+            self._items.append(item)
+            pending = len(self._items)
+        self._ensure_thread()
+        if pending >= self.batch_size:
+            self._wakeup.set()
+
+    def drain(self):
+        """Flush everything buffered so far on the calling thread."""
+        with self._lock:
+            items = list(self._items)
+            self._items.clear()
+            dropped, self._dropped_since_flush = self._dropped_since_flush, 0
+        if dropped:
+            logger.warning(
+                "%s was full and dropped %d items since its last flush (%d in total)",
+                self.name, dropped, self.dropped,
+            )
+        if not items:
+            return 0
+        try:
+            self.flush(items)
+        except Exception:
+            logger.exception("Flushing %d items from %s failed", len(items), self.name)
+        return len(items)
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name=f"{self.name}-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.drain()
+            # this thread owns its own connection; don't keep it open between batches
+            connection.close()
@@ -0,0 +1,35 @@
+"""
+Helpers shared by the `bench_*` management commands.
+"""
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import override_settings
+
+
+@contextmanager
+def scratch_database(verbosity=0):
+    """
+    Run a benchmark against a throwaway copy of the configured database
+    (created and destroyed the same way the test runner does), so seeded
+    rows never touch real data. DEBUG is switched off as in tests so query
+    logging does not skew timings.
+    """
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        with override_settings(DEBUG=False):
+            yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity)
+
+
+def best_of(fn, repeats=5):
+    """Return the fastest wall-clock time, in seconds, of `repeats` calls to fn()."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
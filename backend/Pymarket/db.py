@@ -0,0 +1,51 @@
+"""
+Database helpers that the ORM does not cover.
+"""
+from django.db import connections, router
+
+
+def upsert(model, rows, unique_fields, increment_fields=(), update_fields=(), batch_size=500):
+    """
+    Insert `rows` (dicts keyed by field name) with a single
+    `INSERT ... ON CONFLICT (unique_fields) DO UPDATE` per batch.
+
+    On conflict, `increment_fields` are added to the stored value and
+    `update_fields` are overwritten with the incoming one. Works on
+    PostgreSQL and SQLite; `unique_fields` must match a unique constraint.
+    """
+    rows = list(rows)
+    if not rows:
+        return
+    opts = model._meta
+    connection = connections[router.db_for_write(model)]
+    quote = connection.ops.quote_name
+
+    names = list(rows[0])
+    fields = [opts.get_field(name) for name in names]
+    table = quote(opts.db_table)
+    columns = ", ".join(quote(field.column) for field in fields)
+    conflict = ", ".join(quote(opts.get_field(name).column) for name in unique_fields)
+    assignments = [
+        f"{quote(opts.get_field(name).column)} = {table}.{quote(opts.get_field(name).column)} "
+        f"+ EXCLUDED.{quote(opts.get_field(name).column)}"
+        for name in increment_fields
+    ] + [
+        f"{quote(opts.get_field(name).column)} = EXCLUDED.{quote(opts.get_field(name).column)}"
+        for name in update_fields
+    ]
+    action = f"DO UPDATE SET {', '.join(assignments)}" if assignments else "DO NOTHING"
+    placeholder = "(" + ", ".join(["%s"] * len(fields)) + ")"
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            params = [
+                field.get_db_prep_save(row[field.name], connection)
+                for row in batch
+                for field in fields
+            ]
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {', '.join([placeholder] * len(batch))} "
+                f"ON CONFLICT ({conflict}) {action}",
+                params,
+            )
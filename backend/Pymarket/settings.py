@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 import dj_database_url
@@ -104,6 +105,62 @@ CORS_ALLOWED_ORIGINS = [
 
 REDIS_URL = os.environ.get('REDIS_URL')
 
+# Shared cache so every worker sees the same feed/product entries; falls back
+# to a per-process cache when Redis is not configured (local dev, tests).
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a user's ranked feed stays cached before it is re-ranked
+FEED_CACHE_TTL = int(os.environ.get("FEED_CACHE_TTL", 60 * 15))
+
+# Product detail payloads are cached for PRODUCT_CACHE_TTL seconds; readers
+# that find an entry being rebuilt wait up to PRODUCT_CACHE_WAIT seconds for it.
+PRODUCT_CACHE_TTL = int(os.environ.get("PRODUCT_CACHE_TTL", 60 * 5))
+PRODUCT_CACHE_WAIT = 2
+
+# Product detail views are buffered in memory and written in batches every
+# PRODUCT_VIEW_FLUSH_INTERVAL seconds (0 writes each view inline).
+PRODUCT_VIEW_FLUSH_INTERVAL = float(os.environ.get("PRODUCT_VIEW_FLUSH_INTERVAL", 5))
+PRODUCT_VIEW_BATCH_SIZE = 500
+PRODUCT_VIEW_BUFFER_LIMIT = 10000
+
+# Days after which a category view counts half as much towards a user's feed.
+# Fixed once affinity scores exist: a change takes effect from the next
+# `manage.py rebase_affinity` (see algorithm.affinity).
+AFFINITY_HALF_LIFE_DAYS = float(os.environ.get("AFFINITY_HALF_LIFE_DAYS", 14))
+
+# Trending searches: hourly heavy-hitter sketches over a rolling window, fed
+# and persisted every SEARCH_TRENDING_FLUSH_INTERVAL seconds (0 = inline).
+SEARCH_TRENDING_FLUSH_INTERVAL = float(os.environ.get("SEARCH_TRENDING_FLUSH_INTERVAL", 10))
+SEARCH_TRENDING_WINDOW_HOURS = int(os.environ.get("SEARCH_TRENDING_WINDOW_HOURS", 24))
+SEARCH_TRENDING_CAPACITY = 1000
+# Seconds a cached search result (ranked product IDs) may be served
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", 60))
+# Each user's recently viewed products and contents (VIEW_HISTORY_SIZE of
+# each) are kept in the cache for VIEW_HISTORY_TTL seconds after the last view.
+VIEW_HISTORY_SIZE = int(os.environ.get("VIEW_HISTORY_SIZE", 20))
+VIEW_HISTORY_TTL = int(os.environ.get("VIEW_HISTORY_TTL", 60 * 60 * 24 * 30))
+# Most view events accepted in one batch tracking request
+VIEW_EVENT_BATCH_LIMIT = 200
+
+# Idempotency-Key responses are replayed for IDEMPOTENCY_KEY_TTL seconds.
+# Retries wait up to IDEMPOTENCY_WAIT seconds for an in-flight request, and
+# a claim left unanswered for IDEMPOTENCY_LOCK_TIMEOUT seconds is released.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 60 * 60 * 24))
+IDEMPOTENCY_WAIT = 5
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
 
 WSGI_APPLICATION = 'Pymarket.wsgi.application'
 ASGI_APPLICATION = 'Pymarket.asgi.application'
@@ -207,10 +264,21 @@ AUTH_USER_MODEL = 'account.CustomUserModel'
 
 
 PAYSTACK_SECRET_KEY = os.environ.get("PAYSTACK_SECRET_KEY")
+PAYSTACK_BASE_URL = os.environ.get("PAYSTACK_BASE_URL", "https://api.paystack.co")
+# (connect, read) timeouts in seconds for each Paystack call, the number of
+# retries after a failed attempt, and pooled keep-alive connections per process
+PAYSTACK_TIMEOUT = (3.05, float(os.environ.get("PAYSTACK_READ_TIMEOUT", 10)))
+PAYSTACK_MAX_RETRIES = 2
+PAYSTACK_POOL_SIZE = int(os.environ.get("PAYSTACK_POOL_SIZE", 10))
 
 # SUPABASE CONFIGURATION
 SUPABASE_URL = os.getenv('SUPABASE_URL')
 SUPABASE_SECRET = os.getenv('SUPABASE_SECRET')
+# Concurrent uploads to Supabase storage per worker process
+STORAGE_UPLOAD_WORKERS = int(os.environ.get("STORAGE_UPLOAD_WORKERS", 8))
+# Processes encoding product image thumbnails per web process (0 encodes inline
+# on the upload threads; every web worker starts its own pool otherwise)
+IMAGE_PROCESS_WORKERS = int(os.environ.get("IMAGE_PROCESS_WORKERS", 0))
 
 
 
@@ -230,3 +298,10 @@ CLOUDINARY_STORAGE = {
 }
 
 DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
+
+# Vendor videos are spooled here and pushed to Cloudinary by a pool of
+# CONTENT_UPLOAD_WORKERS threads (0 uploads inline after the request commits).
+CONTENT_UPLOAD_SPOOL_DIR = os.environ.get(
+    "CONTENT_UPLOAD_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "content-uploads")
+)
+CONTENT_UPLOAD_WORKERS = int(os.environ.get("CONTENT_UPLOAD_WORKERS", 2))
@@ -0,0 +1,101 @@
+"""
+Time-decayed category affinity.
+
+Each view adds `2 ** ((t - epoch) / half_life)` to the row's score, so the
+stored score never has to be rewritten as time passes. Reading multiplies by
+`2 ** (-(now - epoch) / half_life)`, which yields the sum of every view
+weighted by its age: a view one half-life old counts half as much as one
+made now.
+
+The epoch and half-life live in the single AffinityEpoch row, not in code,
+because every stored score is relative to them. Weights double each
+half-life, so once REBASE_AFTER half-lives have passed the next write moves
+the epoch to the present and rescales every score to match, long before
+`2 ** half_lives` could overflow a float. The half-life is fixed once
+scores exist: AFFINITY_HALF_LIFE_DAYS only seeds the row, and a changed
+setting takes effect from the next `manage.py rebase_affinity`, which
+keeps each score's current value and decays it at the new rate from then on.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Subquery
+from django.utils import timezone
+
+from Pymarket.db import upsert
+from .models import AffinityEpoch, UserCategoryModel
+
+
+# 2 ** 64 leaves scores many orders of magnitude below float overflow
+REBASE_AFTER = 64
+
+
+def _half_lives(since, now, half_life_days):
+    return (now - since).total_seconds() / (half_life_days * 86400)
+
+
+def _locked_epoch(now):
+    epoch, _ = AffinityEpoch.objects.select_for_update().get_or_create(
+        pk=1, defaults={"started_at": now, "half_life_days": settings.AFFINITY_HALF_LIFE_DAYS}
+    )
+    return epoch
+
+
+def _rebase(epoch, now, half_life_days=None):
+    factor = 2.0 ** -_half_lives(epoch.started_at, now, epoch.half_life_days)
+    rows = UserCategoryModel.objects.update(score=F("score") * factor)
+    epoch.started_at = now
+    epoch.half_life_days = half_life_days or epoch.half_life_days
+    epoch.save(update_fields=["started_at", "half_life_days"])
+    return rows
+
+
+def rebase(now=None, half_life_days=None):
+    """
+    Move the epoch to `now`, rescaling every score so its decayed value is
+    unchanged, and optionally decay at a new half-life from now on. Returns
+    the number of rows rescaled.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        return _rebase(_locked_epoch(now), now, half_life_days)
+
+
+def record_category_views(counts, now=None):
+    """
+    Add views to users' category affinities in one upsert.
+    `counts` maps (user_id, category) to the number of new views.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        # the lock keeps a concurrent rebase from rescaling under this write
+        epoch = _locked_epoch(now)
+        if _half_lives(epoch.started_at, now, epoch.half_life_days) >= REBASE_AFTER:
+            _rebase(epoch, now)
+        weight = 2.0 ** _half_lives(epoch.started_at, now, epoch.half_life_days)
+        upsert(
+            UserCategoryModel,
+            (
+                {"user": user_id, "category": category, "view_count": views, "score": views * weight}
+                for (user_id, category), views in counts.items()
+            ),
+            unique_fields=["user", "category"],
+            increment_fields=["view_count", "score"],
+        )
+
+
+def affinity_vector(user, now=None):
+    """Return {category: decayed view weight} for a user in one query."""
+    now = now or timezone.now()
+    epoch = AffinityEpoch.objects.filter(pk=1)
+    rows = list(
+        UserCategoryModel.objects.filter(user=user)
+        .annotate(
+            epoch_start=Subquery(epoch.values("started_at")[:1]),
+            half_life_days=Subquery(epoch.values("half_life_days")[:1]),
+        )
+        .values_list("category", "score", "epoch_start", "half_life_days")
+    )
+    if not rows or rows[0][2] is None:
+        return {}
+    decay = 2.0 ** -_half_lives(rows[0][2], now, rows[0][3])
+    return {category: score * decay for category, score, _, _ in rows}
@@ -0,0 +1,73 @@
+import uuid
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .utils import rank_product_ids
+
+
+CATALOG_VERSION_KEY = "feed:catalog_version"
+
+
+def _user_version_key(user_id):
+    return f"feed:user:{user_id}:version"
+
+
+def _feed_key(user_id, seed, snapshot):
+    return f"feed:user:{user_id}:{seed}:{snapshot}"
+
+
+def _new_version():
+    return uuid.uuid4().hex[:12]
+
+
+def feed_snapshot(user_id):
+    """
+    Token naming the state a user's feed is ranked against: the catalog
+    version and the user's own version, read in one cache round trip. A
+    ranking is cached under the snapshot it was built from, and the feed
+    cursor carries the snapshot, so a session keeps paging one ranking even
+    after products or the user's affinities change; new sessions, and first
+    pages, pick up the new snapshot.
+    """
+    keys = [CATALOG_VERSION_KEY, _user_version_key(user_id)]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return ".".join(versions[key] for key in keys)
+
+
+def get_ranked_ids(user, seed=None, snapshot=None):
+    """
+    Return the user's ranked product-ID list for one jitter seed, re-ranking
+    only when no ranking is cached for that seed and snapshot. Each session
+    has its own seed, so concurrent sessions never evict each other's list.
+    """
+    if snapshot is None:
+        snapshot = feed_snapshot(user.id)
+    key = _feed_key(user.id, seed, snapshot)
+    ids = cache.get(key)
+    if ids is not None:
+        return ids
+
+    rng = np.random.default_rng(seed) if seed is not None else None
+    ids = rank_product_ids(user, rng=rng)
+    cache.set(key, ids, settings.FEED_CACHE_TTL)
+    return ids
+
+
+def invalidate_user_feed(user_id):
+    """Move one user's feed to a new snapshot, e.g. after their category counts change."""
+    cache.set(_user_version_key(user_id), _new_version(), None)
+
+
+def invalidate_catalog():
+    """
+    Move every feed to a new snapshot after products are added, removed or
+    sold out. Feeds are re-ranked lazily on their owner's next first page;
+    rankings of the old snapshot expire after FEED_CACHE_TTL.
+    """
+    cache.set(CATALOG_VERSION_KEY, _new_version(), None)
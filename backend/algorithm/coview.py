@@ -0,0 +1,142 @@
+"""
+"Customers also viewed" neighbors from co-view counts.
+
+Product views from search tracking (usersearch.ProductView) and product
+detail pages (Products_app.ProductView) are read as one stream ordered by
+user and time, and split into sessions wherever a user goes quiet for longer
+than the session gap. Two products seen in the same session are co-viewed
+once. Both tables keep one row per user and product, so a product a user
+keeps coming back to counts in the session its row's timestamp falls in.
+
+Pairs are accumulated as a sparse matrix in COO form: packed
+(product << 32 | neighbor) keys with one weight each. Pending pairs are
+folded into the running totals with `np.unique` + `np.bincount` whenever
+they pass `flush_pairs`, so memory follows the number of distinct pairs,
+not the number of view rows. A product's neighbors are then ranked by the
+cosine of their session sets, co-views / sqrt(sessions(a) * sessions(b)),
+which keeps popular products from becoming everyone's neighbor.
+"""
+import heapq
+from datetime import timedelta
+
+import numpy as np
+from django.db import transaction
+
+from Products_app.models import Product, ProductView as DetailView
+from usersearch.models import ProductView as TrackedView
+from .models import ProductNeighbor
+
+
+SESSION_GAP = timedelta(minutes=30)
+TOP_K = 20
+# Sessions longer than this are crawls rather than browsing; only the first
+# items count, which also bounds the pairs a session adds.
+MAX_SESSION_ITEMS = 50
+MIN_COVIEWS = 2
+
+_LOW_BITS = np.int64(0xFFFFFFFF)
+
+
+def view_stream(chunk_size=5000):
+    """(user_id, viewed_at, product_id) for every view, ordered by user and time."""
+    tracked = TrackedView.objects.order_by('user_id', 'viewed_at').values_list('user_id', 'viewed_at', 'product_id')
+    detail = DetailView.objects.order_by('user_id', 'created_at').values_list('user_id', 'created_at', 'product_id')
+    return heapq.merge(tracked.iterator(chunk_size=chunk_size), detail.iterator(chunk_size=chunk_size))
+
+
+def sessions(stream, gap=SESSION_GAP):
+    """Split a user- and time-ordered view stream into lists of distinct product IDs."""
+    user = last = None
+    items = {}
+    for user_id, viewed_at, product_id in stream:
+        if user_id != user or viewed_at - last > gap:
+            if len(items) > 1:
+                yield list(items)
+            user, items = user_id, {}
+        last = viewed_at
+        if len(items) < MAX_SESSION_ITEMS:
+            items[product_id] = None
+    if len(items) > 1:
+        yield list(items)
+
+
+class CoViewCounts:
+    """Sparse co-view counts between products, and the number of sessions each product was in."""
+
+    def __init__(self, flush_pairs=2_000_000):
+        self.flush_pairs = flush_pairs
+        self.keys = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.float64)
+        self.products = np.empty(0, dtype=np.int64)
+        self.occurrences = np.empty(0, dtype=np.float64)
+        self.pending_keys = []
+        self.pending_products = []
+        self.pending_size = 0
+        self.sessions = 0
+
+    def add_session(self, product_ids):
+        items = np.asarray(product_ids, dtype=np.int64)
+        n = len(items)
+        left = np.repeat(items, n)
+        right = np.tile(items, n)
+        mask = left != right
+        self.pending_keys.append((left[mask] << 32) | right[mask])
+        self.pending_products.append(items)
+        self.pending_size += n * n
+        self.sessions += 1
+        if self.pending_size >= self.flush_pairs:
+            self.compact()
+
+    @staticmethod
+    def _merge(keys, counts, pending):
+        merged, inverse = np.unique(np.concatenate([keys, *pending]), return_inverse=True)
+        weights = np.concatenate([counts, np.ones(sum(len(part) for part in pending))])
+        return merged, np.bincount(inverse, weights=weights, minlength=len(merged))
+
+    def compact(self):
+        if self.pending_keys:
+            self.keys, self.counts = self._merge(self.keys, self.counts, self.pending_keys)
+            self.products, self.occurrences = self._merge(self.products, self.occurrences, self.pending_products)
+        self.pending_keys, self.pending_products, self.pending_size = [], [], 0
+
+    def top_neighbors(self, k=TOP_K, min_coviews=MIN_COVIEWS):
+        """Return (product, neighbor, score) arrays, each product's best `k` neighbors first."""
+        self.compact()
+        keep = self.counts >= min_coviews
+        keys, counts = self.keys[keep], self.counts[keep]
+        product, neighbor = keys >> 32, keys & _LOW_BITS
+        occurrences = self.occurrences[np.searchsorted(self.products, product)]
+        occurrences *= self.occurrences[np.searchsorted(self.products, neighbor)]
+        score = counts / np.sqrt(occurrences)
+
+        order = np.lexsort((neighbor, -score, product))
+        product, neighbor, score = product[order], neighbor[order], score[order]
+        starts = np.flatnonzero(np.r_[True, product[1:] != product[:-1]])
+        rank = np.arange(len(product)) - np.repeat(starts, np.diff(np.r_[starts, len(product)]))
+        best = rank < k
+        return product[best], neighbor[best], score[best]
+
+
+def build_neighbors(k=TOP_K, min_coviews=MIN_COVIEWS, gap=SESSION_GAP, chunk_size=5000, flush_pairs=2_000_000):
+    """
+    Recompute ProductNeighbor from every recorded view. Returns the
+    CoViewCounts used and the number of neighbor rows written.
+    """
+    counts = CoViewCounts(flush_pairs)
+    for session in sessions(view_stream(chunk_size), gap):
+        counts.add_session(session)
+    product, neighbor, score = counts.top_neighbors(k, min_coviews)
+
+    # products deleted while the job ran would fail the foreign keys
+    live = np.fromiter(Product.objects.values_list('id', flat=True).iterator(chunk_size=chunk_size), dtype=np.int64)
+    keep = np.isin(product, live) & np.isin(neighbor, live)
+    product, neighbor, score = product[keep], neighbor[keep], score[keep]
+    with transaction.atomic():
+        ProductNeighbor.objects.all().delete()
+        for start in range(0, len(product), 1000):
+            batch = slice(start, start + 1000)
+            ProductNeighbor.objects.bulk_create([
+                ProductNeighbor(product_id=a, neighbor_id=b, score=s)
+                for a, b, s in zip(product[batch].tolist(), neighbor[batch].tolist(), score[batch].tolist())
+            ])
+    return counts, len(product)
@@ -0,0 +1,54 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from algorithm.utils import score_products, top_k
+
+
+CATEGORIES = [
+    "Accessories", "Books", "Electronics", "Fashion", "Food", "Furniture",
+    "Gadgets", "Health", "Shoes", "Stationery", "Sports", "Services",
+]
+INSTITUTES = [f"Institute {i}" for i in range(15)]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the personalized feed scoring engine on synthetic catalogs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--k", type=int, default=50, help="Number of products to select.")
+        parser.add_argument("--repeats", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        k = options["k"]
+        repeats = options["repeats"]
+        weights = {"Electronics": 12, "Shoes": 5, "Books": 2}
+
+        self.stdout.write(f"{'products':>10} {'score ms':>10} {'top-k ms':>10} {'full sort ms':>13}")
+        for size in options["sizes"]:
+            categories = rng.choice(np.array(CATEGORIES, dtype=object), size=size)
+            institutes = rng.choice(np.array(INSTITUTES, dtype=object), size=size)
+            view_counts = rng.integers(0, 300, size=size)
+
+            score_times, topk_times, sort_times = [], [], []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                scores = score_products(categories, view_counts, institutes, weights, INSTITUTES[0], rng=rng)
+                score_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                top_k(scores, k)
+                topk_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                top_k(scores)
+                sort_times.append(time.perf_counter() - start)
+
+            self.stdout.write(
+                f"{size:>10} {min(score_times) * 1000:>10.2f} "
+                f"{min(topk_times) * 1000:>10.2f} {min(sort_times) * 1000:>13.2f}"
+            )
@@ -0,0 +1,36 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from algorithm.coview import MIN_COVIEWS, SESSION_GAP, TOP_K, build_neighbors
+
+
+class Command(BaseCommand):
+    help = "Rebuild the \"customers also viewed\" neighbors from product view sessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top-k", type=int, default=TOP_K, help="Neighbors kept per product.")
+        parser.add_argument("--min-coviews", type=int, default=MIN_COVIEWS, help="Sessions a pair must share.")
+        parser.add_argument(
+            "--gap-minutes", type=float, default=SESSION_GAP.total_seconds() / 60,
+            help="Inactivity that ends a session.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000, help="View rows fetched per round trip.")
+        parser.add_argument(
+            "--flush-pairs", type=int, default=2_000_000, help="Pending pairs held before they are merged.",
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        counts, rows = build_neighbors(
+            k=options["top_k"],
+            min_coviews=options["min_coviews"],
+            gap=timedelta(minutes=options["gap_minutes"]),
+            chunk_size=options["chunk_size"],
+            flush_pairs=options["flush_pairs"],
+        )
+        self.stdout.write(
+            f"{counts.sessions} sessions, {len(counts.keys)} co-viewed pairs, "
+            f"{rows} neighbor rows written in {time.perf_counter() - start:.1f} s"
+        )
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from algorithm.affinity import rebase
+from algorithm.models import AffinityEpoch
+
+
+class Command(BaseCommand):
+    help = "Move the category affinity epoch to now, adopting AFFINITY_HALF_LIFE_DAYS for future decay."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--half-life-days", type=float, default=None,
+            help="Half-life to decay at from now on (default: the AFFINITY_HALF_LIFE_DAYS setting).",
+        )
+
+    def handle(self, *args, **options):
+        half_life = options["half_life_days"] or settings.AFFINITY_HALF_LIFE_DAYS
+        rows = rebase(half_life_days=half_life)
+        epoch = AffinityEpoch.objects.get(pk=1)
+        self.stdout.write(f"Rescaled {rows} affinity rows; epoch {epoch.started_at:%Y-%m-%d %H:%M}, half-life {half_life:g} days")
@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+HALF_LIFE_DAYS = 14
+
+
+def merge_duplicates_and_seed_scores(apps, schema_editor):
+    """
+    Fold duplicate (user, category) rows into one so the unique constraint
+    can be added, and seed `score` as if every past view happened now.
+    """
+    UserCategoryModel = apps.get_model("algorithm", "UserCategoryModel")
+    duplicates = (
+        UserCategoryModel.objects.values("user_id", "category")
+        .annotate(rows=models.Count("id"), total=Sum("view_count"))
+        .filter(rows__gt=1)
+    )
+    for group in duplicates:
+        rows = UserCategoryModel.objects.filter(user_id=group["user_id"], category=group["category"]).order_by("id")
+        keep = rows.first()
+        rows.exclude(pk=keep.pk).delete()
+        UserCategoryModel.objects.filter(pk=keep.pk).update(view_count=group["total"])
+
+    now = datetime.now(timezone.utc)
+    weight = 2.0 ** ((now - EPOCH).total_seconds() / (HALF_LIFE_DAYS * 86400))
+    UserCategoryModel.objects.update(score=models.F("view_count") * weight)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('algorithm', '0002_alter_usercategorymodel_category'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usercategorymodel',
+            name='score',
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(merge_duplicates_and_seed_scores, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('algorithm', '0003_usercategorymodel_score'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='usercategorymodel',
+            constraint=models.UniqueConstraint(fields=('user', 'category'), name='unique_user_category'),
+        ),
+    ]
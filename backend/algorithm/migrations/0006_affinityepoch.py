@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# the epoch scores were stored against before it moved into the database
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def seed_epoch(apps, schema_editor):
+    # existing scores were written with the configured half-life
+    apps.get_model("algorithm", "AffinityEpoch").objects.create(
+        pk=1, started_at=EPOCH, half_life_days=settings.AFFINITY_HALF_LIFE_DAYS
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('algorithm', '0005_productneighbor'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AffinityEpoch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('half_life_days', models.FloatField()),
+            ],
+        ),
+        migrations.RunPython(seed_epoch, migrations.RunPython.noop),
+    ]
@@ -7,6 +7,46 @@ User = get_user_model()
 # Create your models here.
 
 class UserCategoryModel(models.Model):
+    """
+    A user's affinity for a category. `view_count` is the raw number of
+    views; `score` is the exponentially decayed weight, stored relative to
+    the AffinityEpoch so that new views can be added with a plain upsert
+    and decay is applied only when the vector is read.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="user")
     category = models.CharField(max_length=100)
-    view_count = models.PositiveIntegerField(default=1)
\ No newline at end of file
+    view_count = models.PositiveIntegerField(default=1)
+    score = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "category"], name="unique_user_category"),
+        ]
+
+
+class AffinityEpoch(models.Model):
+    """
+    The time and half-life every UserCategoryModel score is stored relative
+    to (see algorithm.affinity). There is only ever one row.
+    """
+    started_at = models.DateTimeField()
+    half_life_days = models.FloatField()
+
+
+class ProductNeighbor(models.Model):
+    """
+    One of a product's top "also viewed" products, precomputed from view
+    sessions by `manage.py build_coviews` (see algorithm.coview). `score`
+    is the cosine similarity of the two products' session sets.
+    """
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="neighbors")
+    neighbor = models.ForeignKey(Product, on_delete=models.CASCADE, related_name="neighbor_of")
+    score = models.FloatField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["product", "neighbor"], name="unique_product_neighbor"),
+        ]
+        indexes = [
+            models.Index(fields=["product", "-score"], name="product_neighbor_rank_idx"),
+        ]
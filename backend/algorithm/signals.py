@@ -0,0 +1,18 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from Products_app.models import Product
+from Products_app.signals import stock_changed
+from .cache import invalidate_catalog
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def product_written(sender, **kwargs):
+    invalidate_catalog()
+
+
+@receiver(stock_changed)
+def product_sold_out(sender, sold_out=(), **kwargs):
+    if sold_out:
+        invalidate_catalog()
@@ -1,3 +1,206 @@
+from datetime import timedelta
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import TestCase
+from rest_framework.test import APIClient
+from django.utils import timezone
+
+from Products_app.models import Product, ProductView as DetailView
+from usersearch.models import ProductView as TrackedView
+from .affinity import affinity_vector, rebase, record_category_views
+from .cache import get_ranked_ids, invalidate_user_feed
+from .coview import build_neighbors
+from .models import ProductNeighbor, UserCategoryModel
+from .utils import personalized_feed, rank_product_ids, score_products, top_k
+
+User = get_user_model()
+
+
+class PersonalizedFeedTests(TestCase):
+	def setUp(self):
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		local_vendor = User.objects.create_user(
+			username="local", email="local@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		remote_vendor = User.objects.create_user(
+			username="remote", email="remote@example.com", password="pass", role="vendor", institute="OAU"
+		)
+		for i in range(10):
+			Product.objects.create(
+				vendor_id=local_vendor if i % 2 else remote_vendor,
+				product_name=f"Item {i}",
+				description="desc",
+				price=100,
+				quantity=5,
+				category="Shoes" if i % 3 else "Books",
+				view_count=i * 20,
+			)
+		UserCategoryModel.objects.create(user=self.buyer, category="Shoes", view_count=4)
+
+	def test_ranking_query_count_is_independent_of_catalog_size(self):
+		with self.assertNumQueries(2):
+			ids = rank_product_ids(self.buyer)
+		self.assertEqual(sorted(ids), sorted(Product.objects.values_list("id", flat=True)))
+
+	def test_limit_returns_best_products_first(self):
+		products = personalized_feed(self.buyer, limit=3, rng=np.random.default_rng(1))
+		self.assertEqual(len(products), 3)
+
+	def test_score_products_applies_boosts(self):
+		class FixedRandom:
+			def random(self, n):
+				return np.ones(n)
+
+		scores = score_products(
+			["Shoes", "Books", "Books"], [0, 60, 150], ["UNILAG", "OAU", "OAU"],
+			{"Shoes": 4}, "UNILAG", rng=FixedRandom(),
+		)
+		np.testing.assert_allclose(scores, [1.4 * 2.0, 1.15, 1.3])
+		self.assertEqual(top_k(scores, 2).tolist(), [0, 2])
+
+
+class FeedCacheTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.product = Product.objects.create(
+			vendor_id=self.vendor, product_name="Bag", description="desc", price=100, quantity=1, category="Bags"
+		)
+
+	def test_cached_feed_is_served_without_queries(self):
+		get_ranked_ids(self.buyer)
+		with self.assertNumQueries(0):
+			self.assertEqual(get_ranked_ids(self.buyer), [self.product.id])
+
+	def test_sessions_keep_their_own_rankings(self):
+		get_ranked_ids(self.buyer, seed=1)
+		get_ranked_ids(self.buyer, seed=2)
+		with self.assertNumQueries(0):
+			get_ranked_ids(self.buyer, seed=1)
+			get_ranked_ids(self.buyer, seed=2)
+
+	def test_user_invalidation_reranks_only_that_user(self):
+		get_ranked_ids(self.buyer)
+		invalidate_user_feed(self.buyer.id)
+		with self.assertNumQueries(2):
+			get_ranked_ids(self.buyer)
+
+	def test_product_writes_invalidate_cached_feeds(self):
+		get_ranked_ids(self.buyer)
+		new = Product.objects.create(
+			vendor_id=self.vendor, product_name="Shoe", description="desc", price=50, quantity=3, category="Shoes"
+		)
+		self.assertCountEqual(get_ranked_ids(self.buyer), [self.product.id, new.id])
+
+		new.delete()
+		self.assertEqual(get_ranked_ids(self.buyer), [self.product.id])
+
+
+class CategoryAffinityTests(TestCase):
+	def setUp(self):
+		self.user = User.objects.create_user(username="u", email="u@example.com", password="pass", role="buyer")
+		rebase(half_life_days=7)
+
+	def test_upsert_accumulates_into_a_single_row(self):
+		now = timezone.now()
+		# savepoint, epoch row lock, upsert, release
+		with self.assertNumQueries(4):
+			record_category_views({(self.user.id, "Shoes"): 2, (self.user.id, "Books"): 1}, now=now)
+		record_category_views({(self.user.id, "Shoes"): 3}, now=now)
+
+		self.assertEqual(UserCategoryModel.objects.filter(user=self.user).count(), 2)
+		self.assertEqual(UserCategoryModel.objects.get(user=self.user, category="Shoes").view_count, 5)
+		with self.assertNumQueries(1):
+			weights = affinity_vector(self.user, now=now)
+		self.assertAlmostEqual(weights["Shoes"], 5)
+		self.assertAlmostEqual(weights["Books"], 1)
+
+	def test_weights_decay_by_half_life(self):
+		then = timezone.now()
+		record_category_views({(self.user.id, "Shoes"): 4}, now=then)
+		record_category_views({(self.user.id, "Shoes"): 1}, now=then + timedelta(days=7))
+
+		weights = affinity_vector(self.user, now=then + timedelta(days=7))
+		self.assertAlmostEqual(weights["Shoes"], 4 / 2 + 1)
+
+	def test_epoch_is_rebased_before_weights_overflow(self):
+		rebase(half_life_days=1)
+		then = timezone.now()
+		record_category_views({(self.user.id, "Shoes"): 4}, now=then)
+		# 2 ** 3650 is far past float range without a rebase
+		later = then + timedelta(days=3650)
+		record_category_views({(self.user.id, "Shoes"): 1}, now=later)
+		self.assertAlmostEqual(affinity_vector(self.user, now=later)["Shoes"], 1)
+		self.assertAlmostEqual(affinity_vector(self.user, now=later + timedelta(days=1))["Shoes"], 0.5)
+
+	def test_changing_the_half_life_keeps_current_weights(self):
+		then = timezone.now()
+		record_category_views({(self.user.id, "Shoes"): 4}, now=then)
+		rebase(now=then + timedelta(days=7), half_life_days=14)
+		weights = affinity_vector(self.user, now=then + timedelta(days=21))
+		self.assertAlmostEqual(weights["Shoes"], 4 / 2 / 2)
+
+
+class AlsoViewedTests(TestCase):
+	def setUp(self):
+		vendor = User.objects.create_user(username="vendor", email="vendor@example.com", password="pass", role="vendor")
+		self.products = [
+			Product.objects.create(
+				vendor_id=vendor, product_name=f"Item {i}", description="desc", price=10, quantity=3, category="Bags"
+			)
+			for i in range(4)
+		]
+		self.buyers = [
+			User.objects.create_user(username=f"b{i}", email=f"b{i}@example.com", password="pass", role="buyer")
+			for i in range(3)
+		]
+		self.start = timezone.now() - timedelta(days=1)
+		p0, p1, p2, p3 = self.products
+		first, second, third = self.buyers
+		self._view(TrackedView, first, [(p0, 0), (p1, 5), (p2, 10), (p3, 180)])
+		self._view(DetailView, second, [(p0, 0), (p1, 1)])
+		self._view(TrackedView, second, [(p3, 10)])
+		self._view(TrackedView, third, [(p2, 0), (p0, 20)])
+
+	def _view(self, model, user, views):
+		field = "viewed_at" if model is TrackedView else "created_at"
+		for product, minutes in views:
+			row = model.objects.create(user=user, product=product)
+			model.objects.filter(pk=row.pk).update(**{field: self.start + timedelta(minutes=minutes)})
+
+	def _neighbors(self, product):
+		return list(ProductNeighbor.objects.filter(product=product).order_by("-score", "neighbor_id").values_list("neighbor_id", flat=True))
+
+	def test_sessions_from_both_view_tables_rank_by_cosine(self):
+		p0, p1, p2, p3 = self.products
+		counts, rows = build_neighbors(min_coviews=1)
+
+		self.assertEqual(counts.sessions, 3)
+		self.assertEqual(self._neighbors(p0), [p1.id, p2.id, p3.id])
+		# p2 and p3 were only viewed three hours apart
+		self.assertEqual(self._neighbors(p2), [p0.id, p1.id])
+		self.assertEqual(rows, ProductNeighbor.objects.count())
+
+		build_neighbors(k=1, min_coviews=2, flush_pairs=1)
+		self.assertEqual(self._neighbors(p0), [p1.id])
+		self.assertEqual(self._neighbors(p3), [])
+
+	def test_endpoint_serves_neighbors_in_one_query(self):
+		p0, p1, p2, p3 = self.products
+		build_neighbors(min_coviews=1)
+		client = APIClient()
 
-# Create your tests here.
+		with self.assertNumQueries(1):
+			response = client.get(f"/products/{p0.id}/also-viewed")
+		self.assertEqual([item["id"] for item in response.data["results"]], [p1.id, p2.id, p3.id])
+		response = client.get(f"/products/{p0.id}/also-viewed", {"limit": 1})
+		self.assertEqual([item["id"] for item in response.data["results"]], [p1.id])
@@ -1,38 +1,89 @@
-from .models import UserCategoryModel
+from .affinity import affinity_vector
 from Products_app.models import Product
-import random
+import numpy as np
 
 
-def personalized_feed(user):
-    products = Product.objects.all()
+CATEGORY_WEIGHT = 0.1
+LOCATION_BOOST = 2.0
+# (minimum view_count, boost) pairs, highest threshold first
+POPULARITY_TIERS = ((100, 1.3), (50, 1.15))
 
-    scored_products = []
 
-    for product in products:
-        user_view = UserCategoryModel.objects.filter(user=user, category=product.category).first()
-        if user_view:
-            category_boost = 1 + (user_view.view_count * 0.1)
-        else:
-            category_boost = 1
+def candidate_products():
+    """
+    Pull every in-stock product with its vendor's institute as plain tuples
+    of (id, category, view_count, institute).
+    """
+    return Product.objects.filter(quantity__gt=0).values_list('id', 'category', 'view_count', 'vendor_id__institute')
 
-        if product.vendor_id.institute == user.institute:
-            location_boost = 2.0
-        else:
-            location_boost = 1.0
 
-        if product.view_count > 100:
-            popularity_boost = 1.3  
-        elif product.view_count > 50:
-            popularity_boost = 1.15
-        else:
-            popularity_boost = 1.0
+def score_products(categories, view_counts, institutes, weights, institute, rng=None):
+    """
+    Score products as arrays: category boost * location boost * popularity boost,
+    jittered by a uniform random factor. `weights` maps category to the user's
+    (decayed) view weight. No database access happens here.
+    """
+    categories = np.asarray(categories, dtype=object)
+    n = len(categories)
+    if n == 0:
+        return np.empty(0, dtype=np.float64)
+    if rng is None:
+        rng = np.random.default_rng()
 
-        total_boost = category_boost * location_boost * popularity_boost
-        score = total_boost * random.random()
-        scored_products.append((score, product))
+    # one vectorized comparison per category the user has viewed, rather than
+    # one dict lookup per product
+    category_views = np.zeros(n, dtype=np.float64)
+    for category, view_count in weights.items():
+        category_views[categories == category] = view_count
+    category_boost = 1.0 + category_views * CATEGORY_WEIGHT
 
-    scored_products.sort(key=lambda x: x[0], reverse=True)
-    print(scored_products)
-    recommended_products = [product for score, product in scored_products]
+    institutes = np.asarray(institutes, dtype=object)
+    location_boost = np.where(institutes == institute, LOCATION_BOOST, 1.0)
 
-    return recommended_products
\ No newline at end of file
+    view_counts = np.asarray(view_counts, dtype=np.float64)
+    popularity_boost = np.select(
+        [view_counts > threshold for threshold, _ in POPULARITY_TIERS],
+        [boost for _, boost in POPULARITY_TIERS],
+        default=1.0,
+    )
+
+    return category_boost * location_boost * popularity_boost * rng.random(n)
+
+
+def top_k(scores, k=None):
+    """
+    Return indices of the k highest scores, best first. Only the selected k are
+    sorted; the rest of the catalog is partitioned around them.
+    """
+    n = len(scores)
+    if k is None or k >= n:
+        return np.argsort(-scores, kind='stable')
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    selected = np.argpartition(-scores, k - 1)[:k]
+    return selected[np.argsort(-scores[selected], kind='stable')]
+
+
+def rank_product_ids(user, limit=None, rng=None):
+    """
+    Rank the catalog for `user` and return the top product IDs, best first.
+    Costs two queries regardless of catalog size.
+    """
+    weights = affinity_vector(user)
+    rows = list(candidate_products())
+    if not rows:
+        return []
+
+    ids, categories, view_counts, institutes = zip(*rows)
+    view_counts = [v or 0 for v in view_counts]
+
+    scores = score_products(categories, view_counts, institutes, weights, user.institute, rng=rng)
+    order = top_k(scores, limit)
+    ids = np.asarray(ids)
+    return ids[order].tolist()
+
+
+def personalized_feed(user, limit=None, rng=None):
+    product_ids = rank_product_ids(user, limit=limit, rng=rng)
+    products = Product.objects.select_related('vendor_id').in_bulk(product_ids)
+    return [products[pk] for pk in product_ids if pk in products]
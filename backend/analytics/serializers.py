@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from .models import DailyAnalytics, ProductStockSnapshot, TopSellingProduct
+from Products_app.serializers import ProductImagesField
 
 class DailyAnalyticsSerializer(serializers.ModelSerializer):
     class Meta:
@@ -16,7 +17,7 @@ class ProductStockSnapshotSerializer(serializers.ModelSerializer):
 class TopSellingProductSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source='product.product_name', read_only=True)
     product_price = serializers.DecimalField(source='product.price', read_only=True, max_digits=10, decimal_places=2)
-    image_url = serializers.JSONField(source="product.image_url", read_only=True)
+    image_url = ProductImagesField(variant="thumb", source="product.image_url", read_only=True)
     
     class Meta:
         model = TopSellingProduct
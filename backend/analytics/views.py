@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated
 from django.db.models import Sum
 
 from Products_app.models import Product
+from Products_app.images import image_urls
 from paymentapp.models import Transaction
 
 
@@ -75,7 +76,7 @@ class TopProductsView(APIView):
             results.append({
                 'product_id': item['product__id'],
                 'product_name': item['product__product_name'],
-                'image_url': item['product__image_url'],
+                'image_url': image_urls(item['product__image_url'], 'thumb'),
                 'description': item['product__description'],
                 'vendor_name': item['product__vendor_id__username'],
                 'view_count': item['product__view_count'],
@@ -144,7 +145,7 @@ class TopProductsVendorView(APIView):
             results.append({
                 'product_id': item['product__id'],
                 'product_name': item['product__product_name'],
-                'image_url': item['product__image_url'],
+                'image_url': image_urls(item['product__image_url'], 'thumb'),
                 'description': item['product__description'],
                 'vendor_name': item['product__vendor_id__username'],
                 'view_count': item['product__view_count'],
@@ -0,0 +1,162 @@
+"""
+Background upload jobs for vendor videos.
+
+The request spools the file to local disk and returns a job id right away;
+a worker pool pushes the file to Cloudinary, creates the VendorContents row
+and notifies the vendor.
+
+The pool lives in the web process, so a restart or deploy can leave jobs
+pending or uploading with nobody working on them. `manage.py
+requeue_upload_jobs` runs such jobs again from their spooled file, or fails
+them and tells the vendor to re-upload when the file did not survive.
+"""
+import logging
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary.uploader
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from notification.utils import send_notification_to_user
+from .models import ContentUploadJob, VendorContents
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.CONTENT_UPLOAD_WORKERS, thread_name_prefix="content-upload"
+        )
+    return _executor
+
+
+def spool_upload(upload):
+    """Copy an uploaded file to the spool directory and return its path."""
+    os.makedirs(settings.CONTENT_UPLOAD_SPOOL_DIR, exist_ok=True)
+    _, ext = os.path.splitext(upload.name or "")
+    path = os.path.join(settings.CONTENT_UPLOAD_SPOOL_DIR, f"{uuid.uuid4().hex}{ext}")
+    with open(path, "wb") as spooled:
+        if hasattr(upload, "temporary_file_path"):
+            with open(upload.temporary_file_path(), "rb") as source:
+                shutil.copyfileobj(source, spooled)
+        else:
+            for chunk in upload.chunks():
+                spooled.write(chunk)
+    return path
+
+
+def create_upload_job(user, caption, upload):
+    """Spool an uploaded video, record its job and start it after the request commits."""
+    spool_path = spool_upload(upload)
+    try:
+        job = ContentUploadJob.objects.create(
+            user=user, caption=caption, file_name=upload.name or "video", spool_path=spool_path,
+        )
+    except Exception:
+        os.remove(spool_path)
+        raise
+    enqueue_upload_job(job)
+    return job
+
+
+def upload_video(path, user_id):
+    """Push a spooled video to Cloudinary and return its secure URL."""
+    result = cloudinary.uploader.upload(
+        path,
+        resource_type="video",
+        folder=f"vendor_content/{user_id}",
+        chunk_size=6000000,
+        timeout=600,
+        eager_async=True,
+        invalidate=True,
+    )
+    return result["secure_url"]
+
+
+def _notify_failed(job):
+    send_notification_to_user(
+        user=job.user,
+        title="Upload failed",
+        message=f"We could not upload {job.file_name}. Please try again.",
+        notification_type="general",
+    )
+
+
+def run_upload_job(job_id):
+    # claiming the pending job keeps a requeued job from being uploaded twice
+    if not ContentUploadJob.objects.filter(pk=job_id, status="pending").update(
+        status="uploading", updated_at=timezone.now()
+    ):
+        return
+    job = ContentUploadJob.objects.select_related("user").get(pk=job_id)
+    try:
+        video_url = upload_video(job.spool_path, job.user_id)
+        content = VendorContents.objects.create(user=job.user, caption=job.caption or "", video=video_url)
+    except Exception as e:
+        logger.exception("Content upload job %s failed", job.pk)
+        ContentUploadJob.objects.filter(pk=job.pk).update(status="failed", error=str(e), updated_at=timezone.now())
+        _notify_failed(job)
+    else:
+        ContentUploadJob.objects.filter(pk=job.pk).update(
+            status="completed", content=content, updated_at=timezone.now()
+        )
+        send_notification_to_user(
+            user=job.user,
+            title="Upload complete",
+            message=f"{job.file_name} has been uploaded and is now live.",
+            notification_type="general",
+        )
+    finally:
+        if os.path.exists(job.spool_path):
+            os.remove(job.spool_path)
+
+
+def _run_in_worker(job_id):
+    close_old_connections()
+    try:
+        run_upload_job(job_id)
+    finally:
+        connection.close()
+
+
+def enqueue_upload_job(job):
+    """
+    Start the job once the current transaction commits. With
+    CONTENT_UPLOAD_WORKERS set to 0 the job runs inline instead.
+    """
+    if settings.CONTENT_UPLOAD_WORKERS <= 0:
+        transaction.on_commit(lambda: run_upload_job(job.pk))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_worker, job.pk))
+
+
+def requeue_stale_jobs(cutoff):
+    """
+    Run again every job left pending or uploading since before `cutoff`,
+    inline. Jobs whose spooled file is gone are marked failed and their
+    vendor is asked to upload again. Returns (requeued, failed) counts.
+    """
+    requeued = failed = 0
+    stale = ContentUploadJob.objects.select_related("user").filter(
+        status__in=["pending", "uploading"], updated_at__lt=cutoff
+    )
+    for job in stale:
+        now = timezone.now()
+        # matching the status and timestamp read above skips jobs a worker moved on since
+        claim = ContentUploadJob.objects.filter(pk=job.pk, status=job.status, updated_at=job.updated_at)
+        if not os.path.exists(job.spool_path):
+            if claim.update(status="failed", error="The upload was interrupted; please upload again.", updated_at=now):
+                _notify_failed(job)
+                failed += 1
+        elif claim.update(status="pending", updated_at=now):
+            run_upload_job(job.pk)
+            requeued += 1
+    return requeued, failed
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from customers.jobs import requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Run content upload jobs left pending or uploading, e.g. by a restart, again from their spooled file."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than", type=int, default=3600,
+            help="Only jobs untouched for at least this many seconds, leaving live uploads to the workers.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options["older_than"])
+        requeued, failed = requeue_stale_jobs(cutoff)
+        self.stdout.write(f"Requeued {requeued} upload jobs; failed {failed} whose spooled file was lost.")
@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
@@ -158,4 +159,30 @@ class ContentReview(models.Model):
         content.save()
 
     def __str__(self):
-        return f"{self.user.email} reviewed content {self.content.id}"
\ No newline at end of file
+        return f"{self.user.email} reviewed content {self.content.id}"
+
+class ContentUploadJob(models.Model):
+    """A vendor video spooled to local disk, waiting to be pushed to storage."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('uploading', 'Uploading'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='content_upload_jobs')
+    caption = models.TextField(blank=True, null=True)
+    file_name = models.CharField(max_length=255)
+    spool_path = models.CharField(max_length=500)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    content = models.ForeignKey(VendorContents, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_jobs')
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Upload {self.id} by {self.user_id} ({self.status})"
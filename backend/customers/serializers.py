@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import TopCustomers, TopVendors, VendorContents, VendorProfiles, Follow, ContentLike, ContentReview
+from .models import TopCustomers, TopVendors, VendorContents, VendorProfiles, Follow, ContentLike, ContentReview, ContentUploadJob
 
 class TopCustomersSerializer(serializers.ModelSerializer):
     username = serializers.CharField(source='customer.username', read_only=True)
@@ -43,6 +43,9 @@ class VendorContentSerializer(serializers.ModelSerializer):
         return None
     
     def get_is_liked_by_user(self, obj):
+        if hasattr(obj, 'liked_by_user'):
+            # annotated by callers that load many contents at once
+            return obj.liked_by_user
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return ContentLike.objects.filter(user=request.user, content=obj).exists()
@@ -103,4 +106,12 @@ class ContentReviewSerializer(serializers.ModelSerializer):
     def validate_comment(self, value):
         if not value or len(value.strip()) < 3:
             raise serializers.ValidationError("Comment must be at least 3 characters long")
-        return value
\ No newline at end of file
+        return value
+
+
+class ContentUploadJobSerializer(serializers.ModelSerializer):
+    content = VendorContentSerializer(read_only=True)
+
+    class Meta:
+        model = ContentUploadJob
+        fields = ['id', 'status', 'file_name', 'caption', 'content', 'error', 'created_at', 'updated_at']
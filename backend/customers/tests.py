@@ -1,3 +1,112 @@
-from django.test import TestCase
+import os
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .jobs import create_upload_job, requeue_stale_jobs, spool_upload
+from .models import ContentUploadJob, VendorContents
+
+User = get_user_model()
+
+
+@override_settings(CONTENT_UPLOAD_WORKERS=0, CONTENT_UPLOAD_SPOOL_DIR=tempfile.mkdtemp())
+class ContentUploadJobTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.client.force_authenticate(self.vendor)
+
+	def _upload(self):
+		video = SimpleUploadedFile("clip.mp4", b"\x00" * 2048, content_type="video/mp4")
+		return self.client.post("/customers/content/upload/", {"video": video, "caption": "New stock"}, format="multipart")
+
+	@patch("customers.jobs.send_notification_to_user")
+	@patch("customers.jobs.upload_video", return_value="https://cdn.example.com/clip.mp4")
+	def test_video_upload_returns_job_and_publishes_in_background(self, mock_upload, mock_notify):
+		with self.captureOnCommitCallbacks(execute=False) as callbacks:
+			response = self._upload()
+
+		self.assertEqual(response.status_code, 202)
+		job = ContentUploadJob.objects.get(id=response.data["job_id"])
+		self.assertEqual(job.status, "pending")
+		self.assertTrue(os.path.exists(job.spool_path))
+		self.assertFalse(VendorContents.objects.exists())
+
+		for callback in callbacks:
+			callback()
+
+		job.refresh_from_db()
+		self.assertEqual(job.status, "completed")
+		self.assertEqual(job.content.video, "https://cdn.example.com/clip.mp4")
+		self.assertEqual(job.content.caption, "New stock")
+		self.assertFalse(os.path.exists(job.spool_path))
+		mock_notify.assert_called_once()
+
+		status_response = self.client.get(f"/customers/content/upload/{job.id}/")
+		self.assertEqual(status_response.status_code, 200)
+		self.assertEqual(status_response.data["status"], "completed")
+		self.assertEqual(status_response.data["content"]["id"], job.content.id)
+
+	@patch("customers.jobs.send_notification_to_user")
+	@patch("customers.jobs.upload_video", side_effect=RuntimeError("storage down"))
+	def test_failed_upload_marks_job_failed(self, mock_upload, mock_notify):
+		with self.captureOnCommitCallbacks(execute=True):
+			response = self._upload()
+
+		job = ContentUploadJob.objects.get(id=response.data["job_id"])
+		self.assertEqual(job.status, "failed")
+		self.assertEqual(job.error, "storage down")
+		self.assertFalse(os.path.exists(job.spool_path))
+		self.assertFalse(VendorContents.objects.exists())
+		mock_notify.assert_called_once()
+
+	def test_status_is_private_to_the_uploader(self):
+		job = ContentUploadJob.objects.create(user=self.vendor, file_name="clip.mp4", spool_path="/nonexistent")
+		other = User.objects.create_user(
+			username="other", email="other@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.client.force_authenticate(other)
+
+		response = self.client.get(f"/customers/content/upload/{job.id}/")
+
+		self.assertEqual(response.status_code, 404)
+
+	def test_spool_is_removed_when_the_job_cannot_be_recorded(self):
+		spool_dir = tempfile.mkdtemp()
+		with override_settings(CONTENT_UPLOAD_SPOOL_DIR=spool_dir), patch(
+			"customers.jobs.ContentUploadJob.objects.create", side_effect=RuntimeError("db down")
+		):
+			with self.assertRaises(RuntimeError):
+				create_upload_job(self.vendor, "", SimpleUploadedFile("clip.mp4", b"\x00" * 16))
+
+		self.assertEqual(os.listdir(spool_dir), [])
+
+	@patch("customers.jobs.send_notification_to_user")
+	@patch("customers.jobs.upload_video", return_value="https://cdn.example.com/clip.mp4")
+	def test_stale_jobs_are_requeued_or_failed(self, mock_upload, mock_notify):
+		spooled = spool_upload(SimpleUploadedFile("clip.mp4", b"\x00" * 16))
+		interrupted = ContentUploadJob.objects.create(user=self.vendor, file_name="clip.mp4", spool_path=spooled, status="uploading")
+		lost = ContentUploadJob.objects.create(user=self.vendor, file_name="lost.mp4", spool_path="/nonexistent")
+		live = ContentUploadJob.objects.create(user=self.vendor, file_name="live.mp4", spool_path="/nonexistent")
+		hour_ago = timezone.now() - timedelta(hours=1)
+		ContentUploadJob.objects.filter(pk__in=[interrupted.pk, lost.pk]).update(updated_at=hour_ago)
+
+		self.assertEqual(requeue_stale_jobs(timezone.now() - timedelta(minutes=30)), (1, 1))
+
+		interrupted.refresh_from_db()
+		lost.refresh_from_db()
+		live.refresh_from_db()
+		self.assertEqual(interrupted.status, "completed")
+		self.assertFalse(os.path.exists(spooled))
+		self.assertEqual(lost.status, "failed")
+		self.assertEqual(live.status, "pending")
+		self.assertEqual(mock_upload.call_count, 1)
+		self.assertEqual(mock_notify.call_count, 2)
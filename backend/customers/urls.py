@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import GetMyContents, TopCustomersView, TopVendorsView, UpdateProfileView, EditProfileView, DeleteProfileView, UploadContentView, UserDeleteProfile, ReviewContentView, LikeContentView, FollowVendorView, GetContentReviewsView, GetUserProfile, GetVendorContents
+from .views import GetMyContents, TopCustomersView, TopVendorsView, UpdateProfileView, EditProfileView, DeleteProfileView, UploadContentView, ContentUploadJobView, UserDeleteProfile, ReviewContentView, LikeContentView, FollowVendorView, GetContentReviewsView, GetUserProfile, GetVendorContents
 
 
 urlpatterns = [
@@ -11,6 +11,7 @@ urlpatterns = [
     path('user/delete/', UserDeleteProfile.as_view(), name='user-delete-profile'),
     path('mycontents/', GetMyContents.as_view(), name='get-profile'),
     path('content/upload/', UploadContentView.as_view(), name='upload-content'),
+    path('content/upload/<uuid:job_id>/', ContentUploadJobView.as_view(), name='upload-content-status'),
     path('content/<int:content_id>/reviews/', GetContentReviewsView.as_view(), name='get-content-reviews'),
     path('content/<int:content_id>/review/', ReviewContentView.as_view(), name='review-content'),
     path('content/<int:content_id>/like/', LikeContentView.as_view(), name='like-content'),
@@ -7,8 +7,10 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from account.models import CustomUserModel
-from .models import TopCustomers, TopVendors, VendorProfiles, VendorContents, Follow, ContentLike, ContentReview
-from .serializers import TopCustomersSerializer, TopVendorsSerializer, VendorContentSerializer, VendorProfilesSerializer, FollowSerializer, ContentLikeSerializer, ContentReviewSerializer
+from .models import TopCustomers, TopVendors, VendorProfiles, VendorContents, Follow, ContentLike, ContentReview, ContentUploadJob
+from .serializers import TopCustomersSerializer, TopVendorsSerializer, VendorContentSerializer, VendorProfilesSerializer, FollowSerializer, ContentLikeSerializer, ContentReviewSerializer, ContentUploadJobSerializer
+from .jobs import create_upload_job
+from django.urls import reverse
 from rest_framework import status
 from rest_framework.pagination import PageNumberPagination
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
@@ -215,27 +217,20 @@ class UploadContentView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
+            if video_file:
+                # Videos can take minutes to reach Cloudinary; spool to disk and
+                # let a background worker upload and publish them.
+                job = create_upload_job(request.user, request.data.get('caption', ''), video_file)
+                return Response({
+                    "job_id": str(job.id),
+                    "status": job.status,
+                    "status_url": request.build_absolute_uri(reverse('upload-content-status', args=[job.id])),
+                }, status=status.HTTP_202_ACCEPTED)
+
             # Upload to Cloudinary and get the secure URL
-            video_url = None
             picture_url = None
             
             try:
-                if video_file:
-                    print(f"Uploading video: {video_file.name}, size: {video_file.size}")
-                    
-                    upload_result = cloudinary.uploader.upload(
-                        video_file,
-                        resource_type="video",
-                        folder=f"vendor_content/{request.user.id}",
-                        chunk_size=6000000,
-                        timeout=600,
-                        eager_async=True,
-                        invalidate=True
-                    )
-                    
-                    print(f"Cloudinary upload result: {upload_result}")
-                    video_url = upload_result['secure_url']
-                
                 if picture_file:
                     print(f"Uploading picture: {picture_file.name}")
                     
@@ -250,7 +245,6 @@ class UploadContentView(APIView):
                 content = VendorContents.objects.create(
                     user=request.user,
                     caption=request.data.get('caption', ''),
-                    video=video_url,
                     pictures=picture_url
                 )
                 
@@ -274,6 +268,23 @@ class UploadContentView(APIView):
             )
 
 
+class ContentUploadJobView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Get Content Upload Status",
+        description="Poll the status of a background video upload started by the upload endpoint.",
+        responses={200: ContentUploadJobSerializer},
+    )
+    def get(self, request, job_id):
+        try:
+            job = ContentUploadJob.objects.select_related('content').get(id=job_id, user=request.user)
+        except ContentUploadJob.DoesNotExist:
+            return Response({"error": "Upload job not found"}, status=status.HTTP_404_NOT_FOUND)
+        serializer = ContentUploadJobSerializer(job, context={'request': request})
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
 class GetMyContents(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -7,6 +7,7 @@ from rest_framework import status
 from django.db.models import Q
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction as db_transaction
+from wallet import ledger
 from wallet.models import EscrowWallet
 from paymentapp.models import VendorWallet
 from django.db.models import F
@@ -67,6 +68,7 @@ class ValidateOrderQRCodeView(APIView):
             escrow.status = "RELEASED"
             escrow.released_at = timezone.now()
             escrow.save()   
+            ledger.post(ledger.release(escrow, vendor_wallet, vendor_wallet.balance + escrow.amount))
             order.status = "COMPLETED"
             order.save()
 
@@ -0,0 +1,153 @@
+"""
+Idempotency-Key support for endpoints that move money or stock.
+
+A client sends the same `Idempotency-Key` header on every retry of one
+logical request. The first request claims the key in IdempotencyKey and
+runs; its response is stored against the key, and later requests with the
+key get that response back without running the view again. A retry that
+arrives while the first request is still running waits up to
+IDEMPOTENCY_WAIT seconds for its response instead of racing it, and is
+told to retry later if it is not ready by then.
+
+The view runs in a transaction that also stores its response, so its
+effects and the stored response commit together or not at all: a request
+that dies before answering leaves nothing behind, and its claim is
+released after IDEMPOTENCY_LOCK_TIMEOUT seconds. Only successful responses
+are stored. Refusals such as insufficient funds or stock depend on state
+that can change, and server errors may be transient, so for those the
+claim is released and a retry runs again.
+
+Keys are scoped per user and expire after IDEMPOTENCY_KEY_TTL seconds.
+Reusing a live key with a different request body is refused.
+"""
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.http import HttpResponse
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+HEADER = 'Idempotency-Key'
+WAIT_INTERVAL = 0.05
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    name=HEADER,
+    location=OpenApiParameter.HEADER,
+    description='Unique key per logical request; retries with the same key return the first response.',
+    type=OpenApiTypes.STR,
+    required=False,
+)
+
+
+def request_hash(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def _claim(user, key, fingerprint):
+    """
+    Try to take `key` for this request. Returns (row, owned); row is None if
+    the key vanished between the attempts.
+    """
+    now = timezone.now()
+    fields = {'request_hash': fingerprint, 'created_at': now, 'expires_at': now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)}
+    try:
+        with transaction.atomic():
+            row = IdempotencyKey.objects.create(user=user, key=key, **fields)
+        # keys only matter until they expire; clear this user's old ones as we go
+        IdempotencyKey.objects.filter(user=user, expires_at__lte=now).delete()
+        return row, True
+    except IntegrityError:
+        pass
+    abandoned = Q(status_code__isnull=True, created_at__lte=now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT))
+    taken = IdempotencyKey.objects.filter(Q(expires_at__lte=now) | abandoned, user=user, key=key).update(
+        status_code=None, response_body='', **fields
+    )
+    return IdempotencyKey.objects.filter(user=user, key=key).first(), bool(taken)
+
+
+def _release(row):
+    # match created_at so a claim another request has since taken over is left alone
+    IdempotencyKey.objects.filter(pk=row.pk, created_at=row.created_at, status_code__isnull=True).delete()
+
+
+def _in_progress():
+    response = Response(
+        {"error": f"A request with this {HEADER} is still in progress."},
+        status=status.HTTP_409_CONFLICT,
+    )
+    response['Retry-After'] = '1'
+    return response
+
+
+def _replay(row):
+    response = HttpResponse(row.response_body, status=row.status_code, content_type='application/json')
+    response['Idempotent-Replayed'] = 'true'
+    return response
+
+
+def idempotent(view_method):
+    """
+    Make an APIView handler honour the Idempotency-Key header. Requests
+    without the header, or from anonymous users, run as before.
+    """
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"error": f"{HEADER} must be at most 255 characters."}, status=status.HTTP_400_BAD_REQUEST)
+
+        fingerprint = request_hash(request)
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+        while True:
+            row, owned = _claim(request.user, key, fingerprint)
+            if owned:
+                break
+            if row is not None:
+                if row.request_hash != fingerprint:
+                    return Response(
+                        {"error": f"{HEADER} was already used for a different request."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                if row.status_code is not None:
+                    return _replay(row)
+                if time.monotonic() >= deadline:
+                    return _in_progress()
+            time.sleep(WAIT_INTERVAL)
+
+        try:
+            with transaction.atomic():
+                response = view_method(self, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    body = JSONRenderer().render(response.data).decode() if response.data is not None else ''
+                    stored = IdempotencyKey.objects.filter(
+                        pk=row.pk, created_at=row.created_at, status_code__isnull=True
+                    ).update(status_code=response.status_code, response_body=body)
+                    if not stored:
+                        # the claim outlived IDEMPOTENCY_LOCK_TIMEOUT and a retry took
+                        # it over; only one of the two may commit
+                        transaction.set_rollback(True)
+                        return _in_progress()
+        except Exception:
+            _release(row)
+            raise
+        if not status.is_success(response.status_code):
+            _release(row)
+        return response
+
+    return wrapper
@@ -0,0 +1,121 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from paymentapp.models import BuyerWallet
+from paymentapp.views import InitializeOrderView
+from Products_app.models import Product
+from Pymarket.bench import scratch_database
+from userCart.models import CartItem
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Run concurrent checkouts of overlapping carts and report throughput, failures and round trips."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=8, help="Concurrent checkout threads.")
+        parser.add_argument("--checkouts", type=int, default=25, help="Checkouts per buyer.")
+        parser.add_argument("--cart-size", type=int, default=20)
+        parser.add_argument("--products", type=int, default=60, help="Shared products every cart draws from.")
+        parser.add_argument("--vendors", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            buyers, product_ids = self.seed(options)
+            view = InitializeOrderView.as_view()
+            factory = APIRequestFactory()
+
+            def checkout(buyer):
+                request = factory.post("/payment/create-order/", {}, format="json")
+                force_authenticate(request, user=buyer)
+                return view(request)
+
+            def fill_cart(buyer, rng):
+                # carts list the same hot products in different orders
+                CartItem.objects.bulk_create(
+                    CartItem(user=buyer, product_id=product_id, quantity=1)
+                    for product_id in rng.sample(product_ids, options["cart_size"])
+                )
+
+            rng = random.Random(options["seed"])
+            for size in (1, options["cart_size"]):
+                CartItem.objects.bulk_create(
+                    CartItem(user=buyers[0], product_id=product_id, quantity=1) for product_id in product_ids[:size]
+                )
+                with CaptureQueriesContext(connection) as queries:
+                    checkout(buyers[0])
+                self.stdout.write(f"{size:>3}-item cart: {len(queries)} queries")
+
+            results = {"ok": 0, "conflict": 0, "failed": 0}
+            lock = threading.Lock()
+
+            def run(buyer, seed):
+                thread_rng = random.Random(seed)
+                try:
+                    for _ in range(options["checkouts"]):
+                        try:
+                            CartItem.objects.filter(user=buyer).delete()
+                            fill_cart(buyer, thread_rng)
+                            status_code = checkout(buyer).status_code
+                            outcome = "ok" if status_code == 200 else "conflict"
+                        except DatabaseError:
+                            # deadlocks, lock timeouts, or SQLite's single writer
+                            outcome = "failed"
+                        with lock:
+                            results[outcome] += 1
+                finally:
+                    connection.close()
+
+            threads = [
+                threading.Thread(target=run, args=(buyer, rng.random())) for buyer in buyers
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            seconds = time.perf_counter() - start
+
+            if connection.vendor == "sqlite":
+                self.stdout.write(
+                    "SQLite allows one writer at a time, so concurrent checkouts mostly fail with "
+                    "'table is locked'; run against PostgreSQL to measure row lock contention."
+                )
+            total = sum(results.values())
+            self.stdout.write(
+                f"{len(buyers)} buyers x {options['checkouts']} checkouts of {options['cart_size']} items "
+                f"over {len(product_ids)} products on {connection.vendor}"
+            )
+            self.stdout.write(
+                f"{total / seconds:.1f} checkouts/s, {results['ok']} ok, "
+                f"{results['conflict']} refused (stock or funds), {results['failed']} database errors"
+            )
+
+    def seed(self, options):
+        vendors = User.objects.bulk_create(
+            User(username=f"vendor{i}", email=f"vendor{i}@example.com", role="vendor")
+            for i in range(options["vendors"])
+        )
+        buyers = User.objects.bulk_create(
+            User(username=f"buyer{i}", email=f"buyer{i}@example.com", role="buyer")
+            for i in range(options["buyers"])
+        )
+        BuyerWallet.objects.bulk_create(BuyerWallet(user=buyer, balance=Decimal("10000000.00")) for buyer in buyers)
+        products = Product.objects.bulk_create(
+            Product(
+                vendor_id=vendors[i % len(vendors)], product_name=f"Product {i}", description="Synthetic benchmark product",
+                price=100, quantity=1_000_000, category=f"Category {i % 12}", image_url=[],
+            )
+            for i in range(options["products"])
+        )
+        return buyers, [product.pk for product in products]
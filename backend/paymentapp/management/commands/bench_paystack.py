@@ -0,0 +1,55 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from paymentapp import paystack
+from paymentapp.stub import start_stub
+
+
+class Command(BaseCommand):
+    help = "Compare one-off requests with the pooled Paystack client against the local stub."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--calls", type=int, default=200)
+        parser.add_argument("--workers", type=int, default=10, help="Concurrent callers, like request threads.")
+        parser.add_argument("--latency-ms", type=int, default=20)
+        parser.add_argument("--failure-rate", type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        # failures are switched on after the setup call, which is not retried
+        server = start_stub(latency=options["latency_ms"] / 1000)
+        base_url = f"http://127.0.0.1:{server.server_port}"
+        try:
+            with override_settings(PAYSTACK_BASE_URL=base_url):
+                reference = paystack.initialize_transaction({"email": "bench@example.com", "amount": 100000})["data"]["reference"]
+                server.failure_rate = options["failure_rate"]
+
+                def one_off(_):
+                    # what the views did before: a new connection, no timeout, no retry
+                    return requests.get(f"{base_url}/transaction/verify/{reference}").json().get("status") is True
+
+                def pooled(_):
+                    try:
+                        return paystack.verify_transaction(reference).get("status") is True
+                    except paystack.PaystackError:
+                        return False
+
+                self.stdout.write(
+                    f"{options['calls']} verify calls, {options['workers']} workers, "
+                    f"{options['latency_ms']} ms latency, {options['failure_rate']:.0%} of responses 503"
+                )
+                for name, call in (("one-off", one_off), ("pooled", pooled)):
+                    server.requests = 0
+                    start = time.perf_counter()
+                    with ThreadPoolExecutor(options["workers"]) as pool:
+                        ok = sum(pool.map(call, range(options["calls"])))
+                    seconds = time.perf_counter() - start
+                    self.stdout.write(
+                        f"{name:<8} {options['calls'] / seconds:7.1f} calls/s, "
+                        f"{ok}/{options['calls']} succeeded, {server.requests} requests sent"
+                    )
+        finally:
+            server.shutdown()
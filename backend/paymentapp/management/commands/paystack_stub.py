@@ -0,0 +1,38 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from paymentapp.stub import start_stub
+
+
+class Command(BaseCommand):
+    help = "Run a local Paystack stand-in with simulated latency and failures (set PAYSTACK_BASE_URL to its URL)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--latency-ms", type=int, default=150, help="Base delay of every response.")
+        parser.add_argument("--jitter-ms", type=int, default=100, help="Extra random delay, up to this much.")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of requests answered with 503.")
+        parser.add_argument("--hang-rate", type=float, default=0.0, help="Share of requests that stall.")
+        parser.add_argument("--hang-seconds", type=float, default=30.0, help="How long a stalled request stalls.")
+        parser.add_argument(
+            "--webhook-url",
+            help="Post a signed charge.success event here for each initialized transaction, "
+                 "e.g. http://127.0.0.1:8000/wallet/paystack/webhook",
+        )
+
+    def handle(self, *args, **options):
+        server = start_stub(
+            options["host"], options["port"],
+            latency=options["latency_ms"] / 1000, jitter=options["jitter_ms"] / 1000,
+            failure_rate=options["failure_rate"], hang_rate=options["hang_rate"], hang=options["hang_seconds"],
+            webhook_url=options["webhook_url"], webhook_secret=settings.PAYSTACK_SECRET_KEY or "",
+        )
+        self.stdout.write(f"Stub Paystack on http://{options['host']}:{server.server_port} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
@@ -34,3 +34,23 @@ class Transaction(models.Model):
         ('WITHDRAWAL', 'Withdrawal'),
     ]
     transaction_type = models.CharField(max_length=20, choices=transaction_type_choices)
+
+
+class IdempotencyKey(models.Model):
+    """
+    A client-supplied Idempotency-Key and the response it produced (see
+    `paymentapp.idempotency`). `status_code` stays empty while the first
+    request with the key is still running.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField()
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='unique_user_idempotency_key'),
+        ]
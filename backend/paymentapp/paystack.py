@@ -1,23 +1,175 @@
-import json
+"""
+Paystack API client.
+
+Every call goes through one pooled `requests.Session` per process, so
+connections (and their TLS sessions) are kept alive and reused instead of
+handshaking on each payment. Calls are bounded by PAYSTACK_TIMEOUT
+(connect, read) seconds and retried at most PAYSTACK_MAX_RETRIES times
+with exponential backoff plus jitter:
+
+- connection failures are retried for any request, since nothing reached
+  Paystack;
+- 429 and 5xx answers and read timeouts are retried only for GETs.
+  Initializing a transaction twice could create two charges.
+
+Failures, including any answer outside 2xx once retries are spent,
+surface as PaystackError. `AsyncPaystack` offers the same calls on
+httpx for async views. PAYSTACK_BASE_URL can point at the local stub
+(`manage.py paystack_stub`) to exercise payment paths offline.
+"""
+import asyncio
+import random
+import threading
+import weakref
+
+import httpx
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def checkout(payload):
-    headers = {
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+BACKOFF_FACTOR = 0.25
+BACKOFF_JITTER = 0.25
+
+
+class PaystackError(Exception):
+    """Paystack could not be reached, refused the call or did not answer with JSON."""
+
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _headers():
+    return {
         "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json"
+        "Content-Type": "application/json",
     }
 
-    response = requests.post(
-        'https://api.paystack.co/transaction/initialize',
-        headers=headers, 
-        data=json.dumps(payload)
-    )
-    response_data = response.json() 
+
+def _url(path):
+    return f"{settings.PAYSTACK_BASE_URL.rstrip('/')}/{path.lstrip('/')}"
+
+
+def _decode(status_code, body):
+    """Return the JSON body of a 2xx answer; raise PaystackError for anything else."""
+    try:
+        data = body()
+    except ValueError as exc:
+        raise PaystackError(str(exc)) from exc
+    if not 200 <= status_code < 300:
+        message = data.get("message") if isinstance(data, dict) else None
+        raise PaystackError(f"Paystack answered {status_code}: {message or 'no message'}")
+    return data
+
+
+def get_session():
+    """The process-wide pooled session, created on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retries = settings.PAYSTACK_MAX_RETRIES
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.PAYSTACK_POOL_SIZE,
+                    max_retries=Retry(
+                        total=retries,
+                        connect=retries,
+                        read=retries,
+                        status=retries,
+                        allowed_methods=frozenset({"GET"}),
+                        status_forcelist=RETRY_STATUSES,
+                        backoff_factor=BACKOFF_FACTOR,
+                        backoff_jitter=BACKOFF_JITTER,
+                        raise_on_status=False,
+                    ),
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+def request(method, path, **kwargs):
+    """Send one API request and return the decoded JSON body of a 2xx answer."""
+    try:
+        response = get_session().request(
+            method, _url(path), headers=_headers(), timeout=settings.PAYSTACK_TIMEOUT, **kwargs
+        )
+    except requests.RequestException as exc:
+        raise PaystackError(str(exc)) from exc
+    return _decode(response.status_code, response.json)
+
+
+def initialize_transaction(payload):
+    return request("POST", "/transaction/initialize", json=payload)
+
+
+def verify_transaction(reference):
+    return request("GET", f"/transaction/verify/{reference}")
+
+
+def checkout(payload):
+    try:
+        response_data = initialize_transaction(payload)
+    except PaystackError:
+        response_data = {}
 
     if response_data.get('status') == True:
         return True, response_data['data']['authorization_url']
     else:
         return False, "Failed to initiate payment, please try again later"
-    
-    
\ No newline at end of file
+
+
+class AsyncPaystack:
+    """
+    The same calls for async views, on a pooled `httpx.AsyncClient`. An
+    AsyncClient is bound to the event loop it was created on, so one is kept
+    per running loop.
+    """
+
+    def __init__(self):
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            connect, read = settings.PAYSTACK_TIMEOUT
+            client = self._clients[loop] = httpx.AsyncClient(
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=settings.PAYSTACK_POOL_SIZE),
+                # connection failures are retried by the transport itself
+                transport=httpx.AsyncHTTPTransport(retries=settings.PAYSTACK_MAX_RETRIES),
+            )
+        return client
+
+    async def request(self, method, path, **kwargs):
+        attempts = 1 + (settings.PAYSTACK_MAX_RETRIES if method == "GET" else 0)
+        for attempt in range(attempts):
+            if attempt:
+                await asyncio.sleep(BACKOFF_FACTOR * 2 ** (attempt - 1) + random.uniform(0, BACKOFF_JITTER))
+            try:
+                response = await self._client().request(method, _url(path), headers=_headers(), **kwargs)
+            except httpx.TimeoutException as exc:
+                error = exc
+                continue
+            except httpx.HTTPError as exc:
+                raise PaystackError(str(exc)) from exc
+            if response.status_code in RETRY_STATUSES and attempt + 1 < attempts:
+                continue
+            return _decode(response.status_code, response.json)
+        raise PaystackError(str(error)) from error
+
+    async def initialize_transaction(self, payload):
+        return await self.request("POST", "/transaction/initialize", json=payload)
+
+    async def verify_transaction(self, reference):
+        return await self.request("GET", f"/transaction/verify/{reference}")
+
+
+async_paystack = AsyncPaystack()
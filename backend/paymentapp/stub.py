@@ -0,0 +1,149 @@
+"""
+A local stand-in for the Paystack API, for tests and offline load tests.
+
+It answers transaction initialize and verify calls like Paystack, after a
+configurable delay, and can fail a share of requests with 503 or hang long
+enough to trip client timeouts. Given a webhook URL and secret it also
+posts a signed `charge.success` event for every initialized transaction, as
+if the customer paid straight away. Start it with `manage.py paystack_stub`
+and point PAYSTACK_BASE_URL at it.
+"""
+import hashlib
+import hmac
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import Request, urlopen
+
+
+def charge_data(reference, payload):
+    """The `data` Paystack returns for a successful charge of an initialize `payload`."""
+    return {
+        "status": "success",
+        "reference": reference,
+        "amount": payload.get("amount"),
+        "currency": "NGN",
+        "customer": {"email": payload.get("email")},
+        "metadata": payload.get("metadata"),
+    }
+
+
+def charge_success_event(reference, payload):
+    return {"event": "charge.success", "data": charge_data(reference, payload)}
+
+
+def sign(body, secret):
+    """The `x-paystack-signature` header value for a raw webhook body."""
+    return hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+
+
+def deliver_webhook(url, secret, event, timeout=10):
+    """POST a signed webhook event to `url` and return the response status."""
+    body = json.dumps(event).encode()
+    request = Request(url, data=body, method="POST", headers={
+        "Content-Type": "application/json",
+        "x-paystack-signature": sign(body, secret),
+    })
+    with urlopen(request, timeout=timeout) as response:
+        return response.status
+
+
+class StubPaystackHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, as Paystack does
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        try:
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client timed out and hung up while we were "slow"
+            self.close_connection = True
+
+    def _simulate(self):
+        """Wait like a real round trip; returns False if this request should fail."""
+        server = self.server
+        with server.lock:
+            server.requests += 1
+        if random.random() < server.hang_rate:
+            time.sleep(server.hang)
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        if random.random() < server.failure_rate:
+            self._reply(503, {"status": False, "message": "Service temporarily unavailable"})
+            return False
+        return True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if not self._simulate():
+            return
+        if self.path.rstrip("/") != "/transaction/initialize":
+            return self._reply(404, {"status": False, "message": "Not found"})
+        reference = payload.get("reference") or uuid.uuid4().hex[:12]
+        with self.server.lock:
+            self.server.transactions[reference] = payload
+        if self.server.webhook_url:
+            threading.Thread(target=self._send_webhook, args=(reference, payload), daemon=True).start()
+        self._reply(200, {
+            "status": True,
+            "message": "Authorization URL created",
+            "data": {
+                "authorization_url": f"http://{self.headers.get('Host')}/checkout/{reference}",
+                "access_code": uuid.uuid4().hex[:15],
+                "reference": reference,
+            },
+        })
+
+    def do_GET(self):
+        if not self._simulate():
+            return
+        prefix = "/transaction/verify/"
+        if not self.path.startswith(prefix):
+            return self._reply(404, {"status": False, "message": "Not found"})
+        reference = self.path[len(prefix):]
+        payload = self.server.transactions.get(reference)
+        if payload is None:
+            return self._reply(400, {"status": False, "message": "Transaction reference not found"})
+        self._reply(200, {"status": True, "message": "Verification successful", "data": charge_data(reference, payload)})
+
+    def _send_webhook(self, reference, payload):
+        server = self.server
+        time.sleep(server.latency + random.uniform(0, server.jitter))
+        try:
+            deliver_webhook(server.webhook_url, server.webhook_secret, charge_success_event(reference, payload))
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class StubPaystackServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # clients dropping connections is what the hang and timeout tests do
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+def start_stub(host="127.0.0.1", port=0, latency=0.0, jitter=0.0, failure_rate=0.0, hang_rate=0.0, hang=30.0,
+               webhook_url=None, webhook_secret=""):
+    """Serve the stub on a background thread and return the server; `server.shutdown()` stops it."""
+    server = StubPaystackServer((host, port), StubPaystackHandler)
+    server.lock = threading.Lock()
+    server.transactions = {}
+    server.requests = 0
+    server.latency, server.jitter = latency, jitter
+    server.failure_rate, server.hang_rate, server.hang = failure_rate, hang_rate, hang
+    server.webhook_url, server.webhook_secret = webhook_url, webhook_secret
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -1,3 +1,225 @@
-from django.test import TestCase
+import asyncio
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from orders.models import Order
+from Products_app.models import Product
+from Products_app.signals import stock_changed
+from userCart.models import CartItem
+from wallet.models import EscrowWallet
+from . import paystack
+from .models import BuyerWallet, IdempotencyKey
+from .stub import start_stub
+
+User = get_user_model()
+
+
+class CheckoutTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.wallet = BuyerWallet.objects.create(user=self.buyer, balance=Decimal("10000.00"))
+		self.client.force_authenticate(self.buyer)
+		self.vendors = [
+			User.objects.create_user(
+				username=f"vendor{i}", email=f"vendor{i}@example.com", password="pass", role="vendor", institute="UNILAG"
+			)
+			for i in range(3)
+		]
+		self.products = [
+			Product.objects.create(
+				vendor_id=self.vendors[i % 3], product_name=f"Item {i}", description="desc",
+				price=Decimal("10.00") + i, quantity=5, category="Bags",
+			)
+			for i in range(21)
+		]
+
+	def _cart(self, products, quantity=1):
+		CartItem.objects.bulk_create(CartItem(user=self.buyer, product=product, quantity=quantity) for product in products)
+
+	def _checkout(self):
+		return self.client.post("/payment/create-order/", {}, format="json")
+
+	def test_round_trips_do_not_grow_with_cart_size(self):
+		counts = []
+		for products in (self.products[20:], self.products[:20]):
+			self._cart(products)
+			with CaptureQueriesContext(connection) as queries:
+				self.assertEqual(self._checkout().status_code, 200)
+			counts.append(len(queries))
+		self.assertEqual(counts[0], counts[1])
+
+	def test_checkout_moves_stock_orders_escrow_and_balance(self):
+		sold = []
+		stock_changed.connect(lambda sender, **kwargs: sold.append(kwargs["sold_out"]), weak=False, dispatch_uid="test")
+		self.addCleanup(stock_changed.disconnect, dispatch_uid="test")
+		self._cart(self.products[:4])
+		CartItem.objects.create(user=self.buyer, product=self.products[0], quantity=4)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			response = self._checkout()
+		self.assertEqual(response.status_code, 200)
+		# 5 x 10 + 11 + 12 + 13
+		self.assertEqual(response.data["total_amount_naira"], 86.0)
+		self.assertEqual(response.data["orders_created"], 3)
+		self.assertEqual(
+			sorted(EscrowWallet.objects.values_list("order__vendor_id", "amount")),
+			sorted([(self.vendors[0].id, Decimal("63.00")), (self.vendors[1].id, Decimal("11.00")), (self.vendors[2].id, Decimal("12.00"))]),
+		)
+		self.assertEqual(
+			list(Product.objects.filter(pk__in=[p.pk for p in self.products[:4]]).order_by("pk").values_list("quantity", flat=True)),
+			[0, 4, 4, 4],
+		)
+		self.wallet.refresh_from_db()
+		self.assertEqual(self.wallet.balance, Decimal("9914.00"))
+		self.assertFalse(CartItem.objects.filter(user=self.buyer).exists())
+		self.assertEqual(sold, [[self.products[0].pk]])
+
+	def test_shortfalls_change_nothing(self):
+		self._cart(self.products[:2], quantity=3)
+		Product.objects.filter(pk=self.products[1].pk).update(quantity=2)
+		response = self._checkout()
+		self.assertEqual(response.status_code, 409)
+		self.assertIn("Item 1", response.data["error"])
+
+		BuyerWallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal("5.00"))
+		Product.objects.filter(pk=self.products[1].pk).update(quantity=5)
+		self.assertEqual(self._checkout().status_code, 400)
+
+		self.assertFalse(Order.objects.exists())
+		self.assertEqual(Product.objects.get(pk=self.products[0].pk).quantity, 5)
+		self.assertEqual(CartItem.objects.filter(user=self.buyer).count(), 2)
+
+
+class IdempotencyKeyTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.wallet = BuyerWallet.objects.create(user=self.buyer, balance=Decimal("100.00"))
+		self.client.force_authenticate(self.buyer)
+		vendor = User.objects.create_user(username="vendor", email="vendor@example.com", password="pass", role="vendor")
+		self.product = Product.objects.create(
+			vendor_id=vendor, product_name="Lamp", description="desc", price=Decimal("30.00"), quantity=5, category="Home"
+		)
+		CartItem.objects.create(user=self.buyer, product=self.product, quantity=1)
+
+	def _checkout(self, key, body=None):
+		return self.client.post("/payment/create-order/", body or {}, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+	def test_retries_replay_the_first_response_without_touching_stock_or_wallets(self):
+		first = self._checkout("retry-1")
+		self.assertEqual(first.status_code, 200)
+
+		CartItem.objects.create(user=self.buyer, product=self.product, quantity=1)
+		with CaptureQueriesContext(connection) as queries:
+			retry = self._checkout("retry-1")
+		self.assertEqual(retry.status_code, 200)
+		self.assertEqual(retry["Idempotent-Replayed"], "true")
+		self.assertEqual(retry.json(), first.json())
+		touched = " ".join(query["sql"] for query in queries)
+		self.assertNotIn("Products_app_product", touched)
+		self.assertNotIn("paymentapp_buyerwallet", touched)
+		self.assertEqual(Order.objects.count(), 1)
+		self.assertEqual(Product.objects.get(pk=self.product.pk).quantity, 4)
+
+		# a new key is a new checkout
+		self.assertEqual(self._checkout("retry-2").status_code, 200)
+		self.assertEqual(Order.objects.count(), 2)
+
+	def test_key_reused_for_a_different_request_is_refused(self):
+		self._checkout("retry-1")
+		response = self._checkout("retry-1", {"cart_id": [1]})
+		self.assertEqual(response.status_code, 422)
+
+	def test_refusals_are_not_replayed(self):
+		BuyerWallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal("10.00"))
+		self.assertEqual(self._checkout("retry-1").status_code, 400)
+
+		BuyerWallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal("100.00"))
+		retry = self._checkout("retry-1")
+		self.assertEqual(retry.status_code, 200)
+		self.assertNotIn("Idempotent-Replayed", retry)
+		self.assertEqual(Order.objects.count(), 1)
+
+	def test_checkout_and_stored_response_commit_together(self):
+		with patch("paymentapp.idempotency.JSONRenderer.render", side_effect=RuntimeError("worker killed")):
+			with self.assertRaises(RuntimeError):
+				self._checkout("retry-1")
+
+		self.assertFalse(Order.objects.exists())
+		self.assertEqual(Product.objects.get(pk=self.product.pk).quantity, 5)
+		self.assertFalse(IdempotencyKey.objects.exists())
+		self.assertEqual(self._checkout("retry-1").status_code, 200)
+
+	@override_settings(IDEMPOTENCY_WAIT=0.1)
+	def test_in_flight_duplicates_wait_then_back_off_until_the_claim_is_abandoned(self):
+		self._checkout("retry-1")
+		claim = IdempotencyKey.objects.get(user=self.buyer, key="retry-1")
+		IdempotencyKey.objects.filter(pk=claim.pk).update(status_code=None, response_body="")
+		CartItem.objects.create(user=self.buyer, product=self.product, quantity=1)
+
+		response = self._checkout("retry-1")
+		self.assertEqual(response.status_code, 409)
+		self.assertEqual(Order.objects.count(), 1)
+
+		IdempotencyKey.objects.filter(pk=claim.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+		self.assertEqual(self._checkout("retry-1").status_code, 200)
+		self.assertEqual(Order.objects.count(), 2)
+
+
+class PaystackClientTests(TestCase):
+	def _stub(self, **options):
+		server = start_stub(**options)
+		self.addCleanup(server.shutdown)
+		settings = override_settings(PAYSTACK_BASE_URL=f"http://127.0.0.1:{server.server_port}")
+		settings.enable()
+		self.addCleanup(settings.disable)
+		return server
+
+	def test_initialize_and_verify_reuse_one_pooled_connection(self):
+		self._stub()
+		data = paystack.initialize_transaction({"email": "a@example.com", "amount": 5000, "reference": "ref-1"})
+		self.assertTrue(data["status"])
+		self.assertEqual(paystack.verify_transaction("ref-1")["data"]["amount"], 5000)
+		self.assertIs(paystack.get_session(), paystack.get_session())
+
+		self.assertEqual(asyncio.run(paystack.async_paystack.verify_transaction("ref-1"))["data"]["status"], "success")
+
+	def test_server_errors_are_retried_for_reads_only(self):
+		server = self._stub(failure_rate=1.0)
+		with self.assertRaises(paystack.PaystackError):
+			paystack.verify_transaction("ref-1")
+		self.assertEqual(server.requests, 3)
+
+		server.requests = 0
+		with self.assertRaises(paystack.PaystackError):
+			paystack.initialize_transaction({"email": "a@example.com", "amount": 5000})
+		self.assertEqual(server.requests, 1)
+
+		server.requests = 0
+		with self.assertRaises(paystack.PaystackError):
+			asyncio.run(paystack.async_paystack.verify_transaction("ref-1"))
+		self.assertEqual(server.requests, 3)
+
+	@override_settings(PAYSTACK_TIMEOUT=(1, 0.2))
+	def test_stalled_responses_time_out(self):
+		self._stub(hang_rate=1.0, hang=1.0)
+		start = time.monotonic()
+		with self.assertRaises(paystack.PaystackError):
+			paystack.initialize_transaction({"email": "a@example.com", "amount": 5000})
+		with self.assertRaises(paystack.PaystackError):
+			asyncio.run(paystack.async_paystack.initialize_transaction({"email": "a@example.com", "amount": 5000}))
+		self.assertLess(time.monotonic() - start, 1.5)
@@ -4,7 +4,9 @@ from rest_framework import status
 from userCart.models import CartItem
 from userCart.serializers import CartItemSerializer 
 from .models import Transaction, VendorWallet, BuyerWallet
+from .idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
 from Products_app.models import Product
+from Products_app.signals import stock_changed
 from rest_framework.permissions import IsAuthenticated
 
 import uuid
@@ -13,11 +15,12 @@ import requests
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 from django.db import transaction as db_transaction
-from django.db.models import F
+from django.db.models import Case, F, PositiveIntegerField, When
 from decimal import Decimal
 from rest_framework import serializers
 from drf_spectacular.utils import inline_serializer
 from orders.models import Order
+from wallet import ledger
 from wallet.models import EscrowWallet
 from django.contrib.auth import get_user_model
 User = get_user_model()
@@ -27,7 +30,9 @@ class InitializeOrderView(APIView):
 
     @extend_schema(
             summary="Purchase Multiple Items from Wallet",
-            description="Checkout all cart items for the user. Debits buyer wallet, credits vendor wallets, updates stock, and completes transactions.",
+            description="Checkout all cart items for the user. Debits buyer wallet, credits vendor wallets, updates stock, and completes transactions. "
+                        "Retries that send the same Idempotency-Key get the first response back.",
+            parameters=[IDEMPOTENCY_KEY_PARAMETER],
             request=inline_serializer(
                 name='CheckoutRequest',
                 fields={
@@ -119,7 +124,7 @@ class InitializeOrderView(APIView):
                 ),
             ]
         )
-
+    @idempotent
     def post(self, request):
         """Checkout all items in user's cart"""
         user = request.user
@@ -133,54 +138,18 @@ class InitializeOrderView(APIView):
                 ids=[int(i) for i in ids]
             except ValueError:
                 return Response({"error":"Invalid cart IDs."}, status=status.HTTP_400_BAD_REQUEST)
-            cart_items = CartItem.objects.select_related("product").filter(user=user, id__in=ids)
+            cart_items = CartItem.objects.filter(user=user, id__in=ids)
         else:
-            cart_items = CartItem.objects.select_related("product").filter(user=user)
-        if not cart_items.exists():
+            cart_items = CartItem.objects.filter(user=user)
+        cart_items = list(cart_items.order_by('id').values_list('product_id', 'quantity'))
+        if not cart_items:
             return Response({"error": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Calculate total and group by vendor
-        total_amount_naira = Decimal('0.00')
-        # cart_details = []
-        per_item_totals = {}
-        vendor_items ={}
-
-        for cart_item in cart_items:
-            product = cart_item.product
-            quantity = cart_item.quantity
-            vendor_id = product.vendor_id
-
-            try:
-                price_naira = Decimal(product.price)
-            except Exception:
-                price_naira = Decimal(str(product.price))
-
-            # Total for this item
-            item_total_naira = price_naira * quantity
-            total_amount_naira += item_total_naira
-            per_item_totals[cart_item.id] = item_total_naira
+        # Units wanted per product, in cart order
+        wanted = {}
+        for product_id, quantity in cart_items:
+            wanted[product_id] = wanted.get(product_id, 0) + quantity
 
-            # cart_details.append({
-            #     "cart_item_id": cart_item.id,
-            #     "product_id": product.id,
-            #     "product_name": product.product_name,
-            #     "vendor_id": vendor_id,
-            #     "quantity": quantity,
-            #     "price_per_unit_naira": float(price_naira),
-            #     "item_total_naira": float(item_total_naira),
-            # })
-
-            if vendor_id not in vendor_items:
-                vendor_items[vendor_id] = []
-            vendor_items[vendor_id].append({
-                "cart_item_id": cart_item.id,
-                "product_name": product.product_name,
-                "quantity": quantity,
-                "amount":item_total_naira,
-                "product_id":product.id
-
-            })
-            print(vendor_items)
         # Start atomic transaction
         with db_transaction.atomic():
             # Get buyer wallet
@@ -189,68 +158,78 @@ class InitializeOrderView(APIView):
             except BuyerWallet.DoesNotExist:
                 return Response({"error": "Buyer wallet not found."}, status=status.HTTP_404_NOT_FOUND)
 
+            # Lock every product in one query, always in primary key order so
+            # concurrent checkouts of overlapping carts cannot deadlock
+            products = {
+                row[0]: row for row in Product.objects.select_for_update().filter(pk__in=wanted)
+                .order_by('pk').values_list('pk', 'product_name', 'price', 'quantity', 'vendor_id')
+            }
+
+            # Check stock and group totals by vendor, using the locked prices
+            total_amount_naira = Decimal('0.00')
+            vendor_totals = {}
+            for product_id, quantity in wanted.items():
+                if product_id not in products:
+                    return Response({"error": "A product in your cart is no longer available."}, status=status.HTTP_409_CONFLICT)
+                _, product_name, price, stock, vendor_id = products[product_id]
+                if stock < quantity:
+                    return Response({
+                        "error": f"Insufficient stock for {product_name}. Available: {stock}, Requested: {quantity}",
+                    }, status=status.HTTP_409_CONFLICT)
+                item_total_naira = Decimal(str(price)) * quantity
+                total_amount_naira += item_total_naira
+                vendor_totals[vendor_id] = vendor_totals.get(vendor_id, Decimal('0.00')) + item_total_naira
+
             # Check funds before processing
-            if float(buyer_wallet.balance) < total_amount_naira:
+            if buyer_wallet.balance < total_amount_naira:
                 return Response({
                     "error": "Insufficient funds.",
                     "balance_naira": float(buyer_wallet.balance),
                     "required_naira": total_amount_naira,
                 }, status=status.HTTP_400_BAD_REQUEST)
-            orders_created = []
-            
-            # Process each vendor's items
-            for vendor_id, items in vendor_items.items():
-                vendor_total = Decimal('0.00')
-                
-                # Process each item for this vendor
-                for item in items:
-                    product_id = item['product_id']
-                    product_name = item['product_name']
-                    quantity = item['quantity']
-                    amount = item['amount']
-
-                    # Get product and lock it
-                    product = Product.objects.select_for_update().get(pk=product_id)
-
-                    # Check stock
-                    if product.quantity < quantity:
-                        return Response({
-                            "error": f"Insufficient stock for {product_name}. Available: {product.quantity}, Requested: {quantity}",
-                        }, status=status.HTTP_409_CONFLICT)
-
-                    # Deduct stock
-                    Product.objects.filter(pk=product_id).update(quantity=F('quantity') - quantity)
-                    vendor_total += amount
 
-                # Create ONE order per vendor
-                order = Order.objects.create(
-                    buyer=user,
-                    vendor=vendor_id,  # Changed from vendor_id to vendor (ForeignKey field)
-                    amount=vendor_total,
-                    status='pending'
-                )
-                orders_created.append(order)
+            # Deduct all stock with one UPDATE; the stock guard repeats the check above
+            Product.objects.filter(pk__in=wanted).update(quantity=Case(
+                *[When(pk=product_id, quantity__gte=quantity, then=F('quantity') - quantity)
+                  for product_id, quantity in wanted.items()],
+                default=F('quantity'),
+                output_field=PositiveIntegerField(),
+            ))
+            stock_moved = list(wanted)
+            sold_out = [product_id for product_id, quantity in wanted.items() if products[product_id][3] == quantity]
 
-                # Create Escrow record
-                EscrowWallet.objects.create(
-                    order=order,
-                    amount=vendor_total,
-                    status="HELD"
-                )
-
-                
+            # ONE order per vendor, each with its escrow record
+            orders_created = Order.objects.bulk_create([
+                Order(buyer=user, vendor_id=vendor_id, amount=vendor_total, status='pending')
+                for vendor_id, vendor_total in vendor_totals.items()
+            ])
+            escrows = EscrowWallet.objects.bulk_create([
+                EscrowWallet(order=order, amount=order.amount, status="HELD") for order in orders_created
+            ])
 
             # Debit buyer wallet ONCE (after all orders created)
             BuyerWallet.objects.filter(pk=buyer_wallet.pk).update(
                 balance=F('balance') - total_amount_naira
             )
 
+            # One ledger journal per escrow, all in one insert
+            journals = []
+            balance = buyer_wallet.balance
+            for escrow in escrows:
+                balance -= escrow.amount
+                journals.append(ledger.hold(buyer_wallet, balance, escrow))
+            ledger.post(*journals)
+
             # Clear purchased cart items
             if ids:
                 CartItem.objects.filter(user=user, id__in=ids).delete()
             else:
                 CartItem.objects.filter(user=user).delete()
 
+            db_transaction.on_commit(lambda: stock_changed.send(
+                sender=Product, product_ids=stock_moved, sold_out=sold_out
+            ))
+
             return Response({
                 "message": "Orders created. Awaiting QR code validation.",
                 "total_amount_naira": float(total_amount_naira),
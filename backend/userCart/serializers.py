@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from .models import CartItem
 from rest_framework.exceptions import ValidationError
+from Products_app.serializers import ProductImagesField
 
 class CartItemSerializer(serializers.ModelSerializer):
     product_name = serializers.CharField(source="product.product_name", read_only=True)
-    product_image = serializers.JSONField(source="product.image_url", read_only=True)
+    product_image = ProductImagesField(variant="thumb", source="product.image_url", read_only=True)
     product_price = serializers.IntegerField(source="product.price", read_only=True)
     vendor_name = serializers.CharField(source="product.vendor_id.username", read_only=True)
     class Meta:
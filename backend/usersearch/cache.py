@@ -0,0 +1,76 @@
+"""
+Short-lived cache of search results.
+
+Entries hold only ranked product IDs (plus small extras such as facet
+counts) under a key built from the normalized query and the filter set, so
+"Bags" and " bags" share one entry and pages are hydrated with a single
+`id__in` query. Each entry records the version counters of the categories
+it covers; a product write bumps its category's counter, which turns every
+entry touching that category into a miss. New products in other
+categories show up once the entry's SEARCH_CACHE_TTL runs out.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from Products_app.models import Product
+from .queries import normalize_query
+from .search import MAX_RESULTS, search_products
+
+
+def _category_key(category):
+    return f"search:category:{hashlib.sha1(category.encode()).hexdigest()}:version"
+
+
+def _entry_key(query, filters):
+    raw = json.dumps([normalize_query(query), sorted((filters or {}).items())])
+    return f"search:results:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def category_versions(categories):
+    keys = {category: _category_key(category) for category in categories}
+    stored = cache.get_many(keys.values())
+    return {category: stored.get(key, 0) for category, key in keys.items()}
+
+
+def bump_categories(categories):
+    """Invalidate every cached result that includes one of `categories`."""
+    for category in set(categories):
+        key = _category_key(category)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # missing counters read as 0; start this one past that
+            if not cache.add(key, 1, None):
+                cache.incr(key)
+
+
+def get_results(query, filters=None):
+    """Return the cached entry for a query and filter set, or None on a miss."""
+    entry = cache.get(_entry_key(query, filters))
+    if entry is None or category_versions(entry['versions']) != entry['versions']:
+        return None
+    return entry
+
+
+def store_results(query, filters, ids, versions, **extra):
+    """
+    Cache `ids` for a query and filter set, stamped with the
+    `category_versions` of the categories they cover.
+    """
+    entry = {'ids': ids, 'versions': versions, **extra}
+    cache.set(_entry_key(query, filters), entry, settings.SEARCH_CACHE_TTL)
+    return entry
+
+
+def cached_search_ids(query, limit=MAX_RESULTS):
+    """`search_products`, served from the cache when the result is still current."""
+    entry = get_results(query, {'limit': limit})
+    if entry is not None:
+        return entry['ids']
+    ids = search_products(query, limit)
+    categories = set(Product.objects.filter(id__in=ids).values_list('category', flat=True).distinct())
+    # a write racing this fill is only picked up at expiry, which the short TTL bounds
+    return store_results(query, {'limit': limit}, ids, category_versions(categories))['ids']
@@ -0,0 +1,177 @@
+"""
+Faceted product search: category, price band, institute and stock status.
+
+Counts come from FacetCount, one row per (category, price band, institute,
+in stock) cell, kept current on product writes, checkout stock changes and
+vendors moving institute.
+The table has at most a few thousand rows, so counts for any combination of
+filters are summed in Python from one small read. Each facet is counted
+with every filter except its own applied, so the other options of a facet
+stay visible after one is picked.
+"""
+from collections import Counter
+from decimal import Decimal
+
+from django.db import transaction
+
+from Products_app.models import Product
+from Pymarket.db import upsert
+from .models import FacetCount
+
+
+# (name, lower bound inclusive, upper bound exclusive) in naira
+PRICE_BANDS = (
+    ('under-1k', 0, 1000),
+    ('1k-5k', 1000, 5000),
+    ('5k-20k', 5000, 20000),
+    ('20k-100k', 20000, 100000),
+    ('100k-plus', 100000, None),
+)
+FACETS = ('category', 'price_band', 'institute', 'in_stock')
+CELL_FIELDS = ('category', 'price', 'quantity', 'vendor_id__institute')
+
+
+def price_band(price):
+    price = Decimal(str(price or 0))
+    for name, low, high in PRICE_BANDS:
+        if high is None or price < high:
+            return name
+    return PRICE_BANDS[-1][0]
+
+
+def cell_for(category, price, quantity, institute):
+    """The facet cell of a product, as a (category, band, institute, in_stock) tuple."""
+    return (category, price_band(price), institute or '', bool(quantity and quantity > 0))
+
+
+def product_cell(product):
+    return cell_for(product.category, product.price, product.quantity, product.vendor_id.institute)
+
+
+def stored_cell(product_id):
+    row = Product.objects.filter(pk=product_id).values_list(*CELL_FIELDS).first()
+    return cell_for(*row) if row else None
+
+
+def apply_deltas(deltas):
+    """Add {cell: delta} to the stored counts with one upsert."""
+    rows = [
+        dict(zip(FACETS, cell), count=delta)
+        for cell, delta in deltas.items()
+        if delta
+    ]
+    upsert(FacetCount, rows, unique_fields=FACETS, increment_fields=('count',))
+
+
+def move_product(old_cell, new_cell):
+    if old_cell == new_cell:
+        return
+    deltas = Counter()
+    if old_cell is not None:
+        deltas[old_cell] -= 1
+    if new_cell is not None:
+        deltas[new_cell] += 1
+    apply_deltas(deltas)
+
+
+def mark_sold_out(product_ids):
+    """
+    Move products whose stock just reached zero into the out-of-stock cells.
+    Returns the categories affected.
+    """
+    deltas = Counter()
+    for row in Product.objects.filter(pk__in=product_ids).values_list(*CELL_FIELDS):
+        category, band, institute, _ = cell_for(*row)
+        deltas[(category, band, institute, True)] -= 1
+        deltas[(category, band, institute, False)] += 1
+    apply_deltas(deltas)
+    return {cell[0] for cell in deltas}
+
+
+def move_vendor(vendor_id, old_institute, new_institute):
+    """
+    Move a vendor's products into the cells of their new institute.
+    Returns the categories affected.
+    """
+    if (old_institute or '') == (new_institute or ''):
+        return set()
+    deltas = Counter()
+    for category, price, quantity in Product.objects.filter(vendor_id=vendor_id).values_list(*CELL_FIELDS[:3]):
+        deltas[cell_for(category, price, quantity, old_institute)] -= 1
+        deltas[cell_for(category, price, quantity, new_institute)] += 1
+    apply_deltas(deltas)
+    return {cell[0] for cell in deltas}
+
+
+def rebuild_facet_counts():
+    """Recompute every cell from the catalog. Returns the number of cells."""
+    counts = Counter(cell_for(*row) for row in Product.objects.values_list(*CELL_FIELDS).iterator(chunk_size=2000))
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(
+            [FacetCount(**dict(zip(FACETS, cell)), count=n) for cell, n in counts.items()],
+            batch_size=500,
+        )
+    return len(counts)
+
+
+def parse_filters(params):
+    """
+    Read facet filters from query params. Returns (filters, error); filters
+    maps facet name to the wanted cell value.
+    """
+    filters = {}
+    for facet in ('category', 'institute'):
+        if params.get(facet):
+            filters[facet] = params[facet]
+    band = params.get('price_band')
+    if band:
+        if band not in {name for name, _, _ in PRICE_BANDS}:
+            return None, f"Unknown price_band '{band}'"
+        filters['price_band'] = band
+    in_stock = params.get('in_stock')
+    if in_stock:
+        if in_stock not in ('true', 'false'):
+            return None, "in_stock must be 'true' or 'false'"
+        filters['in_stock'] = in_stock == 'true'
+    return filters, None
+
+
+def filter_queryset(queryset, filters):
+    if 'category' in filters:
+        queryset = queryset.filter(category=filters['category'])
+    if 'institute' in filters:
+        queryset = queryset.filter(vendor_id__institute=filters['institute'])
+    if 'in_stock' in filters:
+        queryset = queryset.filter(quantity__gt=0) if filters['in_stock'] else queryset.filter(quantity=0)
+    if 'price_band' in filters:
+        _, low, high = next(band for band in PRICE_BANDS if band[0] == filters['price_band'])
+        queryset = queryset.filter(price__gte=low)
+        if high is not None:
+            queryset = queryset.filter(price__lt=high)
+    return queryset
+
+
+def cell_matches(cell, filters, skip=None):
+    return all(cell[FACETS.index(facet)] == value for facet, value in filters.items() if facet != skip)
+
+
+def count_facets(weighted_cells, filters):
+    """
+    Facet counts from (cell, count) pairs: {facet: {value: count}}, each
+    facet counted under every filter but its own.
+    """
+    counts = {facet: Counter() for facet in FACETS}
+    for cell, n in weighted_cells:
+        for i, facet in enumerate(FACETS):
+            if cell_matches(cell, filters, skip=facet):
+                counts[facet][cell[i]] += n
+    facets = {facet: dict(counts[facet].most_common()) for facet in FACETS}
+    facets['in_stock'] = {str(value).lower(): n for value, n in facets['in_stock'].items()}
+    return facets
+
+
+def catalog_facets(filters):
+    """Facet counts for the whole catalog, from the precomputed cells."""
+    cells = FacetCount.objects.filter(count__gt=0).values_list(*FACETS, 'count')
+    return count_facets(((row[:4], row[4]) for row in cells), filters)
@@ -0,0 +1,176 @@
+"""
+Typo-tolerant product name search with trigrams.
+
+Names and queries are split into pg_trgm style trigrams (each word is
+lowercased and padded as "  word "), and a product scores the share of the
+query's trigrams found in its name, so "ipone" still finds "iPhone 12".
+
+On Postgres this is pg_trgm's word similarity over a GIN trigram index (see
+migration 0003). Elsewhere `TrigramIndex` keeps the postings in numpy
+arrays: one CSR block (`offsets`, `postings`) built in bulk, plus a small
+list-based tail for rows added since, folded back in once it grows. A
+search concatenates the query's postings and counts matches per row with
+one `np.bincount`. Writes served by other processes make it rebuild (see
+`versions.py`).
+"""
+import re
+import threading
+
+import numpy as np
+from django.db import connection, transaction
+
+from Products_app.models import Product
+from .versions import SharedVersion
+
+
+# Minimum share of the query's trigrams a name must contain.
+SIMILARITY_THRESHOLD = 0.5
+MAX_RESULTS = 500
+
+_word_re = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    found = set()
+    for word in _word_re.findall((text or '').lower()):
+        padded = f'  {word} '
+        found.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return found
+
+
+class TrigramIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = SharedVersion('trigram')
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.loaded = False
+            self.version.seen = None
+            self._build([])
+
+    def _build(self, rows):
+        """Rebuild every array from (product_id, name) rows."""
+        self.names = [name for _, name in rows]
+        self.ids = np.array([pk for pk, _ in rows], dtype=np.int64)
+        self.alive = np.ones(len(rows), dtype=bool)
+        self.row_of = {pk: row for row, (pk, _) in enumerate(rows)}
+        self.vocabulary = {}
+        sizes = np.zeros(len(rows), dtype=np.float32)
+        term_ids, row_ids = [], []
+        for row, name in enumerate(self.names):
+            grams = trigrams(name)
+            sizes[row] = len(grams)
+            for gram in grams:
+                term_ids.append(self.vocabulary.setdefault(gram, len(self.vocabulary)))
+                row_ids.append(row)
+        self.sizes = sizes
+        term_ids = np.array(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids, kind='stable')
+        self.postings = np.array(row_ids, dtype=np.int32)[order]
+        self.offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocabulary)), out=self.offsets[1:])
+        self.tail = {}
+        self.tail_rows = 0
+
+    def _ensure_loaded(self):
+        if self.loaded and self.version.is_current():
+            return
+        with self.lock:
+            version = self.version.current()
+            if not self.loaded or version != self.version.seen:
+                self._build(list(Product.objects.values_list('id', 'product_name').iterator(chunk_size=2000)))
+                self.version.seen = version
+                self.loaded = True
+
+    def _compact(self):
+        alive = np.flatnonzero(self.alive)
+        self._build([(int(self.ids[row]), self.names[row]) for row in alive])
+
+    def _retire(self, product_id):
+        row = self.row_of.pop(product_id, None)
+        if row is not None:
+            self.alive[row] = False
+
+    def update(self, product):
+        self.version.bump()
+        with self.lock:
+            if not self.loaded:
+                return
+            self._retire(product.pk)
+            grams = trigrams(product.product_name)
+            row = len(self.names)
+            self.names.append(product.product_name)
+            self.ids = np.append(self.ids, product.pk)
+            self.alive = np.append(self.alive, True)
+            self.sizes = np.append(self.sizes, np.float32(len(grams)))
+            self.row_of[product.pk] = row
+            for gram in grams:
+                self.tail.setdefault(gram, []).append(row)
+            self.tail_rows += 1
+            if self.tail_rows > max(1000, len(self.names) // 10):
+                self._compact()
+
+    def remove(self, product_id):
+        self.version.bump()
+        with self.lock:
+            if self.loaded:
+                self._retire(product_id)
+
+    def search(self, query, limit=MAX_RESULTS, threshold=SIMILARITY_THRESHOLD):
+        grams = trigrams(query)
+        if not grams:
+            return []
+        self._ensure_loaded()
+        with self.lock:
+            parts = []
+            for gram in grams:
+                term = self.vocabulary.get(gram)
+                if term is not None:
+                    parts.append(self.postings[self.offsets[term]:self.offsets[term + 1]])
+                if gram in self.tail:
+                    parts.append(np.array(self.tail[gram], dtype=np.int32))
+            if not parts:
+                return []
+            shared = np.bincount(np.concatenate(parts), minlength=len(self.ids))
+            score = shared / len(grams)
+            rows = np.flatnonzero((score >= threshold) & self.alive)
+            if not len(rows):
+                return []
+            # containment first, then how little else the name has, newest first
+            jaccard = shared[rows] / (len(grams) + self.sizes[rows] - shared[rows])
+            ids = self.ids[rows]
+            order = np.lexsort((-ids, -jaccard, -score[rows]))[:limit]
+            return ids[order].tolist()
+
+
+trigram_index = TrigramIndex()
+
+
+def _postgres_fuzzy(query, limit, threshold):
+    text = ' '.join(_word_re.findall((query or '').lower()))
+    if not text:
+        return []
+    table = connection.ops.quote_name(Product._meta.db_table)
+    with transaction.atomic(), connection.cursor() as cursor:
+        # the <% operator (and so the GIN index) filters on this setting
+        cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)", [str(threshold)])
+        cursor.execute(
+            f'''
+            SELECT id FROM {table}
+            WHERE %s <%% lower(product_name)
+            ORDER BY word_similarity(%s, lower(product_name)) DESC,
+                     similarity(%s, lower(product_name)) DESC, id DESC
+            LIMIT %s
+            ''',
+            [text, text, text, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def fuzzy_search_products(query, limit=MAX_RESULTS, threshold=SIMILARITY_THRESHOLD):
+    """Return IDs of products whose names approximately match `query`, best first."""
+    if connection.vendor == 'postgresql':
+        return _postgres_fuzzy(query, limit, threshold)
+    return trigram_index.search(query, limit, threshold)
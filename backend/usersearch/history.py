@@ -0,0 +1,86 @@
+"""
+Recently viewed products and content, per user.
+
+Each user's last VIEW_HISTORY_SIZE product views and content views are kept
+as two small lists in the cache, newest first, with one entry per item: a
+repeat view moves the item back to the front. The tracking endpoints push
+onto them, so reading a history is one cache get followed by one batched
+query for the items themselves. ProductView and ContentView are still
+written for analytics; they are only read here to refill a list the cache
+has lost.
+
+Two pushes for the same user at the same moment can drop one of the two
+entries. That is acceptable for a "recently viewed" strip and keeps a push
+to a get and a set.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from customers.models import ContentLike, VendorContents
+from .models import ContentView, ProductView
+
+
+PRODUCT = 'product'
+CONTENT = 'content'
+
+# kind -> (analytics model, values for one (item_id, viewed_at, view_duration, is_video) entry)
+_SOURCES = {
+    PRODUCT: (ProductView, ('product', 'viewed_at', 'view_duration')),
+    CONTENT: (ContentView, ('content', 'viewed_at', 'view_duration', 'content__video')),
+}
+
+
+def _history_key(kind, user_id):
+    return f"history:{kind}:{user_id}"
+
+
+def _backfill(kind, user_id):
+    model, fields = _SOURCES[kind]
+    rows = model.objects.filter(user_id=user_id).order_by('-viewed_at', '-id').values_list(*fields)
+    return [
+        (item_id, viewed_at, duration, bool(video and video[0]))
+        for item_id, viewed_at, duration, *video in rows[:settings.VIEW_HISTORY_SIZE]
+    ]
+
+
+def recent_views(kind, user_id):
+    """The user's history for `kind`, newest first, refilled from the database on a cache miss."""
+    key = _history_key(kind, user_id)
+    entries = cache.get(key)
+    if entries is None:
+        entries = _backfill(kind, user_id)
+        cache.set(key, entries, settings.VIEW_HISTORY_TTL)
+    return entries
+
+
+def push_views(kind, user_id, views):
+    """
+    Move each viewed item to the front of the user's history, in order, so
+    the last of `views` ends up newest. `views` holds (item_id,
+    view_duration, is_video) tuples; the oldest entries past the limit drop off.
+    """
+    if not views:
+        return
+    now = timezone.now()
+    seen = set()
+    entries = []
+    for item_id, duration, is_video in reversed(views):
+        if item_id not in seen:
+            seen.add(item_id)
+            entries.append((item_id, now, duration, is_video))
+    entries += [entry for entry in recent_views(kind, user_id) if entry[0] not in seen]
+    cache.set(_history_key(kind, user_id), entries[:settings.VIEW_HISTORY_SIZE], settings.VIEW_HISTORY_TTL)
+
+
+def push_view(kind, user_id, item_id, view_duration=0, is_video=False):
+    push_views(kind, user_id, [(item_id, view_duration, is_video)])
+
+
+def hydrate_contents(content_ids, user):
+    """VendorContents for `content_ids` in one query, keyed by id, with `liked_by_user` annotated."""
+    contents = VendorContents.objects.filter(id__in=content_ids).annotate(
+        liked_by_user=Exists(ContentLike.objects.filter(user=user, content=OuterRef('pk')))
+    )
+    return {content.id: content for content in contents}
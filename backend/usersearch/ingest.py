@@ -0,0 +1,103 @@
+"""
+Batched view tracking.
+
+Clients collect the products and contents a user looked at (with how long
+they stayed) and post them together, instead of one tracking request per
+item. A batch is validated as a whole, checked against the catalog with one
+query per kind and written with one upsert per kind in a single
+transaction; repeats of an item, within the batch or across batches, fold
+into the user's existing row.
+
+Batches can also be sent with `navigator.sendBeacon` when the page is
+closed. A beacon cannot set an Authorization header and is sent as
+text/plain to avoid a CORS preflight, so the endpoint also parses text/plain
+bodies as JSON and accepts the access token as a `token` field in the body.
+"""
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from customers.models import VendorContents
+from Products_app.models import Product
+from Pymarket.db import upsert
+from .history import CONTENT, PRODUCT, push_views
+from .models import ContentView, ProductView
+
+
+class PlainTextJSONParser(JSONParser):
+    """JSON sent as text/plain, as `navigator.sendBeacon` does for string bodies."""
+    media_type = 'text/plain'
+
+
+class BodyTokenJWTAuthentication(JWTAuthentication):
+    """JWT from the Authorization header or, failing that, a `token` field in the body."""
+
+    def authenticate(self, request):
+        if self.get_header(request) is not None:
+            return super().authenticate(request)
+        token = request.data.get('token') if isinstance(request.data, dict) else None
+        if not token:
+            return None
+        validated = self.get_validated_token(token)
+        return self.get_user(validated), validated
+
+
+def _latest(events, kind):
+    """{item_id: duration} for one kind, the last event of an item winning, in first-seen order."""
+    durations = {}
+    for event in events:
+        if event['type'] == kind:
+            durations[event['id']] = event['duration']
+    return durations
+
+
+def record_views(user, events):
+    """
+    Record validated view events (dicts with `type`, `id` and `duration`)
+    for `user`. Returns the number of products and contents recorded and
+    the events skipped because their item does not exist.
+    """
+    products = _latest(events, PRODUCT)
+    contents = _latest(events, CONTENT)
+    known_products = set(Product.objects.filter(id__in=products).values_list('id', flat=True))
+    content_videos = dict(VendorContents.objects.filter(id__in=contents).values_list('id', 'video'))
+    now = timezone.now()
+
+    with transaction.atomic():
+        upsert(
+            ProductView,
+            [
+                {'user': user.pk, 'product': pk, 'viewed_at': now, 'view_duration': duration}
+                for pk, duration in products.items() if pk in known_products
+            ],
+            unique_fields=('user', 'product'),
+            update_fields=('viewed_at', 'view_duration'),
+        )
+        upsert(
+            ContentView,
+            [
+                {'user': user.pk, 'content': pk, 'viewed_at': now, 'view_duration': duration}
+                for pk, duration in contents.items() if pk in content_videos
+            ],
+            unique_fields=('user', 'content'),
+            update_fields=('viewed_at', 'view_duration'),
+        )
+
+    push_views(PRODUCT, user.pk, [
+        (event['id'], event['duration'], False)
+        for event in events if event['type'] == PRODUCT and event['id'] in known_products
+    ])
+    push_views(CONTENT, user.pk, [
+        (event['id'], event['duration'], bool(content_videos[event['id']]))
+        for event in events if event['type'] == CONTENT and event['id'] in content_videos
+    ])
+
+    return {
+        'products': len(known_products),
+        'contents': len(content_videos),
+        'skipped': [
+            event for event in events
+            if event['id'] not in (known_products if event['type'] == PRODUCT else content_videos)
+        ],
+    }
@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from usersearch.fuzzy import TrigramIndex
+
+
+BRANDS = ["Apple", "Samsung", "Nike", "Adidas", "Tecno", "Infinix", "HP", "Dell", "Puma", "Oraimo"]
+ITEMS = [
+    "iPhone", "Galaxy", "sneakers", "hoodie", "laptop", "charger", "earbuds", "backpack",
+    "textbook", "calculator", "mattress", "kettle", "lamp", "jersey", "powerbank", "sandals",
+]
+ADJECTIVES = ["black", "white", "used", "new", "slim", "pro", "mini", "classic", "wireless", "leather"]
+TYPOS = ["ipone", "snekers", "lapptop", "chargr", "earbud", "bakpack", "kettel", "powrbank", "hoody", "calculater"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark the in-process trigram fuzzy search on a synthetic catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=500)
+        parser.add_argument("--budget-ms", type=float, default=25.0, help="p95 latency budget per query.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options["seed"])
+        n = options["products"]
+        names = [
+            f"{rng.choice(BRANDS)} {rng.choice(ADJECTIVES)} {rng.choice(ITEMS)} {rng.integers(1, 100)}"
+            for _ in range(n)
+        ]
+
+        index = TrigramIndex()
+        start = time.perf_counter()
+        index._build(list(enumerate(names, start=1)))
+        index.loaded = True
+        build = time.perf_counter() - start
+
+        timings = []
+        for query in rng.choice(TYPOS, size=options["queries"]):
+            start = time.perf_counter()
+            index.search(str(query), limit=20)
+            timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000
+        p50, p95 = np.percentile(timings, [50, 95])
+
+        self.stdout.write(f"{n} products, index built in {build:.2f} s ({index.postings.nbytes / 2**20:.1f} MB postings)")
+        self.stdout.write(f"query p50 {p50:.2f} ms, p95 {p95:.2f} ms, max {timings.max():.2f} ms")
+        verdict = "within" if p95 <= options["budget_ms"] else "OVER"
+        self.stdout.write(f"p95 {verdict} the {options['budget_ms']:.0f} ms budget")
@@ -0,0 +1,67 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from customers.models import VendorContents
+from Products_app.models import Product
+from Pymarket.bench import scratch_database
+from usersearch.ingest import record_views
+from usersearch.models import ContentView, ProductView
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = "Measure view tracking throughput, one event per call against batched ingestion."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--products", type=int, default=500)
+        parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 10, 50, 200])
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            users, events = self.seed(options["users"], options["products"], options["events"])
+
+            self.stdout.write(f"{options['events']} view events from {len(users)} users")
+            self.stdout.write(f"{'batch size':>10} {'seconds':>9} {'events/s':>10}")
+            for size in options["batch_sizes"]:
+                ProductView.objects.all().delete()
+                ContentView.objects.all().delete()
+                cache.clear()
+                start = time.perf_counter()
+                for offset in range(0, len(events), size):
+                    # a batch comes from one user's session, so rotate users per batch
+                    record_views(users[(offset // size) % len(users)], events[offset:offset + size])
+                seconds = time.perf_counter() - start
+                self.stdout.write(f"{size:>10} {seconds:>9.3f} {len(events) / seconds:>10.0f}")
+
+    def seed(self, users, products, events):
+        vendor = User.objects.create(username="vendor", email="vendor@example.com", role="vendor")
+        buyers = User.objects.bulk_create(
+            User(username=f"buyer{i}", email=f"buyer{i}@example.com", role="buyer") for i in range(users)
+        )
+        product_ids = [
+            product.pk for product in Product.objects.bulk_create(
+                Product(
+                    vendor_id=vendor, product_name=f"Product {i}", description="Synthetic benchmark product",
+                    price=1000, quantity=10, category=f"Category {i % 12}", image_url=[],
+                )
+                for i in range(products)
+            )
+        ]
+        content_ids = [
+            content.pk for content in VendorContents.objects.bulk_create(
+                VendorContents(user=vendor, video=f"https://example.com/{i}.mp4") for i in range(products // 5)
+            )
+        ]
+        stream = [
+            {"type": "content", "id": content_ids[i % len(content_ids)], "duration": i % 30}
+            if i % 5 == 0 else
+            {"type": "product", "id": product_ids[(i * 7) % len(product_ids)], "duration": i % 30}
+            for i in range(events)
+        ]
+        return buyers, stream
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from usersearch.facets import rebuild_facet_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute the precomputed search facet counts from the product catalog."
+
+    def handle(self, *args, **options):
+        cells = rebuild_facet_counts()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {cells} facet cells"))
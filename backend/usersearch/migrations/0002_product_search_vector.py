@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+def add_search_vector(apps, schema_editor):
+    # Postgres only; other databases search with the in-process index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('Products_app', 'Product')._meta.db_table)
+    schema_editor.execute(f"""
+        ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english'::regconfig, coalesce(product_name, '')), 'A') ||
+            setweight(to_tsvector('english'::regconfig, coalesce(category, '')), 'B') ||
+            setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'C')
+        ) STORED
+    """)
+    schema_editor.execute(f"CREATE INDEX product_search_vector_gin ON {table} USING GIN (search_vector)")
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('Products_app', 'Product')._meta.db_table)
+    schema_editor.execute("DROP INDEX IF EXISTS product_search_vector_gin")
+    schema_editor.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usersearch', '0001_initial'),
+        ('Products_app', '0008_merge_0004_productview_0007_productreviews_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+
+
+def add_trigram_index(apps, schema_editor):
+    # Postgres only; other databases use the in-process trigram index
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = schema_editor.quote_name(apps.get_model('Products_app', 'Product')._meta.db_table)
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    schema_editor.execute(
+        f"CREATE INDEX product_name_trgm ON {table} USING GIN (lower(product_name) gin_trgm_ops)"
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS product_name_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usersearch', '0002_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
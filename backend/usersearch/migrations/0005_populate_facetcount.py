@@ -0,0 +1,55 @@
+from collections import Counter
+from decimal import Decimal
+
+from django.db import migrations
+
+
+# The price bands of usersearch.facets as of this migration, copied so later
+# changes there cannot alter what it computes.
+PRICE_BANDS = (
+    ('under-1k', 1000),
+    ('1k-5k', 5000),
+    ('5k-20k', 20000),
+    ('20k-100k', 100000),
+    ('100k-plus', None),
+)
+
+
+def price_band(price):
+    price = Decimal(str(price or 0))
+    for name, high in PRICE_BANDS:
+        if high is None or price < high:
+            return name
+    return PRICE_BANDS[-1][0]
+
+
+def populate(apps, schema_editor):
+    Product = apps.get_model('Products_app', 'Product')
+    FacetCount = apps.get_model('usersearch', 'FacetCount')
+    rows = Product.objects.values_list('category', 'price', 'quantity', 'vendor_id__institute')
+    counts = Counter(
+        (category, price_band(price), institute or '', bool(quantity and quantity > 0))
+        for category, price, quantity, institute in rows.iterator(chunk_size=2000)
+    )
+    FacetCount.objects.bulk_create(
+        [
+            FacetCount(category=category, price_band=band, institute=institute, in_stock=in_stock, count=n)
+            for (category, band, institute, in_stock), n in counts.items()
+        ],
+        batch_size=500,
+    )
+
+
+def clear(apps, schema_editor):
+    apps.get_model('usersearch', 'FacetCount').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usersearch', '0004_facetcount'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, clear),
+    ]
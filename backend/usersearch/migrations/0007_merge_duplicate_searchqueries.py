@@ -0,0 +1,47 @@
+import hashlib
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+# Copies of usersearch.queries.normalize_query and query_hash as of this
+# migration, so later changes there cannot alter what it computes.
+_space_re = re.compile(r'\s+')
+
+
+def normalize_query(text):
+    return _space_re.sub(' ', unicodedata.normalize('NFKC', text or '').casefold()).strip()
+
+
+def query_hash(normalized):
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+def merge_duplicates(apps, schema_editor):
+    """Hash every query and fold repeats per user into their newest row."""
+    SearchQuery = apps.get_model('usersearch', 'SearchQuery')
+    kept = {}
+    duplicates = []
+    for row in SearchQuery.objects.order_by('-searched_at', '-id').iterator(chunk_size=2000):
+        key = (row.user_id, query_hash(normalize_query(row.query)))
+        if key in kept:
+            kept[key].count += row.count
+            duplicates.append(row.pk)
+        else:
+            row.query_hash = key[1]
+            kept[key] = row
+    SearchQuery.objects.bulk_update(kept.values(), ['query_hash', 'count'], batch_size=500)
+    for start in range(0, len(duplicates), 500):
+        SearchQuery.objects.filter(pk__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usersearch', '0006_searchquery_count_searchquery_query_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
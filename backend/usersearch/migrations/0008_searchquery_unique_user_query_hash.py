@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usersearch', '0007_merge_duplicate_searchqueries'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='searchquery',
+            constraint=models.UniqueConstraint(fields=('user', 'query_hash'), name='unique_user_query_hash'),
+        ),
+    ]
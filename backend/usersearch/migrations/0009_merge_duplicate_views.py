@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def merge_duplicates(apps, schema_editor):
+    """Keep only the newest row per user and item of each view table."""
+    for model_name, field in (('ProductView', 'product_id'), ('ContentView', 'content_id')):
+        model = apps.get_model('usersearch', model_name)
+        seen = set()
+        duplicates = []
+        rows = model.objects.order_by('-viewed_at', '-id').values_list('id', 'user_id', field)
+        for pk, user_id, item_id in rows.iterator(chunk_size=2000):
+            if (user_id, item_id) in seen:
+                duplicates.append(pk)
+            else:
+                seen.add((user_id, item_id))
+        for start in range(0, len(duplicates), 500):
+            model.objects.filter(pk__in=duplicates[start:start + 500]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usersearch', '0008_searchquery_unique_user_query_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
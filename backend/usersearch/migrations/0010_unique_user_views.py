@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usersearch', '0009_merge_duplicate_views'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='productview',
+            constraint=models.UniqueConstraint(fields=('user', 'product'), name='unique_user_product_view'),
+        ),
+        migrations.AddConstraint(
+            model_name='contentview',
+            constraint=models.UniqueConstraint(fields=('user', 'content'), name='unique_user_content_view'),
+        ),
+    ]
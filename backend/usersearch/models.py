@@ -7,6 +7,10 @@ User = settings.AUTH_USER_MODEL
 
 
 class ProductView(models.Model):
+    """
+    One row per user and product; a repeat view moves `viewed_at` and
+    overwrites `view_duration` (see `ingest.record_views`).
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='product_views')
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='user_views')
     viewed_at = models.DateTimeField(auto_now_add=True)
@@ -17,12 +21,19 @@ class ProductView(models.Model):
         indexes = [
             models.Index(fields=['user', '-viewed_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'product'], name='unique_user_product_view'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} viewed {self.product.product_name}"
 
 
 class ContentView(models.Model):
+    """
+    One row per user and content; a repeat view moves `viewed_at` and
+    overwrites `view_duration` (see `ingest.record_views`).
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='content_views')
     content = models.ForeignKey(VendorContents, on_delete=models.CASCADE, related_name='user_views')
     viewed_at = models.DateTimeField(auto_now_add=True)
@@ -33,19 +44,74 @@ class ContentView(models.Model):
         indexes = [
             models.Index(fields=['user', '-viewed_at']),
         ]
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'content'], name='unique_user_content_view'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} viewed content by {self.content.user.email}"
 
 
 class SearchQuery(models.Model):
+    """
+    One row per user and normalized query (see `queries.normalize_query`);
+    repeats bump `count` and `searched_at` instead of adding rows.
+    """
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_queries')
     query = models.CharField(max_length=255)
+    query_hash = models.CharField(max_length=64)
+    count = models.PositiveIntegerField(default=1)
     searched_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-searched_at']
         verbose_name_plural = "Search Queries"
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'query_hash'], name='unique_user_query_hash'),
+        ]
     
     def __str__(self):
         return f"{self.user.email} searched '{self.query}'"
+
+
+class FacetCount(models.Model):
+    """
+    Number of products in one (category, price band, institute, stock) cell.
+    Facet counts for any filter combination are sums over these cells, so
+    they never need a GROUP BY over the catalog. Maintained by the receivers
+    in `signals.py`; `manage.py rebuild_facets` recomputes it from scratch.
+    """
+    category = models.CharField(max_length=255)
+    price_band = models.CharField(max_length=20)
+    institute = models.CharField(max_length=255, blank=True, default='')
+    in_stock = models.BooleanField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['category', 'price_band', 'institute', 'in_stock'], name='unique_facet_cell'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.category}/{self.price_band}/{self.institute}/{self.in_stock}: {self.count}"
+
+
+class TrendingSearch(models.Model):
+    """
+    Hourly search counts for the queries the trending sketch keeps, so the
+    rolling window survives restarts. Written by `queries.flush_searches`.
+    """
+    bucket = models.DateTimeField()
+    query_hash = models.CharField(max_length=64)
+    query = models.CharField(max_length=255)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['bucket', 'query_hash'], name='unique_trending_bucket_query'),
+        ]
+
+    def __str__(self):
+        return f"{self.query} x{self.count} @ {self.bucket:%Y-%m-%d %H:00}"
@@ -0,0 +1,16 @@
+from Products_app.pagination import FeedCursorPagination
+
+
+class SearchCursorPagination(FeedCursorPagination):
+    """
+    Signed offset cursors over a ranked list of search results. The seed and
+    snapshot slots of the feed cursor are unused; search rankings are
+    deterministic.
+    """
+    salt = 'search.products.cursor'
+
+    def decode_offset(self, request):
+        return self.decode_cursor(request)[2]
+
+    def paginate_ids(self, ranked_ids, request, offset):
+        return super().paginate_ids(ranked_ids, request, 0, None, offset)
@@ -0,0 +1,215 @@
+"""
+Saved searches and trending searches.
+
+Queries are normalized (Unicode NFKC, case folded, whitespace collapsed)
+and hashed, so "Laptop  bags" and "laptop bags" are one search. A user's
+repeats are folded into their SearchQuery row by a single upsert.
+
+Trending counts never touch SearchQuery. Each search is buffered, and the
+background flush feeds it into `trending`: one space-saving sketch per
+hour over a rolling window. A sketch tracks at most
+SEARCH_TRENDING_CAPACITY queries, so memory stays flat however long the tail of one-off searches
+grows. The flush also adds the counts of tracked queries to TrendingSearch,
+which is how a restarted process gets its window back. Each flush also
+bumps a shared version (see `versions.py`), so the other workers reload
+their window from TrendingSearch on their next read and rank every
+worker's searches, not only the ones they served.
+"""
+import hashlib
+import re
+import threading
+import unicodedata
+from collections import Counter, deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from Pymarket.background import BackgroundBuffer
+from Pymarket.db import upsert
+from .models import SearchQuery, TrendingSearch
+from .versions import SharedVersion
+
+_space_re = re.compile(r'\s+')
+
+
+def normalize_query(text):
+    return _space_re.sub(' ', unicodedata.normalize('NFKC', text or '').casefold()).strip()
+
+
+def query_hash(normalized):
+    return hashlib.sha256(normalized.encode()).hexdigest()
+
+
+class SpaceSaving:
+    """
+    Space-saving heavy hitters: at most `capacity` counters. A new item
+    takes over the smallest counter, inheriting its count as `error`, so
+    every count is an overestimate by at most `error` and any item seen
+    more than total/capacity times is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counters = {}
+
+    def add(self, item, label, n=1):
+        counter = self.counters.get(item)
+        if counter is None:
+            if len(self.counters) < self.capacity:
+                counter = self.counters[item] = [0, 0, label]
+            else:
+                smallest = min(self.counters, key=lambda key: self.counters[key][0])
+                floor = self.counters.pop(smallest)[0]
+                counter = self.counters[item] = [floor, floor, label]
+        counter[0] += n
+        counter[2] = label
+        return counter[0]
+
+    def __contains__(self, item):
+        return item in self.counters
+
+
+class TrendingSearches:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = SharedVersion('trending')
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.loaded = False
+            self.version.seen = None
+            self.buckets = deque()
+            self.top = []
+
+    @staticmethod
+    def bucket_for(moment):
+        return moment.replace(minute=0, second=0, microsecond=0)
+
+    def window_start(self, now=None):
+        now = now or timezone.now()
+        return self.bucket_for(now) - timedelta(hours=settings.SEARCH_TRENDING_WINDOW_HOURS - 1)
+
+    def _sketch(self, bucket):
+        for start, sketch in reversed(self.buckets):
+            if start == bucket:
+                return sketch
+        sketch = SpaceSaving(settings.SEARCH_TRENDING_CAPACITY)
+        self.buckets.append((bucket, sketch))
+        self.buckets = deque(sorted(self.buckets, key=lambda item: item[0]))
+        return sketch
+
+    def _expire(self, now=None):
+        start = self.window_start(now)
+        while self.buckets and self.buckets[0][0] < start:
+            self.buckets.popleft()
+
+    def _rank(self):
+        totals = Counter()
+        labels = {}
+        for _, sketch in self.buckets:
+            for item, (count, _, label) in sketch.counters.items():
+                totals[item] += count
+                labels[item] = label
+        self.top = [{'query': labels[item], 'count': count} for item, count in totals.most_common(50)]
+
+    def ensure_loaded(self):
+        if self.loaded and self.version.is_current():
+            return
+        rows = TrendingSearch.objects.filter(bucket__gte=self.window_start()).values_list(
+            'bucket', 'query_hash', 'query', 'count'
+        )
+        with self.lock:
+            version = self.version.current()
+            if self.loaded and version == self.version.seen:
+                return
+            self.buckets = deque()
+            for bucket, digest, query, count in rows:
+                self._sketch(bucket).add(digest, query, count)
+            self._expire()
+            self._rank()
+            self.version.seen = version
+            self.loaded = True
+
+    def add(self, events):
+        """
+        Count (hash, query, searched_at) events. Returns {(bucket, hash):
+        (query, n)} for the events whose query the sketches still track.
+        """
+        batch = Counter()
+        labels = {}
+        for digest, query, moment in events:
+            key = (self.bucket_for(moment), digest)
+            batch[key] += 1
+            labels[key] = query
+        with self.lock:
+            for (bucket, digest), n in batch.items():
+                self._sketch(bucket).add(digest, labels[bucket, digest], n)
+            # queries evicted by later ones in the batch are not worth a row
+            tracked = {
+                (bucket, digest): (labels[bucket, digest], n)
+                for (bucket, digest), n in batch.items()
+                if digest in self._sketch(bucket)
+            }
+            self._expire()
+            self._rank()
+        return tracked
+
+    def trending(self, limit=10):
+        self.ensure_loaded()
+        return self.top[:limit]
+
+
+trending = TrendingSearches()
+
+
+def flush_searches(events):
+    """Feed a batch of (hash, query, searched_at) events to the sketches and persist the tracked counts."""
+    trending.ensure_loaded()
+    tracked = trending.add(events)
+    upsert(
+        TrendingSearch,
+        [
+            {'bucket': bucket, 'query_hash': digest, 'query': query[:255], 'count': n}
+            for (bucket, digest), (query, n) in tracked.items()
+        ],
+        unique_fields=('bucket', 'query_hash'),
+        increment_fields=('count',),
+        update_fields=('query',),
+    )
+    TrendingSearch.objects.filter(bucket__lt=trending.window_start()).delete()
+    trending.version.bump()
+
+
+search_buffer = BackgroundBuffer(
+    flush_searches,
+    interval=settings.SEARCH_TRENDING_FLUSH_INTERVAL,
+    name="search-queries",
+)
+
+
+def record_search(user, text):
+    """
+    Save a search for `user` with one upsert and count it towards trending.
+    Returns the user's SearchQuery row, or None for an empty query.
+    """
+    normalized = normalize_query(text)
+    if not normalized:
+        return None
+    digest = query_hash(normalized)
+    now = timezone.now()
+    display = ' '.join(text.split())[:255]
+    upsert(
+        SearchQuery,
+        [{'user': user.pk, 'query': display, 'query_hash': digest, 'count': 1, 'searched_at': now}],
+        unique_fields=('user', 'query_hash'),
+        increment_fields=('count',),
+        update_fields=('query', 'searched_at'),
+    )
+    event = (digest, display, now)
+    if settings.SEARCH_TRENDING_FLUSH_INTERVAL <= 0:
+        flush_searches([event])
+    else:
+        search_buffer.add(event)
+    return SearchQuery.objects.get(user=user, query_hash=digest)
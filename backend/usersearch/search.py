@@ -0,0 +1,194 @@
+"""
+Full-text product search.
+
+On Postgres products carry a generated, weighted `search_vector` tsvector
+column with a GIN index (see migration 0002), and results are ranked with
+ts_rank. Other databases (SQLite in dev and tests) use `ProductIndex`, an
+in-process inverted index with the same weighting, built on first use and
+kept current by the receivers in `signals.py`, and rebuilt when another
+process writes a product (see `versions.py`).
+
+Either way the last query term matches as a prefix, so the search box gets
+results while a word is still being typed, and every term must match. A
+query that matches nothing falls back to trigram fuzzy matching on product
+names (`fuzzy.py`), so misspellings still find something.
+"""
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.db import connection
+
+from Products_app.models import Product
+from .fuzzy import fuzzy_search_products
+from .versions import SharedVersion
+
+
+# Ranked result lists are cut off here; nobody pages past it.
+MAX_RESULTS = 500
+# Field weights, matching ts_rank's defaults for the A/B/C labels the
+# Postgres column gives name, category and description.
+FIELD_WEIGHTS = (('product_name', 1.0), ('category', 0.4), ('description', 0.2))
+STOPWORDS = frozenset('a an and are as at be by for from in is it of on or the to with'.split())
+
+_token_re = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    return [token for token in _token_re.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+def stem(token):
+    """Fold plural endings, roughly as the Postgres english stemmer does."""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith(('sses', 'shes', 'ches', 'xes', 'zes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us')):
+        return token[:-1]
+    return token
+
+
+class ProductIndex:
+    """
+    Inverted index over product name, category and description.
+
+    `postings` maps a stemmed term to {product_id: weight}; `documents`
+    remembers each product's terms so updates and deletes touch only its own
+    postings. Prefix lookups bisect a sorted copy of the vocabulary, rebuilt
+    lazily after writes add new terms.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = SharedVersion('fulltext')
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.loaded = False
+            self.version.seen = None
+            self.postings = defaultdict(dict)
+            self.documents = {}
+            self._vocabulary = None
+
+    def _ensure_loaded(self):
+        if self.loaded and self.version.is_current():
+            return
+        with self.lock:
+            version = self.version.current()
+            if self.loaded and version == self.version.seen:
+                return
+            self.reset()
+            rows = Product.objects.values_list('id', *(field for field, _ in FIELD_WEIGHTS))
+            for row in rows.iterator(chunk_size=2000):
+                self._add(row[0], row[1:])
+            self.version.seen = version
+            self.loaded = True
+
+    def _add(self, product_id, texts):
+        weights = {}
+        for text, (_, weight) in zip(texts, FIELD_WEIGHTS):
+            for token in tokenize(text):
+                term = stem(token)
+                weights[term] = weights.get(term, 0.0) + weight
+        for term, weight in weights.items():
+            if term not in self.postings:
+                self._vocabulary = None
+            self.postings[term][product_id] = weight
+        self.documents[product_id] = tuple(weights)
+
+    def _remove(self, product_id):
+        for term in self.documents.pop(product_id, ()):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(product_id, None)
+                if not posting:
+                    del self.postings[term]
+                    self._vocabulary = None
+
+    def update(self, product):
+        with self.lock:
+            if self.loaded:
+                self._remove(product.pk)
+                self._add(product.pk, [getattr(product, field) for field, _ in FIELD_WEIGHTS])
+        self.version.bump()
+
+    def remove(self, product_id):
+        with self.lock:
+            if self.loaded:
+                self._remove(product_id)
+        self.version.bump()
+
+    def _prefix_matches(self, prefix):
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        vocabulary = self._vocabulary
+        matches = {}
+        i = bisect_left(vocabulary, prefix)
+        while i < len(vocabulary) and vocabulary[i].startswith(prefix):
+            for product_id, weight in self.postings[vocabulary[i]].items():
+                if weight > matches.get(product_id, 0.0):
+                    matches[product_id] = weight
+            i += 1
+        return matches
+
+    def search(self, query, limit=MAX_RESULTS):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        self._ensure_loaded()
+        with self.lock:
+            scores = None
+            for i, token in enumerate(tokens):
+                last = i == len(tokens) - 1
+                matches = self._prefix_matches(stem(token)) if last else dict(self.postings.get(stem(token), {}))
+                if scores is None:
+                    scores = matches
+                else:
+                    scores = {pk: score + matches[pk] for pk, score in scores.items() if pk in matches}
+                if not scores:
+                    return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [pk for pk, _ in ranked[:limit]]
+
+
+product_index = ProductIndex()
+
+
+def _tsquery(query):
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    # tokens are plain [a-z0-9]+ so nothing here is tsquery syntax
+    return ' & '.join(tokens[:-1] + [tokens[-1] + ':*'])
+
+
+def _postgres_search(query, limit):
+    tsquery = _tsquery(query)
+    if tsquery is None:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'''
+            SELECT id FROM {connection.ops.quote_name(Product._meta.db_table)},
+                 to_tsquery('english', %s) query
+            WHERE search_vector @@ query
+            ORDER BY ts_rank(search_vector, query) DESC, id DESC
+            LIMIT %s
+            ''',
+            [tsquery, limit],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_products(query, limit=MAX_RESULTS, fuzzy=True):
+    """Return IDs of products matching `query`, best match first."""
+    if connection.vendor == 'postgresql':
+        product_ids = _postgres_search(query, limit)
+    else:
+        product_ids = product_index.search(query, limit)
+    if not product_ids and fuzzy:
+        product_ids = fuzzy_search_products(query, limit)
+    return product_ids
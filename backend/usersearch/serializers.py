@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import ProductView, ContentView, SearchQuery
 from Products_app.serializers import ProductSerializer
@@ -25,5 +26,18 @@ class ContentViewSerializer(serializers.ModelSerializer):
 class SearchQuerySerializer(serializers.ModelSerializer):
     class Meta:
         model = SearchQuery
-        fields = ['id', 'user', 'query', 'searched_at']
-        read_only_fields = ['user', 'searched_at']
\ No newline at end of file
+        fields = ['id', 'user', 'query', 'count', 'searched_at']
+        read_only_fields = ['user', 'count', 'searched_at']
+
+
+class ViewEventSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=['product', 'content'])
+    id = serializers.IntegerField(min_value=1)
+    duration = serializers.IntegerField(min_value=0, max_value=2**31 - 1, default=0, help_text="Duration in seconds")
+
+
+class ViewEventBatchSerializer(serializers.Serializer):
+    events = serializers.ListField(
+        child=ViewEventSerializer(), allow_empty=False, max_length=settings.VIEW_EVENT_BATCH_LIMIT
+    )
+    token = serializers.CharField(required=False, write_only=True, help_text="Access token, for sendBeacon requests")
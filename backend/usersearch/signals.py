@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from Products_app.models import Product
+from Products_app.signals import stock_changed, views_counted
+from .cache import bump_categories
+from .facets import mark_sold_out, move_product, move_vendor, product_cell, stored_cell
+from .fuzzy import trigram_index
+from .search import product_index
+from .typeahead import typeahead
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    product_index.update(instance)
+    trigram_index.update(instance)
+    typeahead.update_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    product_index.remove(instance.pk)
+    trigram_index.remove(instance.pk)
+    typeahead.remove_product(instance.pk)
+
+
+@receiver(pre_save, sender=Product)
+@receiver(pre_delete, sender=Product)
+def remember_facet_cell(sender, instance, **kwargs):
+    # the stored row, before this write changes it
+    instance._facet_cell = None if instance._state.adding else stored_cell(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+def recount_saved_product(sender, instance, **kwargs):
+    old_cell = getattr(instance, '_facet_cell', None)
+    move_product(old_cell, product_cell(instance))
+    bump_categories([instance.category] + ([old_cell[0]] if old_cell else []))
+
+
+@receiver(post_delete, sender=Product)
+def recount_deleted_product(sender, instance, **kwargs):
+    move_product(getattr(instance, '_facet_cell', None), None)
+    bump_categories([instance.category])
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def remember_institute(sender, instance, update_fields=None, **kwargs):
+    # most user saves (logins, profile edits) leave the institute alone
+    if instance._state.adding or (update_fields is not None and 'institute' not in update_fields):
+        instance._facet_institute = None
+        return
+    instance._facet_institute = (
+        get_user_model().objects.filter(pk=instance.pk).values_list('institute', flat=True).first() or ''
+    )
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def recount_vendor_products(sender, instance, created, **kwargs):
+    old_institute = getattr(instance, '_facet_institute', None)
+    if old_institute is not None:
+        bump_categories(move_vendor(instance.pk, old_institute, instance.institute))
+
+
+@receiver(stock_changed)
+def recount_sold_out(sender, sold_out=(), **kwargs):
+    if sold_out:
+        bump_categories(mark_sold_out(sold_out))
+
+
+@receiver(views_counted)
+def rerank_viewed_products(sender, counts, **kwargs):
+    typeahead.add_views(counts)
@@ -1,3 +1,610 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from customers.models import ContentLike, VendorContents, VendorProfiles
+from Products_app.models import Product
+from Products_app.signals import stock_changed, views_counted
+from .facets import catalog_facets, rebuild_facet_counts
+from .fuzzy import trigram_index, trigrams
+from .models import ContentView, FacetCount, ProductView, SearchQuery, TrendingSearch
+from .queries import SpaceSaving, normalize_query, query_hash, trending
+from .search import product_index, search_products
+from .typeahead import MIN_QUERY_COUNT, typeahead
+
+User = get_user_model()
+
+
+class ProductSearchTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		product_index.reset()
+		trigram_index.reset()
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.sneakers = self._product("Running sneakers", "Shoes", "Light and breathable")
+		self.boots = self._product("Leather boots", "Shoes", "Waterproof hiking boots")
+		self.lamp = self._product("Desk lamp", "Home", "Warm light for reading")
+
+	def _product(self, name, category, description):
+		return Product.objects.create(
+			vendor_id=self.vendor, product_name=name, description=description, price=10, quantity=3, category=category
+		)
+
+	def test_ranks_name_matches_above_description_matches(self):
+		self.assertEqual(search_products("light"), [self.lamp.id, self.sneakers.id])
+		self.assertEqual(search_products("shoe"), [self.boots.id, self.sneakers.id])
+		self.assertEqual(search_products("boots"), [self.boots.id])
+
+	def test_last_term_matches_as_prefix_and_all_terms_must_match(self):
+		self.assertEqual(search_products("sneak"), [self.sneakers.id])
+		self.assertEqual(search_products("leather hik"), [self.boots.id])
+		self.assertEqual(search_products("leather lamp", fuzzy=False), [])
+		self.assertEqual(search_products("the", fuzzy=False), [])
+
+	def test_index_follows_product_writes(self):
+		self.assertEqual(search_products("lamp"), [self.lamp.id])
+
+		self.lamp.product_name = "Floor light"
+		self.lamp.save()
+		self.assertEqual(search_products("lamp"), [])
+		self.assertEqual(search_products("floor"), [self.lamp.id])
+
+		self.boots.delete()
+		self.assertEqual(search_products("leather"), [])
+		kettle = self._product("Electric kettle", "Home", "1.7 litres")
+		self.assertEqual(search_products("kettle"), [kettle.id])
+
+	def test_index_reloads_after_writes_from_other_processes(self):
+		self.assertEqual(search_products("lamp"), [self.lamp.id])
+
+		Product.objects.filter(pk=self.lamp.pk).update(product_name="Floor light")
+		cache.set(product_index.version.key, 1)
+
+		self.assertEqual(search_products("lamp", fuzzy=False), [])
+		self.assertEqual(search_products("floor"), [self.lamp.id])
+
+	def test_search_endpoint_pages_through_ranked_results(self):
+		response = self.client.get("/search/products/", {"q": "shoes", "page_size": 1})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual([item["id"] for item in response.data["results"]], [self.boots.id])
+		second = self.client.get(response.data["next"])
+		self.assertEqual([item["id"] for item in second.data["results"]], [self.sneakers.id])
+		self.assertIsNone(second.data["next"])
+		self.assertEqual(self.client.get("/search/products/", {"q": ""}).data["results"], [])
+
+
+class FuzzySearchTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		product_index.reset()
+		trigram_index.reset()
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.iphone = self._product("Apple iPhone 12")
+		self.sneakers = self._product("Nike sneakers")
+		self.phone_case = self._product("Phone case")
+
+	def _product(self, name):
+		return Product.objects.create(
+			vendor_id=self.vendor, product_name=name, description="desc", price=10, quantity=3, category="Misc"
+		)
+
+	def test_trigrams_are_padded_per_word(self):
+		self.assertEqual(trigrams("Go!"), {"  g", " go", "go "})
+
+	def test_misspelled_queries_fall_back_to_trigram_matches(self):
+		self.assertEqual(search_products("ipone"), [self.iphone.id])
+		self.assertEqual(search_products("snekers"), [self.sneakers.id])
+		self.assertEqual(search_products("zzzz"), [])
+
+		response = self.client.get("/search/products/", {"q": "snekers"})
+		self.assertEqual([item["id"] for item in response.data["results"]], [self.sneakers.id])
+
+	def test_index_reloads_after_writes_from_other_processes(self):
+		self.assertEqual(search_products("ipone"), [self.iphone.id])
+
+		Product.objects.filter(pk=self.iphone.pk).update(product_name="Samsung Galaxy")
+		cache.set(trigram_index.version.key, 1)
+
+		self.assertEqual(trigram_index.search("ipone"), [])
+		self.assertEqual(trigram_index.search("galaxi"), [self.iphone.id])
+
+	def test_writes_land_in_the_tail_and_survive_compaction(self):
+		self.assertEqual(search_products("ipone"), [self.iphone.id])
+
+		self.iphone.product_name = "Samsung Galaxy"
+		self.iphone.save()
+		self.phone_case.delete()
+		mouse = self._product("Wireless mouse")
+		self.assertEqual(search_products("ipone"), [])
+		self.assertEqual(search_products("galaxi"), [self.iphone.id])
+		self.assertEqual(search_products("mous"), [mouse.id])
+
+		trigram_index._compact()
+		self.assertEqual(trigram_index.tail, {})
+		self.assertEqual(search_products("galaxi"), [self.iphone.id])
+		self.assertEqual(search_products("mous"), [mouse.id])
+		self.assertEqual(search_products("phne case"), [])
+
+
+class SearchSuggestionsTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		product_index.reset()
+		trigram_index.reset()
+		self.client = APIClient()
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.client.force_authenticate(self.buyer)
+
+	def _vendor(self, i, products):
+		vendor = User.objects.create_user(
+			username=f"vendor{i}", email=f"vendor{i}@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		VendorProfiles.objects.create(user=vendor)
+		items = [
+			Product.objects.create(
+				vendor_id=vendor, product_name=f"Bag {i}-{n}", description="desc", price=10, quantity=3, category="Bags"
+			)
+			for n in range(products)
+		]
+		ProductView.objects.create(user=self.buyer, product=items[0])
+		return vendor
+
+	def _suggestions(self, queries, **params):
+		with self.assertNumQueries(queries):
+			response = self.client.get("/search/suggestions/", params)
+		self.assertEqual(response.status_code, 200)
+		return response.data
+
+	def test_query_count_does_not_grow_with_results(self):
+		self._vendor(0, 2)
+		search_products("bag")  # load the in-process index outside the count
+		# a cold search result costs one extra query to stamp its categories
+		self.assertEqual(len(self._suggestions(4, q="bag")["suggested_products"]), 2)
+		self.assertEqual(len(self._suggestions(3, q="bag")["suggested_products"]), 2)
+		self.assertEqual(len(self._suggestions(4)["suggested_vendors"]), 1)
+
+		for i in range(1, 6):
+			self._vendor(i, 3)
+		self._suggestions(4, q="bag")
+		data = self._suggestions(3, q="bag")
+		self.assertEqual(len(data["suggested_vendors"]), 6)
+		self.assertEqual(len(data["suggested_products"]), 15)
+		self.assertEqual(len(self._suggestions(4)["suggested_vendors"]), 6)
+
+	def test_vendors_carry_product_totals(self):
+		vendor = self._vendor(0, 3)
+
+		data = self._suggestions(4)
+
+		self.assertEqual(data["suggested_vendors"][0]["id"], vendor.id)
+		self.assertEqual(data["suggested_vendors"][0]["total_products"], 3)
+		self.assertEqual(data["suggested_products"][0]["vendor_name"], "vendor0")
+
+
+class FacetedSearchTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		product_index.reset()
+		trigram_index.reset()
+		self.client = APIClient()
+		self.unilag = User.objects.create_user(
+			username="v1", email="v1@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.ui = User.objects.create_user(
+			username="v2", email="v2@example.com", password="pass", role="vendor", institute="UI"
+		)
+		self.sneakers = self._product(self.unilag, "Sneakers", "Shoes", 15000, 2)
+		self.boots = self._product(self.ui, "Boots", "Shoes", 800, 0)
+		self.lamp = self._product(self.ui, "Lamp", "Home", 3000, 5)
+
+	def _product(self, vendor, name, category, price, quantity):
+		return Product.objects.create(
+			vendor_id=vendor, product_name=name, description="desc", price=price, quantity=quantity, category=category
+		)
+
+	def _stored(self):
+		return sorted(
+			FacetCount.objects.filter(count__gt=0).values_list("category", "price_band", "institute", "in_stock", "count")
+		)
+
+	def test_counts_follow_writes_and_match_a_rebuild(self):
+		self.lamp.price = 25000
+		self.lamp.save()
+		self.boots.delete()
+		Product.objects.filter(pk=self.sneakers.id).update(quantity=0)
+		stock_changed.send(sender=Product, product_ids=[self.sneakers.id], sold_out=[self.sneakers.id])
+
+		incremental = self._stored()
+		rebuild_facet_counts()
+		self.assertEqual(incremental, self._stored())
+		self.assertEqual(incremental, [
+			("Home", "20k-100k", "UI", True, 1),
+			("Shoes", "5k-20k", "UNILAG", False, 1),
+		])
+
+	def test_vendor_moving_institute_moves_their_products(self):
+		self.ui.institute = "OAU"
+		self.ui.save()
+		self.unilag.last_login = timezone.now()
+		with self.assertNumQueries(1):
+			self.unilag.save(update_fields=["last_login"])
+
+		incremental = self._stored()
+		rebuild_facet_counts()
+		self.assertEqual(incremental, self._stored())
+		self.assertEqual(incremental, [
+			("Home", "1k-5k", "OAU", True, 1),
+			("Shoes", "5k-20k", "UNILAG", True, 1),
+			("Shoes", "under-1k", "OAU", False, 1),
+		])
+
+	def test_catalog_facets_exclude_their_own_filter(self):
+		with self.assertNumQueries(1):
+			facets = catalog_facets({"category": "Shoes"})
+
+		self.assertEqual(facets["category"], {"Shoes": 2, "Home": 1})
+		self.assertEqual(facets["institute"], {"UNILAG": 1, "UI": 1})
+		self.assertEqual(facets["price_band"], {"5k-20k": 1, "under-1k": 1})
+		self.assertEqual(facets["in_stock"], {"true": 1, "false": 1})
+
+	def test_endpoint_filters_results_and_returns_counts(self):
+		response = self.client.get("/search/facets/", {"category": "Shoes", "in_stock": "true"})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual([item["id"] for item in response.data["results"]], [self.sneakers.id])
+		self.assertEqual(response.data["facets"]["in_stock"], {"true": 1, "false": 1})
+
+		searched = self.client.get("/search/facets/", {"q": "lamp", "institute": "UI"})
+		self.assertEqual([item["id"] for item in searched.data["results"]], [self.lamp.id])
+		self.assertEqual(searched.data["facets"]["category"], {"Home": 1})
+
+		self.assertEqual(self.client.get("/search/facets/", {"price_band": "cheap"}).status_code, 400)
+
+
+class TypeaheadTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		typeahead.reset()
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.sneakers = self._product("Running Sneakers", "Shoes", 5)
+		self.speaker = self._product("Bluetooth speaker", "Electronics", 40)
+
+	def _product(self, name, category, views):
+		return Product.objects.create(
+			vendor_id=self.vendor, product_name=name, description="desc", price=10, quantity=3,
+			category=category, view_count=views,
+		)
+
+	def _suggest(self, prefix):
+		return [item["text"] for item in typeahead.suggest(prefix)]
+
+	def test_matches_any_word_and_ranks_by_views(self):
+		self.assertEqual(self._suggest("s"), ["Bluetooth speaker", "Running Sneakers", "Shoes"])
+		self.assertEqual(self._suggest("SNE"), ["Running Sneakers"])
+		self.assertEqual(self._suggest("x"), [])
+
+	@override_settings(SEARCH_TRENDING_FLUSH_INTERVAL=0)
+	def test_updates_incrementally_without_queries(self):
+		self._suggest("s")
+
+		self.sneakers.product_name = "Suede loafers"
+		self.sneakers.save()
+		views_counted.send(sender=Product, counts={self.sneakers.id: 100})
+		self.speaker.delete()
+		self.client.force_authenticate(self.buyer)
+		for _ in range(MIN_QUERY_COUNT):
+			self.client.post("/search/search/", {"query": "Shoe rack"}, format="json")
+
+		with self.assertNumQueries(0):
+			self.assertEqual(self._suggest("s"), ["Shoes", "Suede loafers", "Shoe rack"])
+		self.assertEqual(self._suggest("sp"), [])
+
+	def test_reloads_after_writes_from_other_processes(self):
+		self._suggest("s")
+		with self.captureOnCommitCallbacks(execute=True):
+			self.sneakers.product_name = "Suede loafers"
+			self.sneakers.save()
+		with self.assertNumQueries(0):
+			self.assertEqual(self._suggest("su"), ["Suede loafers"])
+
+		# another worker renames the speaker: its commit bumps the shared version
+		Product.objects.filter(pk=self.speaker.pk).update(product_name="Soundbar")
+		cache.incr(typeahead.version.key)
+
+		self.assertEqual(self._suggest("so"), ["Soundbar"])
+		self.assertEqual(self._suggest("sp"), [])
+
+	def test_autocomplete_endpoint(self):
+		response = self.client.get("/search/autocomplete/", {"q": "blue"})
+
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.data["suggestions"], [{"text": "Bluetooth speaker", "type": "product"}])
+
+
+@override_settings(SEARCH_TRENDING_FLUSH_INTERVAL=0)
+class SearchQueryTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		trending.reset()
+		self.client = APIClient()
+		self.users = [
+			User.objects.create_user(username=f"u{i}", email=f"u{i}@example.com", password="pass", role="buyer")
+			for i in range(3)
+		]
+
+	def _search(self, user, query):
+		self.client.force_authenticate(user)
+		return self.client.post("/search/search/", {"query": query}, format="json")
+
+	def test_repeats_fold_into_one_row_per_normalized_query(self):
+		self.assertEqual(normalize_query("  Laptop\tBAGS "), "laptop bags")
+		self._search(self.users[0], "Laptop  bags")
+		response = self._search(self.users[0], "laptop BAGS")
+
+		self.assertEqual(response.status_code, 201)
+		self.assertEqual(response.data["count"], 2)
+		self.assertEqual(response.data["query"], "laptop BAGS")
+		self.assertEqual(SearchQuery.objects.count(), 1)
+		self.assertEqual(self._search(self.users[0], "   ").status_code, 400)
+
+	def test_trending_is_served_from_memory_and_survives_a_reload(self):
+		for user in self.users:
+			self._search(user, "Bags")
+		for user in self.users[:2]:
+			self._search(user, "shoes")
+		self._search(self.users[0], "kettle")
+
+		with self.assertNumQueries(0):
+			response = self.client.get("/search/trending/", {"limit": 2})
+		self.assertEqual(response.data["results"], [{"query": "Bags", "count": 3}, {"query": "shoes", "count": 2}])
+
+		self.assertEqual(TrendingSearch.objects.count(), 3)
+		trending.reset()
+		self.assertEqual(trending.trending(3), [
+			{"query": "Bags", "count": 3}, {"query": "shoes", "count": 2}, {"query": "kettle", "count": 1},
+		])
+
+	def test_trending_reloads_after_another_process_flushes(self):
+		self._search(self.users[0], "Bags")
+		self.assertEqual(trending.trending(), [{"query": "Bags", "count": 1}])
+
+		# another worker's flush persists its counts and bumps the shared version
+		TrendingSearch.objects.create(
+			bucket=trending.bucket_for(timezone.now()), query_hash=query_hash("lamps"), query="lamps", count=4
+		)
+		cache.set(trending.version.key, 1)
+
+		self.assertEqual(trending.trending(), [{"query": "lamps", "count": 4}, {"query": "Bags", "count": 1}])
+
+	def test_space_saving_keeps_heavy_hitters_in_bounded_memory(self):
+		sketch = SpaceSaving(capacity=2)
+		for item in ["a", "a", "a", "b", "c", "a", "d"]:
+			sketch.add(item, item)
+
+		self.assertEqual(len(sketch.counters), 2)
+		self.assertIn("a", sketch)
+		self.assertEqual(sketch.counters["a"][0], 4)
+
+
+class SearchCacheTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		product_index.reset()
+		trigram_index.reset()
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.bag = self._product("Tote bag", "Bags")
+		self.lamp = self._product("Desk lamp", "Home")
+
+	def _product(self, name, category):
+		return Product.objects.create(
+			vendor_id=self.vendor, product_name=name, description="desc", price=10, quantity=3, category=category
+		)
+
+	def _ids(self, query, **params):
+		response = self.client.get("/search/products/", {"q": query, **params})
+		return [item["id"] for item in response.data["results"]]
+
+	def test_hits_share_normalized_keys_and_hydrate_with_one_query(self):
+		self.assertEqual(self._ids("Bag"), [self.bag.id])
+
+		with self.assertNumQueries(1):
+			self.assertEqual(self._ids("  bag "), [self.bag.id])
+
+	def test_writes_invalidate_only_their_categories(self):
+		self._ids("bag")
+		self._ids("lamp")
+
+		self.bag.product_name = "Tote bag XL"
+		self.bag.save()
+		with self.assertNumQueries(1):
+			self._ids("lamp")
+		with self.assertNumQueries(2):
+			self.assertEqual(self._ids("bag"), [self.bag.id])
+
+		self.lamp.delete()
+		self.assertEqual(self._ids("lamp"), [])
+
+	def test_facet_results_are_cached_per_filter_set(self):
+		self.client.get("/search/facets/", {"q": "bag", "category": "Bags"})
+
+		with self.assertNumQueries(1):
+			response = self.client.get("/search/facets/", {"q": "bag", "category": "Bags"})
+		self.assertEqual([item["id"] for item in response.data["results"]], [self.bag.id])
+		self.assertEqual(response.data["facets"]["category"], {"Bags": 1})
+		self.assertEqual(self.client.get("/search/facets/", {"q": "bag", "category": "Home"}).data["results"], [])
+
+
+class ViewHistoryTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.client.force_authenticate(self.buyer)
+		self.products = [
+			Product.objects.create(
+				vendor_id=self.vendor, product_name=f"Item {i}", description="desc", price=10, quantity=3, category="Bags"
+			)
+			for i in range(3)
+		]
+		self.video = VendorContents.objects.create(user=self.vendor, video="https://example.com/a.mp4")
+		self.picture = VendorContents.objects.create(user=self.vendor, pictures="https://example.com/a.jpg")
+
+	def _track_product(self, product, duration=5):
+		self.client.post("/search/track/product/", {"product_id": product.id, "view_duration": duration}, format="json")
+
+	def _track_content(self, content):
+		self.client.post("/search/track/content/", {"content_id": content.id}, format="json")
+
+	@override_settings(VIEW_HISTORY_SIZE=2)
+	def test_keeps_last_views_newest_first_without_repeats(self):
+		first, second, third = self.products
+		self._track_product(first)
+		self._track_product(second)
+		self._track_product(first, duration=9)
+		data = self.client.get("/search/history/").data
+		self.assertEqual([view["product"] for view in data["product_views"]], [first.id, second.id])
+		self.assertEqual(data["product_views"][0]["view_duration"], 9)
+		self.assertEqual(data["product_views"][0]["product_details"]["product_name"], "Item 0")
+
+		self._track_product(third)
+		data = self.client.get("/search/history/").data
+		self.assertEqual([view["product"] for view in data["product_views"]], [third.id, first.id])
+		self.assertEqual(data["total_product_views"], 2)
+		self.assertEqual(ProductView.objects.filter(user=self.buyer).count(), 3)
+
+	def test_reads_are_one_batched_query_per_kind(self):
+		for product in self.products:
+			self._track_product(product)
+		self._track_content(self.video)
+		self._track_content(self.picture)
+		ContentLike.objects.create(user=self.buyer, content=self.video)
+
+		with self.assertNumQueries(2):
+			data = self.client.get("/search/history/").data
+		self.assertEqual(data["total_product_views"], 3)
+		self.assertEqual([view["content"] for view in data["content_views"]], [self.picture.id, self.video.id])
+		self.assertTrue(data["content_views"][1]["content_details"]["is_liked_by_user"])
+
+		with self.assertNumQueries(1):
+			data = self.client.get("/search/videos/recent/").data
+		self.assertEqual([view["content"] for view in data["recent_videos"]], [self.video.id])
+		self.assertEqual(data["count"], 1)
+
+	def test_refills_from_analytics_rows_after_cache_loss(self):
+		self._track_product(self.products[1])
+		self._track_content(self.video)
+		cache.clear()
+
+		data = self.client.get("/search/history/").data
+		self.assertEqual([view["product"] for view in data["product_views"]], [self.products[1].id])
+		self.assertEqual(self.client.get("/search/videos/recent/").data["count"], 1)
+
+		self.products[1].delete()
+		self.assertEqual(self.client.get("/search/history/").data["product_views"], [])
+		self.assertEqual(ContentView.objects.count(), 1)
+
+
+class TrackViewBatchTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.vendor = User.objects.create_user(
+			username="vendor", email="vendor@example.com", password="pass", role="vendor", institute="UNILAG"
+		)
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.products = [
+			Product.objects.create(
+				vendor_id=self.vendor, product_name=f"Item {i}", description="desc", price=10, quantity=3, category="Bags"
+			)
+			for i in range(60)
+		]
+		self.video = VendorContents.objects.create(user=self.vendor, video="https://example.com/a.mp4")
+
+	def _post(self, events):
+		self.client.force_authenticate(self.buyer)
+		return self.client.post("/search/track/batch/", {"events": events}, format="json")
+
+	def test_records_batch_and_folds_repeats_into_one_row(self):
+		first, second = self.products[:2]
+		ProductView.objects.create(user=self.buyer, product=second, view_duration=1)
+		response = self._post([
+			{"type": "product", "id": first.id, "duration": 3},
+			{"type": "content", "id": self.video.id, "duration": 12},
+			{"type": "product", "id": second.id, "duration": 4},
+			{"type": "product", "id": 999999, "duration": 2},
+			{"type": "product", "id": first.id, "duration": 8},
+		])
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual((response.data["products"], response.data["contents"]), (2, 1))
+		self.assertEqual([event["id"] for event in response.data["skipped"]], [999999])
+		self.assertEqual(
+			dict(ProductView.objects.filter(user=self.buyer).values_list("product_id", "view_duration")),
+			{first.id: 8, second.id: 4},
+		)
+		self.assertEqual(ContentView.objects.get(user=self.buyer).view_duration, 12)
+
+		history = self.client.get("/search/history/").data
+		self.assertEqual([view["product"] for view in history["product_views"]], [first.id, second.id])
+		self.assertEqual(history["content_views"][0]["content"], self.video.id)
+
+	def test_query_count_does_not_grow_with_batch_size(self):
+		self._post([{"type": "product", "id": self.products[0].id}])  # loads the user's history
+		counts = []
+		for products in (self.products[1:5], self.products[5:60]):
+			with CaptureQueriesContext(connection) as queries:
+				self._post([{"type": "product", "id": product.id, "duration": 1} for product in products])
+			counts.append(len(queries))
+		self.assertEqual(counts[0], counts[1])
+		self.assertEqual(ProductView.objects.count(), 60)
+
+	def test_rejects_invalid_events(self):
+		response = self._post([{"type": "video", "id": self.video.id}])
+		self.assertEqual(response.status_code, 400)
+		self.assertEqual(self._post([]).status_code, 400)
+		self.assertFalse(ContentView.objects.exists())
+
+	def test_accepts_beacon_bodies_with_token(self):
+		body = json.dumps({
+			"token": str(RefreshToken.for_user(self.buyer).access_token),
+			"events": [{"type": "product", "id": self.products[0].id, "duration": 2}],
+		})
+		response = self.client.post("/search/track/batch/", body, content_type="text/plain;charset=UTF-8")
+		self.assertEqual(response.status_code, 200)
+		self.assertTrue(ProductView.objects.filter(user=self.buyer, product=self.products[0]).exists())
+
+		anonymous = json.loads(body)
+		del anonymous["token"]
+		response = self.client.post("/search/track/batch/", json.dumps(anonymous), content_type="text/plain")
+		self.assertEqual(response.status_code, 401)
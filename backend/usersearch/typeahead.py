@@ -0,0 +1,252 @@
+"""
+In-memory typeahead for the search box.
+
+Suggestions are product names, categories and popular past searches, held
+in a character trie. Every word of a suggestion starts a path, so "sne"
+finds "Running sneakers". Each node lazily caches its best TOP_K
+suggestions, built from its children's cached lists; a write clears the
+caches on the changed paths only, so lookups are a walk down the trie plus
+a slice.
+
+Ranking: a product adds 1 + its view_count to its name and to its
+category, and a past search adds how often it was searched once that
+reaches MIN_QUERY_COUNT. The trie is loaded on first use and kept current
+by the receivers in `signals.py` and by `queries.record_search`. Product
+writes served by other processes reach it through a shared version (see
+`versions.py`) that makes it reload; their view counts and searches are
+only picked up by that reload, since bumping on every view would have the
+trie reloading constantly.
+"""
+import re
+import threading
+from heapq import nsmallest
+
+from django.db.models import Max, Sum
+
+from Products_app.models import Product
+from .models import SearchQuery
+from .queries import normalize_query as normalize
+from .versions import SharedVersion
+
+
+TOP_K = 10
+# Paths stop after this many characters; longer prefixes share the node.
+MAX_DEPTH = 24
+MIN_QUERY_COUNT = 3
+MAX_QUERIES = 5000
+
+_word_re = re.compile(r'\w+')
+# suggestion types in the order one is preferred for display
+KIND_ORDER = ('product', 'category', 'query')
+
+
+class _Node:
+    __slots__ = ('children', 'entries', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.entries = set()
+        self.top = None
+
+
+class _Entry:
+    __slots__ = ('text', 'display', 'sources', 'score')
+
+    def __init__(self, text, display):
+        self.text = text
+        self.display = display
+        self.sources = {}
+        self.score = 0
+
+
+class Typeahead:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = SharedVersion('typeahead')
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.loaded = False
+            self.version.seen = None
+            self.root = _Node()
+            self.entries = {}
+            self.products = {}
+            self.query_counts = {}
+
+    def _ensure_loaded(self):
+        if self.loaded and self.version.is_current():
+            return
+        with self.lock:
+            version = self.version.current()
+            if self.loaded and version == self.version.seen:
+                return
+            self.reset()
+            self._load()
+            self.version.seen = version
+            self.loaded = True
+
+    def _load(self):
+        rows = Product.objects.values_list('id', 'product_name', 'category', 'view_count')
+        for pk, name, category, view_count in rows.iterator(chunk_size=2000):
+            self._set_product(pk, name, category, view_count)
+        popular = (
+            SearchQuery.objects.values('query_hash').annotate(n=Sum('count'), label=Max('query'))
+            .filter(n__gte=MIN_QUERY_COUNT).order_by('-n')[:MAX_QUERIES]
+        )
+        for row in popular:
+            self._add_query(row['label'], row['n'])
+
+    # -- trie maintenance (callers hold the lock) --
+
+    def _paths(self, text):
+        for match in _word_re.finditer(text):
+            yield text[match.start():match.start() + MAX_DEPTH]
+
+    def _link(self, entry):
+        for path in self._paths(entry.text):
+            node = self.root
+            node.top = None
+            for char in path:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _Node()
+                node = child
+                node.top = None
+            node.entries.add(entry)
+
+    def _touch(self, entry):
+        for path in self._paths(entry.text):
+            node = self.root
+            node.top = None
+            for char in path:
+                node = node.children.get(char)
+                if node is None:
+                    break
+                node.top = None
+
+    def _unlink(self, entry):
+        for path in self._paths(entry.text):
+            trail = [self.root]
+            for char in path:
+                node = trail[-1].children.get(char)
+                if node is None:
+                    break
+                trail.append(node)
+            else:
+                trail[-1].entries.discard(entry)
+            for node in trail:
+                node.top = None
+            # prune nodes left without entries or children
+            for depth in range(len(trail) - 1, 0, -1):
+                node = trail[depth]
+                if node.entries or node.children:
+                    break
+                del trail[depth - 1].children[path[depth - 1]]
+
+    def _contribute(self, text, display, source, weight):
+        """Set `source`'s weight for suggestion `text`; weight 0 withdraws it."""
+        key = normalize(text)
+        if not key:
+            return
+        entry = self.entries.get(key)
+        if entry is None:
+            if not weight:
+                return
+            entry = self.entries[key] = _Entry(key, display.strip())
+            self._link(entry)
+        # categories collect one source per product, so keep a running total
+        entry.score -= entry.sources.pop(source, 0)
+        if weight:
+            entry.sources[source] = weight
+            entry.score += weight
+        if entry.sources:
+            # nothing is cached yet while the initial load runs
+            if self.loaded:
+                self._touch(entry)
+        else:
+            del self.entries[key]
+            self._unlink(entry)
+
+    def _set_product(self, pk, name, category, view_count):
+        old = self.products.pop(pk, None)
+        # a view count bump keeps the same entries and only reweights them
+        if old is not None and (old[0], old[1]) != (name, category):
+            self._contribute(old[0], old[0], ('product', pk), 0)
+            self._contribute(old[1], old[1], ('category', pk), 0)
+        if name is None:
+            return
+        weight = 1 + (view_count or 0)
+        self._contribute(name, name, ('product', pk), weight)
+        self._contribute(category, category, ('category', pk), weight)
+        self.products[pk] = (name, category, view_count or 0)
+
+    def _add_query(self, query, n=1):
+        key = normalize(query)
+        if not key:
+            return
+        count = self.query_counts[key] = self.query_counts.get(key, 0) + n
+        if count >= MIN_QUERY_COUNT:
+            self._contribute(key, query, ('query',), count)
+
+    def _top(self, node):
+        if node.top is None:
+            candidates = {entry.text: entry for entry in node.entries}
+            for child in node.children.values():
+                for entry in self._top(child):
+                    candidates[entry.text] = entry
+            node.top = nsmallest(TOP_K, candidates.values(), key=lambda entry: (-entry.score, entry.text))
+        return node.top
+
+    # -- public API --
+
+    def suggest(self, prefix, limit=TOP_K):
+        key = normalize(prefix)[:MAX_DEPTH]
+        if not key:
+            return []
+        self._ensure_loaded()
+        with self.lock:
+            node = self.root
+            for char in key:
+                node = node.children.get(char)
+                if node is None:
+                    return []
+            top = self._top(node)[:limit]
+            return [
+                {
+                    'text': entry.display,
+                    'type': min((source[0] for source in entry.sources), key=KIND_ORDER.index),
+                }
+                for entry in top
+            ]
+
+    def update_product(self, product):
+        with self.lock:
+            if self.loaded:
+                self._set_product(product.pk, product.product_name, product.category, product.view_count)
+        self.version.bump()
+
+    def remove_product(self, pk):
+        with self.lock:
+            if self.loaded:
+                self._set_product(pk, None, None, 0)
+        self.version.bump()
+
+    def add_views(self, counts):
+        """Apply view_count increments, {product_id: n}."""
+        with self.lock:
+            if not self.loaded:
+                return
+            for pk, n in counts.items():
+                product = self.products.get(pk)
+                if product is not None:
+                    name, category, view_count = product
+                    self._set_product(pk, name, category, view_count + n)
+
+    def record_query(self, query):
+        with self.lock:
+            if self.loaded:
+                self._add_query(query)
+
+
+typeahead = Typeahead()
@@ -1,12 +1,17 @@
 from django.urls import path
-from .views import TrackProductView, TrackContentView, RecentVideosWatchedView, SearchSuggestionsView, SaveSearchQueryView, UserViewHistoryView
+from .views import TrackProductView, TrackContentView, TrackViewBatchView, RecentVideosWatchedView, SearchSuggestionsView, ProductSearchView, FacetedSearchView, AutocompleteView, SaveSearchQueryView, TrendingSearchesView, UserViewHistoryView
 
 
 urlpatterns = [
     path('track/product/', TrackProductView.as_view(), name='track-product-view'),
     path('track/content/', TrackContentView.as_view(), name='track-content-view'),
+    path('track/batch/', TrackViewBatchView.as_view(), name='track-view-batch'),
     path('videos/recent/', RecentVideosWatchedView.as_view(), name='recent-videos'),
     path('suggestions/', SearchSuggestionsView.as_view(), name='search-suggestions'),
+    path('products/', ProductSearchView.as_view(), name='product-search'),
+    path('facets/', FacetedSearchView.as_view(), name='faceted-search'),
+    path('autocomplete/', AutocompleteView.as_view(), name='autocomplete'),
     path('search/', SaveSearchQueryView.as_view(), name='save-search'),
+    path('trending/', TrendingSearchesView.as_view(), name='trending-searches'),
     path('history/', UserViewHistoryView.as_view(), name='view-history'),
 ]
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Cross-process freshness for the in-memory search structures.
+
+The typeahead trie, the trending sketches and the full-text and trigram
+indexes used off Postgres live in each web process, and each process only
+sees the writes it served. Each structure therefore has a version counter
+in the shared cache: a write bumps it once the transaction commits, and a
+process whose structure was loaded at an older version rebuilds it from
+the database on its next read. The process that made the write has already
+applied it, so it skips that rebuild unless another write got in between.
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+
+class SharedVersion:
+    def __init__(self, name):
+        self.key = f"search:index:{name}:version"
+        # the version the process's copy was loaded at, None before a load
+        self.seen = None
+
+    def current(self):
+        return cache.get(self.key, 0)
+
+    def is_current(self):
+        return self.seen is not None and self.current() == self.seen
+
+    def _bump(self):
+        try:
+            version = cache.incr(self.key)
+        except ValueError:
+            # missing counters read as 0; start this one past that
+            version = 1 if cache.add(self.key, 1, None) else cache.incr(self.key)
+        if self.seen is not None and version == self.seen + 1:
+            self.seen = version
+
+    def bump(self):
+        """Tell other processes to reload once the current transaction commits."""
+        transaction.on_commit(self._bump)
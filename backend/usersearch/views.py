@@ -1,16 +1,30 @@
 from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.parsers import JSONParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from django.db.models import Count, Q, Avg
 from datetime import timedelta
 from django.utils import timezone
+from django.conf import settings
 from .models import ProductView, ContentView, SearchQuery
-from .serializers import ProductViewSerializer, ContentViewSerializer, SearchQuerySerializer
+from .serializers import ProductViewSerializer, ContentViewSerializer, SearchQuerySerializer, ViewEventBatchSerializer
 from Products_app.models import Product
 from customers.models import VendorContents, VendorProfiles
-from Products_app.serializers import ProductSerializer
+from customers.serializers import VendorContentSerializer
+from Products_app.serializers import ProductListSerializer
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from drf_spectacular.types import OpenApiTypes
+from .pagination import SearchCursorPagination
+from Products_app.pagination import ProductCursorPagination
+from .facets import CELL_FIELDS, catalog_facets, cell_for, cell_matches, count_facets, filter_queryset, parse_filters
+from .cache import cached_search_ids, category_versions, get_results, store_results
+from .history import CONTENT, PRODUCT, hydrate_contents, recent_views
+from .ingest import BodyTokenJWTAuthentication, PlainTextJSONParser, record_views
+from .queries import record_search, trending
+from .search import search_products
+from .typeahead import TOP_K, typeahead
 
 
 class TrackProductView(APIView):
@@ -22,15 +36,8 @@ class TrackProductView(APIView):
         
         try:
             product = Product.objects.get(id=product_id)
-            product_view, created = ProductView.objects.get_or_create(
-                user=request.user,
-                product=product,
-                defaults={'view_duration': view_duration}
-            )
-            if not created:
-                # Update view duration if already exists
-                product_view.view_duration = view_duration
-                product_view.save()
+            record_views(request.user, [{'type': PRODUCT, 'id': product.id, 'duration': int(view_duration)}])
+            product_view = ProductView.objects.get(user=request.user, product=product)
             
             serializer = ProductViewSerializer(product_view)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -47,14 +54,8 @@ class TrackContentView(APIView):
         
         try:
             content = VendorContents.objects.get(id=content_id)
-            content_view, created = ContentView.objects.get_or_create(
-                user=request.user,
-                content=content,
-                defaults={'view_duration': view_duration}
-            )
-            if not created:
-                content_view.view_duration = view_duration
-                content_view.save()
+            record_views(request.user, [{'type': CONTENT, 'id': content.id, 'duration': int(view_duration)}])
+            content_view = ContentView.objects.get(user=request.user, content=content)
             
             serializer = ContentViewSerializer(content_view)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -62,20 +63,66 @@ class TrackContentView(APIView):
             return Response({"error": "Content not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
+class TrackViewBatchView(APIView):
+    authentication_classes = [BodyTokenJWTAuthentication]
+    parser_classes = [JSONParser, PlainTextJSONParser]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        summary="Track a batch of views",
+        description="Record up to VIEW_EVENT_BATCH_LIMIT product and content views at once. Also accepts "
+                    "`navigator.sendBeacon` requests: a text/plain JSON body with the access token in `token`. "
+                    "Events for items that do not exist are returned in `skipped`.",
+        request=ViewEventBatchSerializer,
+    )
+    def post(self, request):
+        serializer = ViewEventBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        result = record_views(request.user, serializer.validated_data['events'])
+        return Response(result, status=status.HTTP_200_OK)
+
+
+def product_history(user):
+    """The user's recently viewed products, newest first, hydrated with one query."""
+    entries = recent_views(PRODUCT, user.id)
+    products = {row['id']: row for row in ProductListSerializer.hydrate([entry[0] for entry in entries])}
+    return [{
+        'product': product_id,
+        'product_details': products[product_id],
+        'viewed_at': viewed_at,
+        'view_duration': view_duration,
+    } for product_id, viewed_at, view_duration, _ in entries if product_id in products]
+
+
+def content_history(request, videos_only=False):
+    """The user's recently viewed contents, newest first, hydrated with one query."""
+    entries = [
+        entry for entry in recent_views(CONTENT, request.user.id)
+        if entry[3] or not videos_only
+    ]
+    contents = hydrate_contents([entry[0] for entry in entries], request.user)
+    entries = [entry for entry in entries if entry[0] in contents]
+    details = VendorContentSerializer(
+        [contents[entry[0]] for entry in entries], many=True, context={'request': request}
+    ).data
+    return [{
+        'content': content_id,
+        'content_details': content_details,
+        'viewed_at': viewed_at,
+        'view_duration': view_duration,
+    } for (content_id, viewed_at, view_duration, _), content_details in zip(entries, details)]
+
+
 class RecentVideosWatchedView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         # Get recent video content views
-        recent_videos = ContentView.objects.filter(
-            user=request.user,
-            content__video__isnull=False
-        ).select_related('content', 'content__user')[:20]
-        
-        serializer = ContentViewSerializer(recent_videos, many=True, context={'request': request})
+        recent_videos = content_history(request, videos_only=True)
         return Response({
-            'recent_videos': serializer.data,
-            'count': recent_videos.count()
+            'recent_videos': recent_videos,
+            'count': len(recent_videos)
         }, status=status.HTTP_200_OK)
 
 
@@ -86,40 +133,33 @@ class SearchSuggestionsView(APIView):
         user = request.user
         query = request.query_params.get('q', '').strip()
         
-        # Get vendors from products the user has viewed
-        viewed_product_vendors = ProductView.objects.filter(
-            user=user
-        ).values_list('product__vendor_name', flat=True).distinct()
-        
-        # Get vendors from contents the user has viewed
-        viewed_content_vendors = ContentView.objects.filter(
-            user=user
-        ).values_list('content__user', flat=True).distinct()
-        
-        # Combine and get unique vendor IDs
-        vendor_ids = set(list(viewed_product_vendors) + list(viewed_content_vendors))
-        
-        # Base query for vendors
+        # Base query for vendors; product totals come from the same query
         vendor_query = VendorProfiles.objects.filter(
             user__role='vendor'
-        ).select_related('user')
+        ).select_related('user').annotate(total_products=Count('user__products'))
         
-        # If there's a search query, filter vendors by products matching the query
         if query:
+            # ranked product matches drive both the vendor and product suggestions
+            matching_ids = cached_search_ids(query)
             # Find vendors who have products matching the search query
-            matching_vendors = Product.objects.filter(
-                Q(product_name__icontains=query) | 
-                Q(description__icontains=query) |
-                Q(category__icontains=query)
-            ).values_list('vendor_name', flat=True).distinct()
-            
-            vendor_query = vendor_query.filter(user__id__in=matching_vendors)
+            vendor_query = vendor_query.filter(
+                user__id__in=Product.objects.filter(id__in=matching_ids).values('vendor_id')
+            )
+            # Best search matches, in rank order
+            products_data = ProductListSerializer.hydrate(matching_ids[:15])
         else:
+            # Vendors whose products or contents the user has viewed, in one query
+            vendor_ids = set(
+                ProductView.objects.filter(user=user).order_by().values_list('product__vendor_id', flat=True)
+                .union(ContentView.objects.filter(user=user).order_by().values_list('content__user', flat=True))
+            )
             # If no query, show vendors based on user's view history
             if vendor_ids:
                 vendor_query = vendor_query.filter(user__id__in=vendor_ids)
-        
-        suggested_vendors = vendor_query[:10]
+            # Show products from vendors user has interacted with
+            products_data = ProductListSerializer(
+                ProductListSerializer.values(Product.objects.filter(vendor_id__in=vendor_ids))[:15], many=True
+            ).data
         
         vendor_data = [{
             'id': profile.user.id,
@@ -128,31 +168,12 @@ class SearchSuggestionsView(APIView):
             'bio': profile.bio,
             'followers_count': profile.followers_count,
             'profile_picture': profile.profile_picture.url if profile.profile_picture else None,
-            'total_products': Product.objects.filter(vendor_name=profile.user).count()
-        } for profile in suggested_vendors]
-        
-        # Get suggested products
-        if query:
-            # Search products by query
-            suggested_products = Product.objects.filter(
-                Q(product_name__icontains=query) | 
-                Q(description__icontains=query) |
-                Q(category__icontains=query)
-            ).select_related('vendor_name')[:15]
-        else:
-            # Show products from vendors user has interacted with
-            suggested_products = Product.objects.filter(
-                vendor_name__id__in=vendor_ids
-            ).select_related('vendor_name')[:15]
-        
-        product_serializer = ProductSerializer(suggested_products, many=True)
+            'total_products': profile.total_products
+        } for profile in vendor_query.order_by('id')[:10]]
         
         # Add vendor username to each product
-        products_data = product_serializer.data
-        for prod, item in zip(suggested_products, products_data):
-            username = prod.vendor_name.username if prod.vendor_name else None
-            item['vendor_name'] = username
-            item['vendor_username'] = username
+        for item in products_data:
+            item['vendor_name'] = item['vendor_username']
         
         # Get recent search queries
         recent_searches = SearchQuery.objects.filter(user=user)[:10]
@@ -168,56 +189,149 @@ class SearchSuggestionsView(APIView):
         }, status=status.HTTP_200_OK)
 
 
+class ProductSearchView(APIView):
+
+    @extend_schema(
+        summary="Search products",
+        description="Full-text product search over name, category and description, best match first. "
+                    "The last word matches as a prefix. Paginated with opaque `cursor` tokens.",
+        parameters=[
+            OpenApiParameter(name='q', location=OpenApiParameter.QUERY, description='Search text', type=OpenApiTypes.STR),
+            OpenApiParameter(name='cursor', location=OpenApiParameter.QUERY, description='Cursor from a previous `next`/`previous` link', type=OpenApiTypes.STR),
+            OpenApiParameter(name='page_size', location=OpenApiParameter.QUERY, description='Items per page (max 100)', type=OpenApiTypes.INT),
+        ],
+        responses={200: ProductListSerializer(many=True)},
+    )
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        paginator = SearchCursorPagination()
+        offset = paginator.decode_offset(request)
+        page_ids = paginator.paginate_ids(cached_search_ids(query) if query else [], request, offset)
+        return paginator.get_paginated_response(ProductListSerializer.hydrate(page_ids))
+
+
+class FacetedSearchView(APIView):
+
+    @extend_schema(
+        summary="Faceted product search",
+        description="Products filtered by category, price band, institute and stock status, plus counts per facet "
+                    "value. With `q`, results are search matches in rank order; without it, newest first.",
+        parameters=[
+            OpenApiParameter(name='q', location=OpenApiParameter.QUERY, description='Search text', type=OpenApiTypes.STR),
+            OpenApiParameter(name='category', location=OpenApiParameter.QUERY, type=OpenApiTypes.STR),
+            OpenApiParameter(name='price_band', location=OpenApiParameter.QUERY, description='e.g. under-1k, 1k-5k, 5k-20k, 20k-100k, 100k-plus', type=OpenApiTypes.STR),
+            OpenApiParameter(name='institute', location=OpenApiParameter.QUERY, type=OpenApiTypes.STR),
+            OpenApiParameter(name='in_stock', location=OpenApiParameter.QUERY, description='true or false', type=OpenApiTypes.STR),
+            OpenApiParameter(name='cursor', location=OpenApiParameter.QUERY, description='Cursor from a previous `next`/`previous` link', type=OpenApiTypes.STR),
+            OpenApiParameter(name='page_size', location=OpenApiParameter.QUERY, description='Items per page (max 100)', type=OpenApiTypes.INT),
+        ],
+    )
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        filters, error = parse_filters(request.query_params)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if query:
+            entry = get_results(query, filters)
+            if entry is None:
+                # facet the (bounded) match set itself, then keep the rank order
+                ranked_ids = search_products(query)
+                cells = {
+                    row[0]: cell_for(*row[1:])
+                    for row in Product.objects.filter(id__in=ranked_ids).values_list('id', *CELL_FIELDS)
+                }
+                matching = [pk for pk in ranked_ids if pk in cells and cell_matches(cells[pk], filters)]
+                entry = store_results(
+                    query, filters, matching, category_versions({cell[0] for cell in cells.values()}),
+                    facets=count_facets(((cell, 1) for cell in cells.values()), filters),
+                )
+            facets = entry['facets']
+            paginator = SearchCursorPagination()
+            page_ids = paginator.paginate_ids(entry['ids'], request, paginator.decode_offset(request))
+            data = ProductListSerializer.hydrate(page_ids)
+        else:
+            facets = catalog_facets(filters)
+            paginator = ProductCursorPagination()
+            rows = paginator.paginate_queryset(
+                ProductListSerializer.values(filter_queryset(Product.objects.all(), filters)), request, view=self
+            )
+            data = ProductListSerializer(rows, many=True).data
+
+        response = paginator.get_paginated_response(data)
+        response.data['facets'] = facets
+        return response
+
+
+class AutocompleteView(APIView):
+
+    @extend_schema(
+        summary="Autocomplete",
+        description="Suggestions for a partly typed search: product names, categories and popular searches, "
+                    "ranked by product views and search frequency. Served from memory.",
+        parameters=[
+            OpenApiParameter(name='q', location=OpenApiParameter.QUERY, description='Typed prefix', type=OpenApiTypes.STR),
+            OpenApiParameter(name='limit', location=OpenApiParameter.QUERY, description=f'Max suggestions (default and max {TOP_K})', type=OpenApiTypes.INT),
+        ],
+    )
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(max(int(request.query_params.get('limit', TOP_K)), 1), TOP_K)
+        except ValueError:
+            limit = TOP_K
+        return Response({
+            'query': query,
+            'suggestions': typeahead.suggest(query, limit),
+        }, status=status.HTTP_200_OK)
+
+
 class SaveSearchQueryView(APIView):
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
         query = request.data.get('query', '').strip()
         
-        if not query:
+        # repeats of a query (in any case or spacing) update the user's one row
+        search_query = record_search(request.user, query)
+        if search_query is None:
             return Response({"error": "Query cannot be empty"}, status=status.HTTP_400_BAD_REQUEST)
+        typeahead.record_query(query)
         
-        # Check if query already exists for this user recently (within last hour)
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-        existing_query = SearchQuery.objects.filter(
-            user=request.user,
-            query__iexact=query,
-            searched_at__gte=one_hour_ago
-        ).first()
-        
-        if existing_query:
-            # Update timestamp
-            existing_query.searched_at = timezone.now()
-            existing_query.save()
-            serializer = SearchQuerySerializer(existing_query)
-        else:
-            # Create new search query
-            search_query = SearchQuery.objects.create(user=request.user, query=query)
-            serializer = SearchQuerySerializer(search_query)
-        
+        serializer = SearchQuerySerializer(search_query)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
+class TrendingSearchesView(APIView):
+
+    @extend_schema(
+        summary="Trending searches",
+        description="Most searched queries over the recent rolling window, served from memory.",
+        parameters=[
+            OpenApiParameter(name='limit', location=OpenApiParameter.QUERY, description='Max queries (default 10, max 50)', type=OpenApiTypes.INT),
+        ],
+    )
+    def get(self, request):
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        return Response({
+            'window_hours': settings.SEARCH_TRENDING_WINDOW_HOURS,
+            'results': trending.trending(limit),
+        }, status=status.HTTP_200_OK)
+
+
 class UserViewHistoryView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        # Get recent product views
-        product_views = ProductView.objects.filter(
-            user=request.user
-        ).select_related('product', 'product__vendor_name')[:20]
-        
-        # Get recent content views
-        content_views = ContentView.objects.filter(
-            user=request.user
-        ).select_related('content', 'content__user')[:20]
-        
-        product_serializer = ProductViewSerializer(product_views, many=True)
-        content_serializer = ContentViewSerializer(content_views, many=True, context={'request': request})
+        product_views = product_history(request.user)
+        content_views = content_history(request)
         
         return Response({
-            'product_views': product_serializer.data,
-            'content_views': content_serializer.data,
-            'total_product_views': product_views.count(),
-            'total_content_views': content_views.count()
+            'product_views': product_views,
+            'content_views': content_views,
+            'total_product_views': len(product_views),
+            'total_content_views': len(content_views)
         }, status=status.HTTP_200_OK)
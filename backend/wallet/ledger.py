@@ -0,0 +1,89 @@
+"""
+Double-entry wallet ledger.
+
+Every movement of money is written as a journal: LedgerEntry legs sharing
+one journal ID whose amounts sum to zero. Accounts are buyer and vendor
+wallets, one escrow account per EscrowWallet, and the outside world: a
+Paystack account per top-up for money coming in, and the opening balances
+carried over when the ledger was introduced. Completed top-ups and
+Transaction rows from before the ledger are replayed against the opening
+account (migration 0009), which is where the PURCHASE and WITHDRAWAL kinds
+come from. Nothing refunds an escrow yet, so there is no refund journal.
+
+Wallet and escrow rows keep their balance column as a cache of the ledger.
+Callers post while holding the row lock and pass the balance they are
+writing, which becomes the entry's running balance, so no posting has to
+read the ledger back. `manage.py reconcile_wallets` checks the caches and
+running balances against the ledger sums.
+"""
+import uuid
+from decimal import Decimal
+
+from paymentapp.models import BuyerWallet
+from .models import LedgerEntry
+
+BUYER = 'BUYER'
+VENDOR = 'VENDOR'
+ESCROW = 'ESCROW'
+PAYSTACK = 'PAYSTACK'
+OPENING = 'OPENING'
+
+DESCRIPTIONS = {
+    'OPENING': "Opening balance",
+    'TOPUP': "Wallet Top-up",
+    'HOLD': "Payment held in escrow for order {reference}",
+    'RELEASE': "Escrow released for order {reference}",
+    'PURCHASE': "Purchase",
+    'WITHDRAWAL': "Withdrawal",
+}
+
+
+def wallet_account(wallet):
+    return (BUYER if isinstance(wallet, BuyerWallet) else VENDOR), wallet.pk
+
+
+def journal(kind, legs, reference=''):
+    """
+    Build the entries of one journal from (account, amount, balance after)
+    legs, where an account is an (account_type, account_id) pair.
+    """
+    if sum((amount for _, amount, _ in legs), Decimal('0')) != 0:
+        raise ValueError(f"{kind} journal {reference!r} does not balance.")
+    journal_id = uuid.uuid4()
+    return [
+        LedgerEntry(
+            journal=journal_id, account_type=account_type, account_id=account_id,
+            kind=kind, amount=amount, balance=balance, reference=reference,
+        )
+        for (account_type, account_id), amount, balance in legs
+    ]
+
+
+def post(*journals):
+    """Write journals built by `journal` in one insert."""
+    return LedgerEntry.objects.bulk_create([entry for entries in journals for entry in entries])
+
+
+def topup(topup, wallet, balance):
+    """A paid top-up credited to `wallet`, whose balance is now `balance`."""
+    return journal('TOPUP', [
+        (wallet_account(wallet), topup.amount, balance),
+        ((PAYSTACK, topup.pk), -topup.amount, -topup.amount),
+    ], topup.reference)
+
+
+def hold(buyer_wallet, balance, escrow):
+    """A buyer's payment for an order moved into its escrow."""
+    return journal('HOLD', [
+        (wallet_account(buyer_wallet), -escrow.amount, balance),
+        ((ESCROW, escrow.pk), escrow.amount, escrow.amount),
+    ], escrow.order_id)
+
+
+def release(escrow, vendor_wallet, balance):
+    """A held escrow paid out to the vendor."""
+    return journal('RELEASE', [
+        ((ESCROW, escrow.pk), -escrow.amount, Decimal('0.00')),
+        (wallet_account(vendor_wallet), escrow.amount, balance),
+    ], escrow.order_id)
+
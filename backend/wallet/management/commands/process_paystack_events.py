@@ -0,0 +1,29 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from wallet.models import PaystackEvent
+from wallet.webhooks import apply_event
+
+
+class Command(BaseCommand):
+    help = "Apply Paystack webhook events that were stored but never applied, e.g. by the former background workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than", type=int, default=60,
+            help="Only events received at least this many seconds ago, leaving ones being delivered right now alone.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options["older_than"])
+        event_ids = list(PaystackEvent.objects.filter(status="pending", received_at__lte=cutoff).values_list("id", flat=True))
+        for event_id in event_ids:
+            apply_event(event_id)
+        statuses = Counter(PaystackEvent.objects.filter(pk__in=event_ids).values_list("status", flat=True))
+        self.stdout.write(
+            f"{len(event_ids)} pending events: " + ", ".join(f"{count} {status}" for status, count in statuses.items())
+            if event_ids else "No pending events."
+        )
@@ -0,0 +1,29 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0006_paystackevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('journal', models.UUIDField(db_index=True)),
+                ('account_type', models.CharField(choices=[('BUYER', 'buyer wallet'), ('VENDOR', 'vendor wallet'), ('ESCROW', 'order escrow'), ('PAYSTACK', 'paystack'), ('OPENING', 'opening balances')], max_length=10)),
+                ('account_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('OPENING', 'opening balance'), ('TOPUP', 'top-up'), ('HOLD', 'escrow hold'), ('RELEASE', 'escrow release'), ('REFUND', 'escrow refund')], max_length=10)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('reference', models.CharField(blank=True, default='', max_length=100)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['account_type', 'account_id', 'created_at', 'id'], name='ledger_account_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+"""
+Carry the balances held before the ledger existed into it: one OPENING
+journal per wallet with money in it and per escrow still held, balanced
+against a single opening-balances account.
+"""
+import uuid
+from decimal import Decimal
+
+from django.db import migrations
+
+
+def open_ledger(apps, schema_editor):
+    LedgerEntry = apps.get_model('wallet', 'LedgerEntry')
+    accounts = [
+        ('BUYER', apps.get_model('paymentapp', 'BuyerWallet').objects.exclude(balance=0).values_list('pk', 'balance')),
+        ('VENDOR', apps.get_model('paymentapp', 'VendorWallet').objects.exclude(balance=0).values_list('pk', 'balance')),
+        ('ESCROW', apps.get_model('wallet', 'EscrowWallet').objects.filter(status='HELD').values_list('pk', 'amount')),
+    ]
+    opening = Decimal('0.00')
+    entries = []
+    for account_type, rows in accounts:
+        for account_id, balance in rows.iterator():
+            opening -= balance
+            journal = uuid.uuid4()
+            entries += [
+                LedgerEntry(journal=journal, account_type=account_type, account_id=account_id,
+                            kind='OPENING', amount=balance, balance=balance),
+                LedgerEntry(journal=journal, account_type='OPENING', account_id=0,
+                            kind='OPENING', amount=-balance, balance=opening),
+            ]
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def close_ledger(apps, schema_editor):
+    apps.get_model('wallet', 'LedgerEntry').objects.filter(kind='OPENING').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paymentapp', '0006_idempotencykey'),
+        ('wallet', '0007_ledgerentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(open_ledger, close_ledger),
+    ]
@@ -0,0 +1,121 @@
+"""
+Replay the completed top-ups and Transaction rows recorded before the
+ledger existed, so wallet history still lists them. Each becomes a journal
+dated when it happened, balanced against the opening-balances account.
+The OPENING journals from 0008 are rebuilt to carry only what a wallet's
+replayed rows do not account for, so every wallet's ledger total, and so
+its balance, is unchanged.
+"""
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+ZERO = Decimal('0.00')
+OPENING = ('OPENING', 0)
+
+
+def _post(LedgerEntry, journals):
+    """
+    Write (created_at, kind, reference, [(account, amount)]) journals in date
+    order, balancing each against the opening account and giving every leg
+    its account's running balance.
+    """
+    balances = defaultdict(lambda: ZERO)
+    entries = []
+    # sorted() is stable, so an opening posted at the same moment as a replayed row follows it
+    for created_at, kind, reference, legs in sorted(journals, key=lambda journal: journal[0]):
+        total = sum((amount for _, amount in legs), ZERO)
+        if total:
+            legs = legs + [(OPENING, -total)]
+        journal = uuid.uuid4()
+        for account, amount in legs:
+            balances[account] += amount
+            entries.append(LedgerEntry(
+                journal=journal, account_type=account[0], account_id=account[1], kind=kind,
+                amount=amount, balance=balances[account], reference=reference, created_at=created_at,
+            ))
+    LedgerEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def replay_history(apps, schema_editor):
+    LedgerEntry = apps.get_model('wallet', 'LedgerEntry')
+    TopUpMOdel = apps.get_model('wallet', 'TopUpMOdel')
+    Transaction = apps.get_model('paymentapp', 'Transaction')
+
+    openings = {
+        (account_type, account_id): (amount, created_at)
+        for account_type, account_id, amount, created_at in LedgerEntry.objects.filter(kind='OPENING')
+        .exclude(account_type='OPENING').values_list('account_type', 'account_id', 'amount', 'created_at').iterator()
+    }
+    # top-ups the webhook credited since 0008 are in the ledger already
+    credited = set(LedgerEntry.objects.filter(kind='TOPUP').values_list('reference', flat=True))
+
+    journals = []
+    for topup in TopUpMOdel.objects.filter(status='COMPLETED').iterator():
+        if topup.reference in credited:
+            continue
+        account = ('VENDOR', topup.vendor_id) if topup.vendor_id else ('BUYER', topup.buyer_id)
+        journals.append((topup.created_at, 'TOPUP', topup.reference, [(account, topup.amount)]))
+    for row in Transaction.objects.filter(status='COMPLETED').iterator():
+        if row.transaction_type == 'PURCHASE':
+            legs = [(('BUYER', row.buyer_id), -row.amount), (('VENDOR', row.vendor_id), row.amount)]
+        else:
+            sign = 1 if row.transaction_type == 'TOPUP' else -1
+            legs = [(('BUYER', row.buyer_id), sign * row.amount), (('VENDOR', row.vendor_id), sign * row.amount)]
+        legs = [(account, amount) for account, amount in legs if account[1] is not None]
+        if legs:
+            journals.append((row.timestamp, row.transaction_type, row.reference[:100], legs))
+
+    replayed = defaultdict(lambda: ZERO)
+    last_replayed = {}
+    for created_at, _, _, legs in journals:
+        for account, amount in legs:
+            replayed[account] += amount
+            last_replayed[account] = max(created_at, last_replayed.get(account, created_at))
+    for account in set(openings) | set(replayed):
+        balance, opened_at = openings.get(account, (ZERO, None))
+        if balance != replayed[account]:
+            journals.append((opened_at or last_replayed[account], 'OPENING', '', [(account, balance - replayed[account])]))
+
+    LedgerEntry.objects.filter(kind='OPENING').delete()
+    _post(LedgerEntry, journals)
+
+
+def fold_history(apps, schema_editor):
+    """Fold every journal touching the opening account back into one OPENING journal per account."""
+    LedgerEntry = apps.get_model('wallet', 'LedgerEntry')
+    carried = LedgerEntry.objects.filter(
+        models.Q(account_type='OPENING') | models.Q(kind__in=['PURCHASE', 'WITHDRAWAL'])
+    ).values('journal')
+    totals = defaultdict(lambda: ZERO)
+    last = {}
+    for account_type, account_id, amount, created_at in LedgerEntry.objects.filter(journal__in=carried).exclude(
+        account_type='OPENING'
+    ).values_list('account_type', 'account_id', 'amount', 'created_at').iterator():
+        account = (account_type, account_id)
+        totals[account] += amount
+        last[account] = max(created_at, last.get(account, created_at))
+    LedgerEntry.objects.filter(journal__in=carried).delete()
+    _post(LedgerEntry, [
+        (last[account], 'OPENING', '', [(account, total)]) for account, total in totals.items() if total
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('paymentapp', '0006_idempotencykey'),
+        ('wallet', '0008_ledger_opening_balances'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='kind',
+            field=models.CharField(choices=[('OPENING', 'opening balance'), ('TOPUP', 'top-up'), ('HOLD', 'escrow hold'), ('RELEASE', 'escrow release'), ('REFUND', 'escrow refund'), ('PURCHASE', 'purchase'), ('WITHDRAWAL', 'withdrawal')], max_length=10),
+        ),
+        migrations.RunPython(replay_history, fold_history),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0009_ledger_legacy_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ledgerentry',
+            name='kind',
+            field=models.CharField(choices=[('OPENING', 'opening balance'), ('TOPUP', 'top-up'), ('HOLD', 'escrow hold'), ('RELEASE', 'escrow release'), ('PURCHASE', 'purchase'), ('WITHDRAWAL', 'withdrawal')], max_length=10),
+        ),
+    ]
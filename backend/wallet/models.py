@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from paymentapp.models import BuyerWallet,VendorWallet
 from django.contrib.auth import get_user_model
 
@@ -15,6 +16,23 @@ ESCROW_STATUS = [
     ("REFUNDED","refunded")
 ]
 
+LEDGER_ACCOUNTS = [
+    ("BUYER","buyer wallet"),
+    ("VENDOR","vendor wallet"),
+    ("ESCROW","order escrow"),
+    ("PAYSTACK","paystack"),
+    ("OPENING","opening balances")
+]
+
+LEDGER_KINDS = [
+    ("OPENING","opening balance"),
+    ("TOPUP","top-up"),
+    ("HOLD","escrow hold"),
+    ("RELEASE","escrow release"),
+    ("PURCHASE","purchase"),
+    ("WITHDRAWAL","withdrawal")
+]
+
 class TopUpMOdel(models.Model):
     buyer = models.ForeignKey(BuyerWallet,on_delete=models.CASCADE,null=True, related_name="topup_wallet")
     vendor = models.ForeignKey(VendorWallet,on_delete=models.CASCADE,null=True, related_name="vendor_topup_wallet")
@@ -32,4 +50,67 @@ class EscrowWallet(models.Model):
     status = models.CharField(max_length=10, choices=ESCROW_STATUS, default="HELD")
 
     def __str__(self):
-        return f"Escrow for Order {self.order.id} - Status: {self.status}"
\ No newline at end of file
+        return f"Escrow for Order {self.order.id} - Status: {self.status}"
+
+
+class PaystackEvent(models.Model):
+    """
+    A signed webhook event from Paystack. Paystack redelivers an event until
+    it gets a 200, so (event, reference) is unique and a redelivery is stored
+    only once.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+
+    event = models.CharField(max_length=64)
+    reference = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True, null=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['received_at']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'reference'], name='unique_paystack_event'),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.reference} ({self.status})"
+
+
+class LedgerEntry(models.Model):
+    """
+    One leg of a balanced money movement (see `wallet.ledger`). Entries are
+    only ever appended: `amount` is signed, positive when it credits the
+    account, and `balance` is the account's balance after the entry.
+    """
+    journal = models.UUIDField(db_index=True)
+    account_type = models.CharField(max_length=10, choices=LEDGER_ACCOUNTS)
+    account_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=LEDGER_KINDS)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    reference = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['account_type', 'account_id', 'created_at', 'id'], name='ledger_account_created_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.pk is not None:
+            raise ValueError("Ledger entries cannot be changed once written.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Ledger entries cannot be deleted.")
+
+    def __str__(self):
+        return f"{self.kind} {self.account_type}:{self.account_id} {self.amount}"
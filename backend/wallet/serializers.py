@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import BuyerWallet, VendorWallet, TopUpMOdel
+from .ledger import DESCRIPTIONS
+from .models import BuyerWallet, LedgerEntry, VendorWallet, TopUpMOdel
 
 
 class BuyerWalletSerializer(serializers.ModelSerializer):
@@ -15,4 +16,26 @@ class VendorWalletSerializer(serializers.ModelSerializer):
 class TopUpSerializer(serializers.ModelSerializer):
     class Meta:
         model = TopUpMOdel
-        fields = ["id", "amount", "status", "transaction_type", "reference"]
\ No newline at end of file
+        fields = ["id", "amount", "status", "transaction_type", "reference"]
+
+
+class LedgerEntrySerializer(serializers.ModelSerializer):
+    history_type = serializers.CharField(source="kind")
+    type = serializers.SerializerMethodField()
+    amount = serializers.SerializerMethodField()
+    balance = serializers.FloatField()
+    date = serializers.DateTimeField(source="created_at")
+    description = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LedgerEntry
+        fields = ["id", "history_type", "type", "amount", "balance", "reference", "date", "description"]
+
+    def get_type(self, obj) -> str:
+        return "credit" if obj.amount > 0 else "debit"
+
+    def get_amount(self, obj) -> float:
+        return float(abs(obj.amount))
+
+    def get_description(self, obj) -> str:
+        return DESCRIPTIONS[obj.kind].format(reference=obj.reference)
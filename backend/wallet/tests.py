@@ -1,3 +1,229 @@
-from django.test import TestCase
+import importlib
+import json
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from paymentapp.models import BuyerWallet, Transaction, VendorWallet
+from paymentapp.stub import charge_success_event, sign, start_stub
+from Products_app.models import Product
+from userCart.models import CartItem
+from .models import LedgerEntry, PaystackEvent, TopUpMOdel
+
+User = get_user_model()
+
+SECRET = "sk_test_webhook"
+
+
+@override_settings(PAYSTACK_SECRET_KEY=SECRET, PAYSTACK_BASE_URL="http://127.0.0.1:9")
+class PaystackWebhookTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.wallet = BuyerWallet.objects.create(user=self.buyer, balance=Decimal("100.00"))
+		self.topup = TopUpMOdel.objects.create(buyer=self.wallet, amount=Decimal("50.00"), reference="ref-buyer")
+
+	def _deliver(self, event, secret=SECRET):
+		body = json.dumps(event).encode()
+		with self.captureOnCommitCallbacks(execute=True):
+			return self.client.post(
+				"/wallet/paystack/webhook", body, content_type="application/json",
+				HTTP_X_PAYSTACK_SIGNATURE=sign(body, secret),
+			)
+
+	def _charge(self, reference="ref-buyer", kobo=5000):
+		return charge_success_event(reference, {"email": "buyer@example.com", "amount": kobo})
+
+	def _balance(self):
+		self.wallet.refresh_from_db()
+		return self.wallet.balance
+
+	def test_charge_success_credits_the_wallet_once_across_redeliveries(self):
+		for _ in range(3):
+			self.assertEqual(self._deliver(self._charge()).status_code, 200)
+		self.assertEqual(self._balance(), Decimal("150.00"))
+		self.topup.refresh_from_db()
+		self.assertEqual(self.topup.status, "COMPLETED")
+		self.assertEqual(PaystackEvent.objects.get().status, "processed")
+
+	def test_vendor_top_ups_credit_the_vendor_wallet(self):
+		vendor = User.objects.create_user(username="vendor", email="vendor@example.com", password="pass", role="vendor")
+		wallet = VendorWallet.objects.create(vendor=vendor, balance=Decimal("0.00"))
+		TopUpMOdel.objects.create(vendor=wallet, amount=Decimal("20.00"), reference="ref-vendor")
+		self._deliver(self._charge("ref-vendor", 2000))
+		wallet.refresh_from_db()
+		self.assertEqual(wallet.balance, Decimal("20.00"))
+		self.assertEqual(self._balance(), Decimal("100.00"))
+
+	def test_unsigned_or_mismatched_events_credit_nothing(self):
+		self.assertEqual(self._deliver(self._charge(), secret="sk_test_other").status_code, 401)
+		response = self.client.post("/wallet/paystack/webhook", self._charge(), format="json")
+		self.assertEqual(response.status_code, 401)
+		self.assertFalse(PaystackEvent.objects.exists())
+
+		self.assertEqual(self._deliver(self._charge(kobo=500)).status_code, 200)
+		self.assertEqual(PaystackEvent.objects.get().status, "failed")
+		self._deliver({"event": "transfer.success", "data": {"reference": "ref-buyer", "amount": 5000}})
+		self.assertEqual(PaystackEvent.objects.get(event="transfer.success").status, "ignored")
+		self.assertEqual(self._balance(), Decimal("100.00"))
+
+	def test_verify_reads_the_local_status_without_calling_paystack(self):
+		self.client.force_authenticate(self.buyer)
+		response = self.client.get("/wallet/verify-topup/ref-buyer")
+		self.assertEqual(response.status_code, 202)
+		self.assertEqual(response.data["status"], "PENDING")
+
+		self._deliver(self._charge())
+		response = self.client.get("/wallet/verify-topup/ref-buyer")
+		self.assertEqual(response.status_code, 200)
+		self.assertEqual(response.data["status"], "COMPLETED")
+		self.assertEqual(response.data["wallet_balance"], 150.0)
+
+		other = User.objects.create_user(username="other", email="other@example.com", password="pass", role="buyer")
+		self.client.force_authenticate(other)
+		self.assertEqual(self.client.get("/wallet/verify-topup/ref-buyer").status_code, 403)
+
+	def test_top_ups_refused_by_paystack_start_nothing(self):
+		server = start_stub(failure_rate=1.0)
+		self.addCleanup(server.shutdown)
+		self.client.force_authenticate(self.buyer)
+		with override_settings(PAYSTACK_BASE_URL=f"http://127.0.0.1:{server.server_port}"):
+			response = self.client.post("/wallet/topup", {"amount": 50}, format="json")
+		self.assertEqual(response.status_code, 502)
+		self.assertEqual(TopUpMOdel.objects.count(), 1)
+
+	def test_failures_store_nothing_so_paystack_redelivers(self):
+		with patch("wallet.webhooks.ledger.post", side_effect=RuntimeError("database went away")):
+			with self.assertLogs("wallet.webhooks", "ERROR"):
+				self.assertEqual(self._deliver(self._charge()).status_code, 500)
+		self.assertFalse(PaystackEvent.objects.exists())
+		self.assertEqual(self._balance(), Decimal("100.00"))
+
+		self.assertEqual(self._deliver(self._charge()).status_code, 200)
+		self.assertEqual(self._balance(), Decimal("150.00"))
+
+	def test_command_applies_events_left_pending(self):
+		event = PaystackEvent.objects.create(event="charge.success", reference="ref-buyer", payload=self._charge())
+		PaystackEvent.objects.filter(pk=event.pk).update(received_at=timezone.now() - timedelta(minutes=5))
+		call_command("process_paystack_events", stdout=StringIO())
+		self.assertEqual(self._balance(), Decimal("150.00"))
+		self.assertEqual(PaystackEvent.objects.get().status, "processed")
+
+
+@override_settings(PAYSTACK_SECRET_KEY=SECRET)
+class WalletLedgerTests(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.buyer = User.objects.create_user(
+			username="buyer", email="buyer@example.com", password="pass", role="buyer", institute="UNILAG"
+		)
+		self.vendor = User.objects.create_user(username="vendor", email="vendor@example.com", password="pass", role="vendor")
+		self.buyer_wallet = BuyerWallet.objects.create(user=self.buyer)
+		self.vendor_wallet = VendorWallet.objects.create(vendor=self.vendor)
+		self.product = Product.objects.create(
+			vendor_id=self.vendor, product_name="Lamp", description="desc", price=Decimal("30.00"), quantity=5, category="Home"
+		)
+
+	def _top_up(self, reference, naira):
+		TopUpMOdel.objects.create(buyer=self.buyer_wallet, amount=Decimal(naira), reference=reference)
+		body = json.dumps(charge_success_event(reference, {"amount": naira * 100})).encode()
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post(
+				"/wallet/paystack/webhook", body, content_type="application/json", HTTP_X_PAYSTACK_SIGNATURE=sign(body, SECRET)
+			)
+
+	def _reconcile(self):
+		out = StringIO()
+		call_command("reconcile_wallets", stdout=out)
+		return out.getvalue()
+
+	@patch("orders.views.send_notification_to_user")
+	def test_every_movement_is_a_balanced_journal_with_running_balances(self, notify):
+		self._top_up("ref-1", 100)
+		self._top_up("ref-2", 50)
+		CartItem.objects.create(user=self.buyer, product=self.product, quantity=2)
+		self.client.force_authenticate(self.buyer)
+		order_id = self.client.post("/payment/create-order/", {}, format="json").data["orders"][0]["order_id"]
+		self.client.force_authenticate(self.vendor)
+		self.assertEqual(self.client.post("/orders/validate_order_qr/", {"order_id": order_id}, format="json").status_code, 200)
+
+		self.assertEqual(
+			list(LedgerEntry.objects.filter(account_type="BUYER").order_by("id").values_list("kind", "amount", "balance")),
+			[("TOPUP", Decimal("100.00"), Decimal("100.00")), ("TOPUP", Decimal("50.00"), Decimal("150.00")),
+			 ("HOLD", Decimal("-60.00"), Decimal("90.00"))],
+		)
+		self.assertEqual(
+			list(LedgerEntry.objects.filter(account_type="VENDOR").values_list("kind", "balance")), [("RELEASE", Decimal("60.00"))]
+		)
+		self.assertIn("match the ledger", self._reconcile())
+
+		BuyerWallet.objects.filter(pk=self.buyer_wallet.pk).update(balance=Decimal("1000.00"))
+		with self.assertRaises(CommandError):
+			self._reconcile()
+
+	def test_history_pages_through_the_ledger_newest_first(self):
+		for i in range(5):
+			self._top_up(f"ref-{i}", 10 + i)
+		self.client.force_authenticate(self.buyer)
+
+		with CaptureQueriesContext(connection) as queries:
+			page = self.client.get("/wallet/history/?page_size=2").data
+		self.assertEqual(len(queries), 1)
+		self.assertEqual([entry["reference"] for entry in page["results"]], ["ref-4", "ref-3"])
+		self.assertEqual(page["results"][0]["balance"], 60.0)
+		self.assertEqual(page["results"][0]["type"], "credit")
+
+		seen = [entry["reference"] for entry in page["results"]]
+		while page["next"]:
+			page = self.client.get(page["next"]).data
+			seen += [entry["reference"] for entry in page["results"]]
+		self.assertEqual(seen, [f"ref-{i}" for i in reversed(range(5))])
+
+		self.assertRaises(ValueError, LedgerEntry.objects.first().save)
+
+	def test_history_keeps_what_happened_before_the_ledger(self):
+		now = timezone.now()
+		BuyerWallet.objects.filter(pk=self.buyer_wallet.pk).update(balance=Decimal("70.00"))
+		VendorWallet.objects.filter(pk=self.vendor_wallet.pk).update(balance=Decimal("30.00"))
+		old_topup = TopUpMOdel.objects.create(
+			buyer=self.buyer_wallet, amount=Decimal("100.00"), reference="legacy-topup", status="COMPLETED"
+		)
+		TopUpMOdel.objects.filter(pk=old_topup.pk).update(created_at=now - timedelta(days=10))
+		purchase = Transaction.objects.create(
+			buyer=self.buyer_wallet, vendor=self.vendor_wallet, amount=Decimal("30.00"), reference="legacy-purchase",
+			status="COMPLETED", transaction_type="PURCHASE",
+		)
+		Transaction.objects.filter(pk=purchase.pk).update(timestamp=now - timedelta(days=5))
+		importlib.import_module("wallet.migrations.0008_ledger_opening_balances").open_ledger(apps, None)
+		self._top_up("ref-new", 50)
+
+		migration = importlib.import_module("wallet.migrations.0009_ledger_legacy_history")
+		migration.replay_history(apps, None)
+
+		self.client.force_authenticate(self.buyer)
+		history = self.client.get("/wallet/history/").data["results"]
+		self.assertEqual(
+			[(entry["reference"], entry["balance"]) for entry in history],
+			[("ref-new", 120.0), ("legacy-purchase", 70.0), ("legacy-topup", 100.0)],
+		)
+		self.assertEqual(
+			list(LedgerEntry.objects.filter(account_type="VENDOR").values_list("kind", "balance")),
+			[("PURCHASE", Decimal("30.00"))],
+		)
+		self.assertIn("match the ledger", self._reconcile())
+
+		migration.fold_history(apps, None)
+		self.assertFalse(LedgerEntry.objects.filter(kind="PURCHASE").exists())
+		self.assertIn("match the ledger", self._reconcile())
@@ -4,6 +4,7 @@ from .views import *
 urlpatterns = [
     path("topup",TopUpWAlletView.as_view(),name="topupwalllet"),
     path("verify-topup/<str:reference>",VerifyTopupView.as_view(),name="verify-topup"),
+    path("paystack/webhook",PaystackWebhookView.as_view(),name="paystack-webhook"),
     path('getbalance/', GetWalletBalanceView.as_view(), name="balance"),
     path('history/', WalletHistoryView.as_view(), name="history")
 ]
\ No newline at end of file
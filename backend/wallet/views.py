@@ -2,18 +2,27 @@ from django.shortcuts import render
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+import json
 import uuid
-import requests
-from decimal import Decimal
 from django.conf import settings
-from paymentapp.models import BuyerWallet, VendorWallet, Transaction
-from paymentapp.serializers import BuyerWalletSerializer, VendorWalletSerializer, TransactionSerializer
-from .models import TopUpMOdel
-from .serializers import TopUpSerializer
-from rest_framework.permissions import IsAuthenticated
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Subquery
+from paymentapp.models import BuyerWallet, VendorWallet
+from paymentapp.serializers import BuyerWalletSerializer, VendorWalletSerializer
+from .models import LedgerEntry, TopUpMOdel
+from .pagination import LedgerCursorPagination
+from .serializers import LedgerEntrySerializer
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from paymentapp.idempotency import IDEMPOTENCY_KEY_PARAMETER, idempotent
+from paymentapp import paystack
+from . import ledger, webhooks
 
 
 class TopUpWAlletView(APIView):
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    @idempotent
     def post(self,request):
         user = request.user
         amount = request.data.get("amount")
@@ -32,11 +41,6 @@ class TopUpWAlletView(APIView):
             return Response({"error": "Wallet not found."}, status=status.HTTP_404_NOT_FOUND)
         
         reference = str(uuid.uuid4()).replace("-", "")[:12]
-        headers ={
-            "Authorization":f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type":"application/json"
-        }
-
         data={
             "email":user.email,
             "amount":amount*100,
@@ -45,31 +49,34 @@ class TopUpWAlletView(APIView):
 
         }
 
-        res = requests.post("https://api.paystack.co/transaction/initialize",json=data,headers=headers)
-
-        res_data= res.json()
+        try:
+            res_data = paystack.initialize_transaction(data)
+        except paystack.PaystackError:
+            return Response({"error": "Payment provider unavailable, please try again."}, status=status.HTTP_502_BAD_GATEWAY)
 
-        if res_data["status"] or res_data["data"]["status"]=="success":
+        if res_data.get("status") is True:
             # Ensure we persist the generated reference so the DB unique constraint
             # is respected and later verification can look up the transaction.
             try:
-                if request.user.role == 'vendor':
-                    TopUpMOdel.objects.create(
-                        vendor=wallet,
-                        amount=amount,
-                        status="PENDING",
-                        transaction_type="TOPUP",
-                        reference=reference,
-                    )
-                else:
-                    TopUpMOdel.objects.create(
-                        buyer=wallet,
-                        amount=amount,
-                        status="PENDING",
-                        transaction_type="TOPUP",
-                        reference=reference,
-                    )
-            except Exception:
+                # a savepoint, so the retry below can run in the idempotency transaction
+                with db_transaction.atomic():
+                    if request.user.role == 'vendor':
+                        TopUpMOdel.objects.create(
+                            vendor=wallet,
+                            amount=amount,
+                            status="PENDING",
+                            transaction_type="TOPUP",
+                            reference=reference,
+                        )
+                    else:
+                        TopUpMOdel.objects.create(
+                            buyer=wallet,
+                            amount=amount,
+                            status="PENDING",
+                            transaction_type="TOPUP",
+                            reference=reference,
+                        )
+            except IntegrityError:
                 # If a rare collision or DB error occurs, generate a fresh reference
                 # and attempt a single retry to avoid IntegrityError on empty/duplicate refs.
                 reference = str(uuid.uuid4()).replace("-", "")[:12]
@@ -88,78 +95,54 @@ class TopUpWAlletView(APIView):
     
 
 class VerifyTopupView(APIView):
-    def get(self,request,reference):
-        headers = {
-            "Authorization":f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-            "Content-Type":"application/json"
-        }
-
-        res = requests.get(
-            f"https://api.paystack.co/transaction/verify/{reference}",
-            headers=headers
-            
-            )
-        res_data = res.json()
-
-        if res_data.get('status') or (res_data.get("data") and res_data["data"].get("status") == "success"):
+    """
+    Status of one of the user's top-ups. Wallets are credited by the Paystack
+    webhook, so this only reads what it has recorded: 200 once the top-up is
+    COMPLETED, 202 while it is still awaiting the webhook.
+    """
+    permission_classes = [IsAuthenticated]
 
-            user = request.user
-            try:
-                if request.user.role == 'vendor':
-                    wallet = VendorWallet.objects.get(vendor=user)
-                else:
-                    wallet = BuyerWallet.objects.get(user=user)
-            except (BuyerWallet.DoesNotExist, VendorWallet.DoesNotExist):
-                return Response({"error": "Wallet not found."}, status=status.HTTP_404_NOT_FOUND)
-            
-            transaction_owner=None
-            
-
-            # Try to find the transaction regardless of status so we can be idempotent.
-            transaction = TopUpMOdel.objects.filter(reference=reference).first()
-            if not transaction:
-                return Response({"error": "Top-up transaction not found."}, status=status.HTTP_404_NOT_FOUND)
-            if transaction.buyer:
-                transaction_owner=transaction.buyer.user
-            elif transaction.vendor:
-                transaction_owner=transaction.vendor.vendor
-
-            if transaction_owner != user:
-                return Response({"error": "You are not authorized to verify this transaction."}, status=status.HTTP_403_FORBIDDEN)
-            
-
-            
-            # If the transaction was already processed, return success with current balance
-            if transaction.status == "COMPLETED":
-                try:
-                    wallet_balance = float(Decimal(wallet.balance))
-                except Exception:
-                    wallet_balance = None
-                return Response({"message": "Top-up already processed.", "wallet_balance": wallet_balance, "data": res_data}, status=status.HTTP_200_OK)
-
-            # At this point the transaction exists and is not completed -> process it
-            metadata = res_data.get("data", {})
-            amount_kobo = metadata.get("amount", transaction.amount or 0)
-            amount_naira= Decimal(amount_kobo)/Decimal(100)
-
-
-            wallet.balance += amount_naira
-            transaction.status = "COMPLETED"
-
-            wallet.save()
-            transaction.save()
-
-            # Return the updated wallet balance in major units (Naira)
-            try:
-                wallet_balance = float(Decimal(wallet.balance))
-            except Exception:
-                wallet_balance = None
+    def get(self,request,reference):
+        transaction = TopUpMOdel.objects.select_related("buyer", "vendor").filter(reference=reference).first()
+        if not transaction:
+            return Response({"error": "Top-up transaction not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        wallet = transaction.buyer or transaction.vendor
+        transaction_owner = transaction.buyer.user_id if transaction.buyer else transaction.vendor.vendor_id
+        if transaction_owner != request.user.pk:
+            return Response({"error": "You are not authorized to verify this transaction."}, status=status.HTTP_403_FORBIDDEN)
+
+        completed = transaction.status == "COMPLETED"
+        return Response({
+            "message": "Top-up completed." if completed else "Top-up is awaiting payment confirmation.",
+            "reference": transaction.reference,
+            "status": transaction.status,
+            "amount": float(transaction.amount),
+            "wallet_balance": float(wallet.balance),
+        }, status=status.HTTP_200_OK if completed else status.HTTP_202_ACCEPTED)
+
+
+class PaystackWebhookView(APIView):
+    """Receives Paystack's signed event notifications."""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @extend_schema(exclude=True)
+    def post(self, request):
+        body = request.body
+        if not webhooks.valid_signature(body, request.headers.get(webhooks.SIGNATURE_HEADER)):
+            return Response({"error": "Invalid signature."}, status=status.HTTP_401_UNAUTHORIZED)
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return Response({"error": "Invalid JSON body."}, status=status.HTTP_400_BAD_REQUEST)
+        if not isinstance(payload, dict):
+            return Response({"error": "Invalid JSON body."}, status=status.HTTP_400_BAD_REQUEST)
 
-            return Response({
-                "data": res_data,
-                "wallet_balance": wallet_balance
-            }, status=status.HTTP_200_OK)
-        return Response({"error":"Failed to verifiy TOPUP"},status=status.HTTP_400_BAD_REQUEST)
+        if not webhooks.receive_event(payload, body):
+            # anything but a 200 makes Paystack deliver the event again
+            return Response({"error": "Event could not be applied."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return Response(status=status.HTTP_200_OK)
 
 
 class GetWalletBalanceView(APIView):
@@ -181,36 +164,24 @@ class GetWalletBalanceView(APIView):
 class WalletHistoryView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @extend_schema(
+        summary="Wallet history",
+        description="The wallet's ledger entries, newest first, with the balance after each. Paginated with opaque `cursor` tokens.",
+        parameters=[
+            OpenApiParameter(name='cursor', location=OpenApiParameter.QUERY, description='Cursor from a previous `next`/`previous` link', type=OpenApiTypes.STR),
+            OpenApiParameter(name='page_size', location=OpenApiParameter.QUERY, description='Entries per page (max 100)', type=OpenApiTypes.INT),
+        ],
+        responses={200: LedgerEntrySerializer(many=True)},
+    )
     def get(self, request):
         user = request.user
-        
-        # Get Purchases (Transactions)
+        # the wallet is looked up inside the page query, so a page is one scan of the ledger index
         if user.role == 'vendor':
-            purchases = Transaction.objects.filter(vendor__vendor=user, status='COMPLETED').order_by('-timestamp')
-            topups = TopUpMOdel.objects.filter(vendor__vendor=user, status='COMPLETED').order_by('-created_at')
+            account_type, wallets = ledger.VENDOR, VendorWallet.objects.filter(vendor=user)
         else:
-            purchases = Transaction.objects.filter(buyer__user=user, status='COMPLETED').order_by('-timestamp')
-            topups = TopUpMOdel.objects.filter(buyer__user=user, status='COMPLETED').order_by('-created_at')
-            
-        purchase_data = TransactionSerializer(purchases, many=True).data
-        topup_data = TopUpSerializer(topups, many=True).data
-        
-        # Add labels to distinguish
-        for p in purchase_data:
-            p['history_type'] = 'PURCHASE'
-            p['date'] = p['timestamp']
-            p['type'] = 'debit'
-            p['amount'] = float(p['amount'])
-            
-        for t in topup_data:
-            t['history_type'] = 'TOPUP'
-            t['date'] = t.get('created_at', None) # If we don't have created_at yet legacy data might be problematic
-            t['type'] = 'credit'
-            t['amount'] = float(t['amount'])
-            t['description'] = 'Wallet Top-up'
-
-        # Combine and sort by date
-        history = purchase_data + topup_data
-        history.sort(key=lambda x: x.get('date') or '', reverse=True)
-        
-        return Response(history)
+            account_type, wallets = ledger.BUYER, BuyerWallet.objects.filter(user=user)
+        entries = LedgerEntry.objects.filter(account_type=account_type, account_id=Subquery(wallets.values('pk')[:1]))
+
+        paginator = LedgerCursorPagination()
+        page = paginator.paginate_queryset(entries, request, view=self)
+        return paginator.get_paginated_response(LedgerEntrySerializer(page, many=True).data)
@@ -0,0 +1,113 @@
+"""
+Paystack webhook ingestion.
+
+Paystack posts an event for every charge, signed with an HMAC-SHA512 of the
+raw body under our secret key. The webhook view checks the signature, then
+stores the event as a PaystackEvent and applies it in one transaction
+before answering. A `charge.success` for a top-up credits the wallet it was
+started from, once: the top-up row is locked and only a PENDING top-up
+whose amount matches the charge is credited, so redeliveries and replays
+change nothing.
+
+If applying an event raises, nothing is stored and the view answers 500,
+so Paystack delivers the event again later. `manage.py
+process_paystack_events` applies any event still stored as pending.
+"""
+import hashlib
+import hmac
+import logging
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from paymentapp.models import BuyerWallet, VendorWallet
+from . import ledger
+from .models import PaystackEvent, TopUpMOdel
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'x-paystack-signature'
+
+def valid_signature(body, signature):
+    secret = settings.PAYSTACK_SECRET_KEY
+    if not secret or not signature:
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def store_event(payload, body):
+    """
+    Save a webhook event unless it was already received. Returns the
+    PaystackEvent and whether it still needs applying.
+    """
+    data = payload.get('data') or {}
+    # events without a reference are told apart by their body instead
+    reference = str(data.get('reference') or hashlib.sha256(body).hexdigest())[:100]
+    event_type = str(payload.get('event') or '')[:64]
+    try:
+        with transaction.atomic():
+            event = PaystackEvent.objects.create(event=event_type, reference=reference, payload=payload)
+        return event, True
+    except IntegrityError:
+        event = PaystackEvent.objects.get(event=event_type, reference=reference)
+        return event, event.status == 'pending'
+
+
+def _credit_topup(data):
+    """Credit the top-up a successful charge paid for. Returns (status, error)."""
+    topup = TopUpMOdel.objects.select_for_update().filter(reference=data.get('reference')).first()
+    if topup is None:
+        return 'ignored', "No top-up with this reference."
+    if topup.status != 'PENDING':
+        # credited by an earlier delivery of this charge
+        return 'processed', None
+    try:
+        paid = Decimal(str(data.get('amount'))) / 100
+    except InvalidOperation:
+        paid = None
+    if data.get('status') != 'success' or paid != topup.amount:
+        return 'failed', f"Charge of {data.get('amount')} kobo does not match a top-up of {topup.amount} naira."
+
+    if topup.vendor_id:
+        wallet = VendorWallet.objects.select_for_update().get(pk=topup.vendor_id)
+    else:
+        wallet = BuyerWallet.objects.select_for_update().get(pk=topup.buyer_id)
+    balance = wallet.balance + topup.amount
+    type(wallet).objects.filter(pk=wallet.pk).update(balance=balance)
+    TopUpMOdel.objects.filter(pk=topup.pk).update(status='COMPLETED')
+    ledger.post(ledger.topup(topup, wallet, balance))
+    return 'processed', None
+
+
+def apply_event(event_id):
+    """Apply a stored event if it is still pending."""
+    with transaction.atomic():
+        event = PaystackEvent.objects.select_for_update().filter(pk=event_id, status='pending').first()
+        if event is None:
+            return
+        if event.event == 'charge.success':
+            status, error = _credit_topup(event.payload.get('data') or {})
+        else:
+            status, error = 'ignored', None
+        PaystackEvent.objects.filter(pk=event.pk).update(status=status, error=error, processed_at=timezone.now())
+    if status == 'failed':
+        logger.warning("Paystack event %s for %s not applied: %s", event.event, event.reference, error)
+
+
+def receive_event(payload, body):
+    """
+    Store a webhook event and apply it if it is new, in one transaction.
+    Returns False, having rolled both back, when applying it failed.
+    """
+    try:
+        with transaction.atomic():
+            event, pending = store_event(payload, body)
+            if pending:
+                apply_event(event.pk)
+    except Exception:
+        logger.exception("Applying Paystack event %s failed", payload.get('event'))
+        return False
+    return True
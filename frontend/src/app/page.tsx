@@ -12,6 +12,8 @@ export default function Home(): JSX.Element {
   const [products, setProducts] = useState<any[]>([]);
   const [filteredProducts, setFilteredProducts] = useState<any[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [currentCategory, setCurrentCategory] = useState("all");
   const [searchQuery, setSearchQuery] = useState("");
   const [currentPage, setCurrentPage] = useState(1);
@@ -34,19 +36,24 @@ export default function Home(): JSX.Element {
     }
   }, [user]);
 
+  function feedHeaders() {
+    const headers: any = { "Content-Type": "application/json" };
+    if (user) {
+      headers["Authorization"] = `Bearer ${user.access}`;
+    }
+    return headers;
+  }
+
   async function fetchProducts() {
     setLoading(true);
     try {
-      const headers: any = { "Content-Type": "application/json" };
-      if (user) {
-        headers["Authorization"] = `Bearer ${user.access}`;
-      }
-
-      const res = await fetch(`https://upstartpy.onrender.com/products/`, { headers });
+      const res = await fetch(`https://upstartpy.onrender.com/products/?page_size=${itemsPerPage}`, { headers: feedHeaders() });
       if (res.ok) {
         const data = await res.json();
-        setProducts(data);
-        setFilteredProducts(data);
+        const items = Array.isArray(data) ? data : data.results ?? [];
+        setProducts(items);
+        setFilteredProducts(items);
+        setNextUrl(Array.isArray(data) ? null : data.next ?? null);
       } else {
         console.error("Failed to fetch products");
       }
@@ -57,6 +64,26 @@ export default function Home(): JSX.Element {
     }
   }
 
+  // Follow the feed's `next` cursor; pages continue the ranking the first page was cut from
+  async function loadMoreProducts() {
+    if (!nextUrl || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const res = await fetch(nextUrl, { headers: feedHeaders() });
+      if (res.ok) {
+        const data = await res.json();
+        setProducts(prev => [...prev, ...(data.results ?? [])]);
+        setNextUrl(data.next ?? null);
+      } else {
+        console.error("Failed to load more products");
+      }
+    } catch (error) {
+      console.error("Error loading more products", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  }
+
   useEffect(() => {
     let result = products;
 
@@ -65,9 +92,12 @@ export default function Home(): JSX.Element {
     }
 
     setFilteredProducts(result);
-    setCurrentPage(1);
   }, [currentCategory, products]);
 
+  useEffect(() => {
+    setCurrentPage(1);
+  }, [currentCategory]);
+
   const handleProductClick = async (product: any) => {
     try {
       const headers: any = { "Content-Type": "application/json" };
@@ -186,6 +216,18 @@ export default function Home(): JSX.Element {
               </button>
             </div>
           )}
+
+          {!loading && nextUrl && currentPage >= totalPages && (
+            <div className="flex justify-center mt-6">
+              <button
+                className="px-6 py-3 bg-white border border-gray-200 rounded-lg text-gray-900 text-sm font-medium transition-all duration-200 hover:bg-gray-50 hover:border-blue-600 disabled:opacity-50 disabled:cursor-not-allowed"
+                disabled={loadingMore}
+                onClick={loadMoreProducts}
+              >
+                {loadingMore ? 'Loading...' : 'Load more products'}
+              </button>
+            </div>
+          )}
         </section>
 
         {isModalOpen && selectedProduct && (
@@ -16,6 +16,8 @@ function VendorProfileContent() {
     const [content, setContent] = useState<any[]>([]);
     const [activeTab, setActiveTab] = useState('products');
     const [loading, setLoading] = useState(true);
+    const [productsNext, setProductsNext] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     const [selectedProduct, setSelectedProduct] = useState<any | null>(null);
     const [selectedVideo, setSelectedVideo] = useState<any | null>(null);
@@ -41,7 +43,8 @@ function VendorProfileContent() {
             const resProducts = await fetch(`https://upstartpy.onrender.com/products/vendor-products/${vendorId}`);
             if (resProducts.ok) {
                 const data = await resProducts.json();
-                setProducts(Array.isArray(data) ? data : []);
+                setProducts(Array.isArray(data) ? data : data.results ?? []);
+                setProductsNext(Array.isArray(data) ? null : data.next ?? null);
             }
 
             // Fetch Vendor Content
@@ -58,6 +61,24 @@ function VendorProfileContent() {
         }
     };
 
+    // Follow the listing's `next` cursor to append the vendor's older products
+    const loadMoreProducts = async () => {
+        if (!productsNext || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const res = await fetch(productsNext);
+            if (res.ok) {
+                const data = await res.json();
+                setProducts(prev => [...prev, ...(data.results ?? [])]);
+                setProductsNext(data.next ?? null);
+            }
+        } catch (e) {
+            console.error(e);
+        } finally {
+            setLoadingMore(false);
+        }
+    };
+
     const handleContact = async () => {
         if (!user) {
             alert("Please login to contact vendor");
@@ -160,7 +181,7 @@ function VendorProfileContent() {
                                 </div>
                                 <div className="bg-gray-50 p-4 rounded-lg text-center">
                                     <span className="block text-xs text-gray-600 mb-2">Products</span>
-                                    <span className="block text-xl font-bold text-blue-600">{products.length}</span>
+                                    <span className="block text-xl font-bold text-blue-600">{products.length}{productsNext ? '+' : ''}</span>
                                 </div>
                             </div>
                         </div>
@@ -201,6 +222,17 @@ function VendorProfileContent() {
                                     </div>
                                 )}
                             </div>
+                            {productsNext && (
+                                <div className="flex justify-center">
+                                    <button
+                                        className="px-6 py-3 bg-white border border-gray-200 rounded-lg text-gray-900 text-sm font-semibold cursor-pointer transition-all duration-300 hover:border-blue-600 hover:text-blue-600 disabled:opacity-50 disabled:cursor-not-allowed"
+                                        disabled={loadingMore}
+                                        onClick={loadMoreProducts}
+                                    >
+                                        {loadingMore ? 'Loading...' : 'Load more products'}
+                                    </button>
+                                </div>
+                            )}
                         </div>
                     )}
 
@@ -11,6 +11,10 @@ interface Transaction {
     date: string;
 }
 
+// Top-up confirmation polling: up to a minute, every 3 seconds
+const VERIFY_ATTEMPTS = 20;
+const VERIFY_INTERVAL_MS = 3000;
+
 interface Toast {
     id: number;
     message: string;
@@ -24,6 +28,8 @@ export default function WalletPage() {
     // State
     const [balance, setBalance] = useState<number>(0);
     const [transactions, setTransactions] = useState<Transaction[]>([]);
+    const [historyNext, setHistoryNext] = useState<string | null>(null);
+    const [loadingMore, setLoadingMore] = useState(false);
 
     // Drawer States
     const [isAddMoneyOpen, setIsAddMoneyOpen] = useState(false);
@@ -111,10 +117,11 @@ export default function WalletPage() {
             });
 
             if (historyResponse.ok) {
+                // Backend returns a page of ledger entries, newest first:
+                // { next, previous, results: [{ id, history_type, type, amount, balance, reference, date, description }] }
                 const historyData = await historyResponse.json();
-                // Map the backend structure to our local interface if needed
-                // Backend returns: { id, amount, status, transaction_type, reference, history_type, date, type, description }
-                setTransactions(historyData);
+                setTransactions(historyData.results ?? []);
+                setHistoryNext(historyData.next ?? null);
             } else {
                 console.error("Failed to load history from API");
                 // Fallback to local transactions (legacy)
@@ -122,6 +129,7 @@ export default function WalletPage() {
                 const allTrans = stored ? JSON.parse(stored) : [];
                 const userTrans = allTrans.filter((t: any) => t.userId === user.user?.id);
                 setTransactions(userTrans.reverse());
+                setHistoryNext(null);
             }
 
         } catch (error) {
@@ -130,21 +138,56 @@ export default function WalletPage() {
         }
     };
 
-    const verifyPayment = async (reference: string, amount: number) => {
-        setPaymentModalOpen(true);
-        setPaymentState('loading');
-
+    const loadMoreTransactions = async () => {
+        if (!user || !historyNext || loadingMore) return;
+        setLoadingMore(true);
         try {
-            const response = await fetch(`https://upstartpy.onrender.com/wallet/verify-topup/${reference}`, {
+            const response = await fetch(historyNext, {
                 method: "GET",
                 headers: {
                     "Content-Type": "application/json",
                     "Authorization": `Bearer ${user.access}`
                 }
             });
+            if (response.ok) {
+                const data = await response.json();
+                setTransactions(prev => [...prev, ...(data.results ?? [])]);
+                setHistoryNext(data.next ?? null);
+            } else {
+                showToast('Failed to load more transactions.', 'error');
+            }
+        } catch (error) {
+            console.error("Error loading transactions", error);
+            showToast('Failed to load more transactions. Check your connection.', 'error');
+        } finally {
+            setLoadingMore(false);
+        }
+    };
 
-            if (!response.ok) {
-                console.error('Verification failed:', response.status);
+    const verifyPayment = async (reference: string, amount: number) => {
+        setPaymentModalOpen(true);
+        setPaymentState('loading');
+
+        try {
+            // The wallet is credited when Paystack's webhook arrives, which can
+            // trail the redirect back here; 202 means it has not arrived yet.
+            let response: Response | null = null;
+            for (let attempt = 0; attempt < VERIFY_ATTEMPTS; attempt++) {
+                if (attempt > 0) {
+                    await new Promise(resolve => setTimeout(resolve, VERIFY_INTERVAL_MS));
+                }
+                response = await fetch(`https://upstartpy.onrender.com/wallet/verify-topup/${reference}`, {
+                    method: "GET",
+                    headers: {
+                        "Content-Type": "application/json",
+                        "Authorization": `Bearer ${user.access}`
+                    }
+                });
+                if (response.status !== 202) break;
+            }
+
+            if (!response || !response.ok) {
+                console.error('Verification failed:', response?.status);
                 setPaymentState('failed');
                 setPaymentDetails({
                     reference: reference,
@@ -156,8 +199,15 @@ export default function WalletPage() {
 
             const result = await response.json();
 
-            // Backend returns { data: {...}, wallet_balance: ... } on success
-            // response.ok means verification succeeded
+            if (result.status !== 'COMPLETED') {
+                // Still unconfirmed after polling; the balance updates once it lands
+                setPaymentModalOpen(false);
+                setPaymentState('idle');
+                showToast('Payment is still being confirmed. Your balance will update shortly.', 'info');
+                loadWalletData();
+                return;
+            }
+
             setPaymentState('success');
             setPaymentDetails({
                 amount: `₦${amount.toFixed(2)}`,
@@ -359,6 +409,17 @@ export default function WalletPage() {
                             ))
                         )}
                     </div>
+                    {historyNext && (
+                        <div className="flex justify-center mt-4">
+                            <button
+                                className="px-6 py-3 bg-white border border-gray-200 rounded-lg text-gray-900 text-sm font-semibold cursor-pointer transition-all duration-300 hover:border-blue-600 hover:text-blue-600 disabled:opacity-50 disabled:cursor-not-allowed"
+                                disabled={loadingMore}
+                                onClick={loadMoreTransactions}
+                            >
+                                {loadingMore ? 'Loading...' : 'Load more transactions'}
+                            </button>
+                        </div>
+                    )}
                 </div>
             </div>
 